@@ -333,4 +333,688 @@ create table public.data_request (
   constraint data_request_pkey primary key (id),
   constraint data_request_request_type_id_fkey foreign KEY (request_type_id) references request_type (id) on update CASCADE on delete RESTRICT,
   constraint data_request_requesting_user_id_fkey foreign KEY (requesting_user_id) references user_profile (id) on update CASCADE on delete set null
-) TABLESPACE pg_default;
\ No newline at end of file
+) TABLESPACE pg_default;
+
+-- =====================================================================
+-- Índices secundarios (claves foráneas y columnas de filtro frecuentes)
+-- Mismo contenido que web/database/migrations/002_add_hot_path_indexes.sql
+-- y 003_add_vehicle_timeline_indexes.sql
+-- =====================================================================
+
+create index if not exists idx_maintenance_order_workshop_entry on public.maintenance_order (workshop_id, entry_date desc, id desc);
+create index if not exists idx_maintenance_order_workshop_status_entry on public.maintenance_order (workshop_id, order_status_id, entry_date desc);
+create index if not exists idx_maintenance_order_vehicle_created on public.maintenance_order (vehicle_id, created_at desc);
+create index if not exists idx_maintenance_order_vehicle_entry on public.maintenance_order (vehicle_id, entry_date desc, id desc);
+create index if not exists idx_maintenance_order_vehicle_open on public.maintenance_order (vehicle_id) where exit_date is null;
+create index if not exists idx_maintenance_order_workshop_open on public.maintenance_order (workshop_id) where exit_date is null;
+create index if not exists idx_maintenance_task_order on public.maintenance_task (maintenance_order_id, created_at);
+create index if not exists idx_maintenance_task_part_task on public.maintenance_task_part (maintenance_task_id);
+create index if not exists idx_maintenance_task_part_inventory on public.maintenance_task_part (workshop_inventory_id);
+create index if not exists idx_vehicle_fire_station on public.vehicle (fire_station_id);
+create index if not exists idx_vehicle_status_log_vehicle_change_id on public.vehicle_status_log (vehicle_id, change_date desc, id desc);
+create index if not exists idx_user_profile_workshop on public.user_profile (workshop_id) where workshop_id is not null;
+create index if not exists idx_user_profile_fire_station on public.user_profile (fire_station_id) where fire_station_id is not null;
+create index if not exists idx_workshop_inventory_workshop_quantity on public.workshop_inventory (workshop_id, quantity);
+create index if not exists idx_supplier_workshop on public.supplier (workshop_id);
+create index if not exists idx_data_request_status_created on public.data_request (status, created_at desc);
+create index if not exists idx_data_request_requesting_user_created on public.data_request (requesting_user_id, created_at desc);
+
+-- =====================================================================
+-- Estado actual de la flota (vehicle_fleet_state)
+-- Una fila por vehículo con su estado actual y su orden de mantención
+-- abierta (si existe), mantenida por triggers sobre vehicle,
+-- maintenance_order y maintenance_order_status. Responder "¿tiene el vehículo una orden activa?" es
+-- una búsqueda por clave primaria en vez de recorrer su historial de órdenes.
+-- Mismo contenido que web/database/migrations/004_add_vehicle_fleet_state.sql
+-- =====================================================================
+
+-- Solo vehicle_id es clave foránea: con más FKs PostgREST podría tratar la
+-- tabla como tabla intermedia entre vehicle y otras tablas y volver ambiguos
+-- los recursos embebidos existentes. Los demás IDs los mantienen los triggers.
+create table if not exists public.vehicle_fleet_state (
+  vehicle_id bigint not null,
+  fire_station_id bigint not null,
+  vehicle_status_id bigint not null,
+  open_order_id bigint null,
+  open_order_status_id bigint null,
+  open_order_status_name character varying null,
+  open_order_workshop_id bigint null,
+  updated_at timestamp without time zone not null default now(),
+  constraint vehicle_fleet_state_pkey primary key (vehicle_id),
+  constraint vehicle_fleet_state_vehicle_id_fkey foreign KEY (vehicle_id) references vehicle (id) on update CASCADE on delete CASCADE
+) TABLESPACE pg_default;
+
+create index if not exists idx_vehicle_fleet_state_fire_station_open
+  on public.vehicle_fleet_state (fire_station_id) where open_order_id is not null;
+create index if not exists idx_vehicle_fleet_state_workshop_open
+  on public.vehicle_fleet_state (open_order_workshop_id) where open_order_id is not null;
+
+-- Recalcula la fila de un vehículo. La orden abierta es la más reciente sin
+-- fecha de salida y con un estado que no indica finalización (mismo criterio
+-- que create_maintenance_order y OrderService.is_completion_status).
+create or replace function public.refresh_vehicle_fleet_state(p_vehicle_id bigint)
+returns void
+language plpgsql
+set search_path = ''
+as $$
+begin
+  insert into public.vehicle_fleet_state (
+    vehicle_id, fire_station_id, vehicle_status_id,
+    open_order_id, open_order_status_id, open_order_status_name, open_order_workshop_id, updated_at
+  )
+  select
+    v.id, v.fire_station_id, v.vehicle_status_id,
+    o.id, o.order_status_id, o.status_name, o.workshop_id, (now() at time zone 'utc')
+  from public.vehicle v
+  left join lateral (
+    select mo.id, mo.order_status_id, mos.name as status_name, mo.workshop_id
+    from public.maintenance_order mo
+    join public.maintenance_order_status mos on mos.id = mo.order_status_id
+    where mo.vehicle_id = v.id
+      and mo.exit_date is null
+      and mos.name !~* '(cancel|termin|final|complet|cerrad)'
+    order by mo.created_at desc
+    limit 1
+  ) o on true
+  where v.id = p_vehicle_id
+  on conflict (vehicle_id) do update set
+    fire_station_id = excluded.fire_station_id,
+    vehicle_status_id = excluded.vehicle_status_id,
+    open_order_id = excluded.open_order_id,
+    open_order_status_id = excluded.open_order_status_id,
+    open_order_status_name = excluded.open_order_status_name,
+    open_order_workshop_id = excluded.open_order_workshop_id,
+    updated_at = excluded.updated_at;
+end;
+$$;
+
+create or replace function public.vehicle_fleet_state_on_vehicle()
+returns trigger
+language plpgsql
+set search_path = ''
+as $$
+begin
+  perform public.refresh_vehicle_fleet_state(new.id);
+  return null;
+end;
+$$;
+
+create or replace function public.vehicle_fleet_state_on_order()
+returns trigger
+language plpgsql
+set search_path = ''
+as $$
+begin
+  if tg_op = 'INSERT' then
+    perform public.refresh_vehicle_fleet_state(new.vehicle_id);
+  elsif tg_op = 'DELETE' then
+    perform public.refresh_vehicle_fleet_state(old.vehicle_id);
+  else
+    perform public.refresh_vehicle_fleet_state(new.vehicle_id);
+    -- La orden se movió a otro vehículo: recalcular también el anterior
+    if new.vehicle_id is distinct from old.vehicle_id then
+      perform public.refresh_vehicle_fleet_state(old.vehicle_id);
+    end if;
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function public.vehicle_fleet_state_on_order_status()
+returns trigger
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_vehicle_id bigint;
+begin
+  -- Renombrar un estado puede abrir o cerrar las órdenes que lo usan (el
+  -- criterio de orden abierta es por nombre) y cambia open_order_status_name:
+  -- se recalculan los vehículos con órdenes sin salida en ese estado.
+  for v_vehicle_id in
+    select distinct mo.vehicle_id
+    from public.maintenance_order mo
+    where mo.order_status_id = new.id
+      and mo.exit_date is null
+  loop
+    perform public.refresh_vehicle_fleet_state(v_vehicle_id);
+  end loop;
+  return null;
+end;
+$$;
+
+-- La fila se borra en cascada con el vehículo; solo se recalcula al crearlo
+-- o al cambiar su cuartel o estado.
+drop trigger if exists trg_vehicle_fleet_state_insert on public.vehicle;
+create trigger trg_vehicle_fleet_state_insert
+  after insert on public.vehicle
+  for each row execute function public.vehicle_fleet_state_on_vehicle();
+
+drop trigger if exists trg_vehicle_fleet_state_update on public.vehicle;
+create trigger trg_vehicle_fleet_state_update
+  after update of vehicle_status_id, fire_station_id on public.vehicle
+  for each row
+  when (old.vehicle_status_id is distinct from new.vehicle_status_id
+        or old.fire_station_id is distinct from new.fire_station_id)
+  execute function public.vehicle_fleet_state_on_vehicle();
+
+drop trigger if exists trg_vehicle_fleet_state_order on public.maintenance_order;
+create trigger trg_vehicle_fleet_state_order
+  after insert or delete or update of vehicle_id, order_status_id, exit_date, created_at on public.maintenance_order
+  for each row execute function public.vehicle_fleet_state_on_order();
+
+drop trigger if exists trg_vehicle_fleet_state_order_status on public.maintenance_order_status;
+create trigger trg_vehicle_fleet_state_order_status
+  after update of name on public.maintenance_order_status
+  for each row
+  when (old.name is distinct from new.name)
+  execute function public.vehicle_fleet_state_on_order_status();
+
+-- =====================================================================
+-- Funciones de agregación para dashboards
+-- Cada función devuelve todos los contadores de su ámbito en un único
+-- objeto JSON, para que el dashboard cueste un solo round-trip (rpc()).
+-- =====================================================================
+
+create or replace function public.dashboard_global_stats()
+returns json
+language sql
+stable
+as $$
+  select json_build_object(
+    'total_workshops', (select count(*) from public.workshop),
+    'total_fire_stations', (select count(*) from public.fire_station),
+    'total_vehicles', (select count(*) from public.vehicle),
+    'available_vehicles', (
+      select count(*)
+      from public.vehicle v
+      join public.vehicle_status vs on vs.id = v.vehicle_status_id
+      where vs.name = 'Disponible'
+    ),
+    'in_maintenance_vehicles', (
+      select count(*)
+      from public.vehicle v
+      join public.vehicle_status vs on vs.id = v.vehicle_status_id
+      where vs.name = 'En Taller'
+    ),
+    'pending_requests_count', (
+      select count(*) from public.data_request where status = 'pendiente'
+    )
+  );
+$$;
+
+create or replace function public.dashboard_workshop_stats(p_workshop_id bigint)
+returns json
+language sql
+stable
+as $$
+  with order_counts as (
+    select
+      count(*) as total_ordenes,
+      count(*) filter (where mos.name = 'En Taller') as ordenes_en_taller,
+      count(*) filter (where mos.name = 'Pendiente') as ordenes_pendientes,
+      count(*) filter (where mos.name = 'En Espera de Repuestos') as ordenes_espera_repuesto
+    from public.maintenance_order mo
+    join public.maintenance_order_status mos on mos.id = mo.order_status_id
+    where mo.workshop_id = p_workshop_id
+  )
+  select json_build_object(
+    'ordenes_en_taller', oc.ordenes_en_taller,
+    'ordenes_pendientes', oc.ordenes_pendientes,
+    'ordenes_espera_repuesto', oc.ordenes_espera_repuesto,
+    'total_ordenes', oc.total_ordenes,
+    'repuestos_bajo_stock', (
+      select count(*)
+      from public.workshop_inventory wi
+      where wi.workshop_id = p_workshop_id
+        and wi.quantity < 5
+    ),
+    'pending_requests_count', (
+      select count(*)
+      from public.data_request dr
+      join public.user_profile up on up.id = dr.requesting_user_id
+      where up.workshop_id = p_workshop_id
+        and dr.status = 'pendiente'
+    )
+  )
+  from order_counts oc;
+$$;
+
+create or replace function public.dashboard_fire_station_stats(p_fire_station_id bigint)
+returns json
+language sql
+stable
+as $$
+  with station_vehicles as (
+    select
+      v.id,
+      v.next_revision_date,
+      vs.name as status_name,
+      coalesce(vt.name, 'Sin Tipo') as type_name
+    from public.vehicle v
+    join public.vehicle_status vs on vs.id = v.vehicle_status_id
+    left join public.vehicle_type vt on vt.id = v.vehicle_type_id
+    where v.fire_station_id = p_fire_station_id
+  ),
+  status_counts as (
+    select status_name, count(*) as total
+    from station_vehicles
+    group by status_name
+  ),
+  type_counts as (
+    select type_name, count(*) as total
+    from station_vehicles
+    group by type_name
+  )
+  select json_build_object(
+    'total_vehicles', (select count(*) from station_vehicles),
+    'vehicles_available', coalesce((select total from status_counts where status_name = 'Disponible'), 0),
+    'vehicles_in_maintenance', coalesce((select total from status_counts where status_name = 'En Taller'), 0),
+    'vehicles_out_of_service', coalesce((select total from status_counts where status_name = 'De Baja'), 0),
+    'vehicles_need_revision', (
+      select count(*)
+      from station_vehicles
+      where next_revision_date is not null
+        and next_revision_date <= current_date + 30
+    ),
+    -- Vehículos con una orden de mantención abierta (ver vehicle_fleet_state)
+    'vehicles_with_open_order', (
+      select count(*)
+      from public.vehicle_fleet_state fs
+      where fs.fire_station_id = p_fire_station_id
+        and fs.open_order_id is not null
+    ),
+    'vehicles_by_status', coalesce(
+      (select json_object_agg(status_name, total order by status_name) from status_counts),
+      '{}'::json
+    ),
+    'vehicles_by_type', coalesce(
+      (select json_object_agg(type_name, total order by type_name) from type_counts),
+      '{}'::json
+    )
+  );
+$$;
+
+-- =====================================================================
+-- Consultas sobre auth.users para el backend (solo service_role)
+-- =====================================================================
+
+-- Obtiene email y teléfono de varios usuarios de auth en una sola llamada.
+create or replace function public.get_auth_users_by_ids(p_user_ids uuid[])
+returns table (id uuid, email text, phone text)
+language sql
+stable
+security definer
+set search_path = ''
+as $$
+  select u.id, u.email::text, u.phone::text
+  from auth.users u
+  where u.id = any(p_user_ids);
+$$;
+
+revoke execute on function public.get_auth_users_by_ids(uuid[]) from public, anon, authenticated;
+grant execute on function public.get_auth_users_by_ids(uuid[]) to service_role;
+
+-- Busca el ID de un usuario de auth por email (sin distinguir mayúsculas).
+-- Supabase Auth guarda los emails normalizados en minúsculas y los indexa con
+-- el índice único parcial users_email_partial_key (email) where is_sso_user =
+-- false; comparar contra lower(p_email) con ese mismo predicado usa el índice
+-- en lugar de recorrer la tabla. Los usuarios SSO (que pueden repetir email)
+-- no se consideran: la plataforma solo crea usuarios con email y contraseña.
+create or replace function public.find_auth_user_id_by_email(p_email text)
+returns uuid
+language sql
+stable
+security definer
+set search_path = ''
+as $$
+  select u.id
+  from auth.users u
+  where u.email = lower(trim(p_email))
+    and u.is_sso_user = false
+  order by u.created_at
+  limit 1;
+$$;
+
+revoke execute on function public.find_auth_user_id_by_email(text) from public, anon, authenticated;
+grant execute on function public.find_auth_user_id_by_email(text) to service_role;
+
+-- Búsqueda de repuestos del catálogo maestro (autocompletado del inventario).
+-- Índice trigram sobre nombre + SKU + marca: sirve tanto para ILIKE '%texto%'
+-- como para similitud de palabras (<%), por lo que el costo de la búsqueda no
+-- depende del tamaño del catálogo.
+create extension if not exists pg_trgm with schema extensions;
+
+create index if not exists idx_spare_part_search_trgm
+  on public.spare_part
+  using gin ((lower(name || ' ' || sku || ' ' || coalesce(brand, ''))) extensions.gin_trgm_ops);
+
+-- Ranking: SKU exacto > prefijo de SKU/nombre > substring > similitud difusa.
+create or replace function public.search_spare_parts(p_query text, p_limit integer default 20)
+returns table (
+  id bigint,
+  name character varying,
+  sku character varying,
+  brand character varying,
+  description text,
+  rank real
+)
+language sql
+stable
+set search_path = public, extensions
+as $$
+  with q as (
+    select
+      lower(trim(coalesce(p_query, ''))) as term,
+      replace(replace(replace(lower(trim(coalesce(p_query, ''))), '\', '\\'), '%', '\%'), '_', '\_') as pattern
+  )
+  select
+    sp.id,
+    sp.name,
+    sp.sku,
+    sp.brand,
+    sp.description,
+    (case
+      when lower(sp.sku) = q.term then 1.0
+      when lower(sp.sku) like q.pattern || '%' or lower(sp.name) like q.pattern || '%' then 0.9
+      when lower(sp.name || ' ' || sp.sku || ' ' || coalesce(sp.brand, '')) like '%' || q.pattern || '%' then 0.8
+      else word_similarity(q.term, lower(sp.name || ' ' || sp.sku || ' ' || coalesce(sp.brand, ''))) * 0.7
+    end)::real as rank
+  from public.spare_part sp, q
+  where q.term <> ''
+    and (
+      lower(sp.name || ' ' || sp.sku || ' ' || coalesce(sp.brand, '')) like '%' || q.pattern || '%'
+      or q.term <% lower(sp.name || ' ' || sp.sku || ' ' || coalesce(sp.brand, ''))
+    )
+  order by rank desc, sp.name
+  limit least(greatest(coalesce(p_limit, 20), 1), 50);
+$$;
+
+-- =====================================================================
+-- Movimientos de stock del inventario de taller
+-- Cada movimiento (descontar o devolver stock al agregar/quitar un
+-- repuesto de una tarea) se hace en una sola transacción y una sola
+-- llamada. El stock se modifica con un UPDATE condicional, por lo que
+-- dos mecánicos concurrentes no pueden dejarlo negativo ni perder
+-- actualizaciones.
+-- =====================================================================
+
+-- Libro de movimientos de inventario (auditoría)
+create table if not exists public.inventory_movement (
+  id bigint generated by default as identity not null,
+  quantity_delta bigint not null,
+  resulting_quantity bigint not null,
+  reason character varying not null,
+  created_at timestamp without time zone not null default now(),
+  workshop_inventory_id bigint not null,
+  maintenance_task_part_id bigint null,
+  created_by_user_id uuid null,
+  constraint inventory_movement_pkey primary key (id),
+  constraint inventory_movement_workshop_inventory_id_fkey foreign KEY (workshop_inventory_id) references workshop_inventory (id) on update CASCADE on delete CASCADE,
+  constraint inventory_movement_maintenance_task_part_id_fkey foreign KEY (maintenance_task_part_id) references maintenance_task_part (id) on update CASCADE on delete set null,
+  constraint inventory_movement_created_by_user_id_fkey foreign KEY (created_by_user_id) references user_profile (id) on update CASCADE on delete set null
+) TABLESPACE pg_default;
+
+create index if not exists idx_inventory_movement_inventory_created
+  on public.inventory_movement (workshop_inventory_id, created_at desc);
+
+-- Agrega un repuesto a una tarea descontando el stock.
+-- La tarea debe pertenecer a la orden p_order_id del taller p_workshop_id, y el
+-- inventario a ese mismo taller.
+-- Devuelve {"part": <fila maintenance_task_part>, "new_quantity": <stock>}.
+-- Errores: 'Stock insuficiente', inventario/tarea inexistente o de otra orden/taller.
+drop function if exists public.add_part_to_task(bigint, bigint, bigint, uuid, boolean);
+create or replace function public.add_part_to_task(
+  p_order_id bigint,
+  p_workshop_id bigint,
+  p_task_id bigint,
+  p_workshop_inventory_id bigint,
+  p_quantity bigint,
+  p_user_id uuid default null,
+  p_log_movement boolean default true
+)
+returns json
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_workshop_id bigint;
+  v_new_quantity bigint;
+  v_cost double precision;
+  v_part public.maintenance_task_part;
+begin
+  if p_quantity is null or p_quantity <= 0 then
+    raise exception 'La cantidad debe ser mayor a 0' using errcode = '22023';
+  end if;
+
+  select o.workshop_id into v_workshop_id
+  from public.maintenance_task t
+  join public.maintenance_order o on o.id = t.maintenance_order_id
+  where t.id = p_task_id
+    and o.id = p_order_id
+    and o.workshop_id = p_workshop_id;
+
+  if v_workshop_id is null then
+    raise exception 'Tarea % no encontrada', p_task_id using errcode = 'P0002';
+  end if;
+
+  update public.workshop_inventory wi
+  set quantity = wi.quantity - p_quantity,
+      updated_at = now(),
+      last_updated_by_user_id = coalesce(p_user_id, wi.last_updated_by_user_id)
+  where wi.id = p_workshop_inventory_id
+    and wi.workshop_id = v_workshop_id
+    and wi.quantity >= p_quantity
+  returning wi.quantity, wi.current_cost into v_new_quantity, v_cost;
+
+  if not found then
+    if exists (
+      select 1 from public.workshop_inventory wi
+      where wi.id = p_workshop_inventory_id and wi.workshop_id = v_workshop_id
+    ) then
+      raise exception 'Stock insuficiente' using errcode = 'P0001';
+    end if;
+    raise exception 'Inventario % no encontrado', p_workshop_inventory_id using errcode = 'P0002';
+  end if;
+
+  insert into public.maintenance_task_part (maintenance_task_id, workshop_inventory_id, quantity_used, cost_per_unit)
+  values (p_task_id, p_workshop_inventory_id, p_quantity, v_cost)
+  returning * into v_part;
+
+  if p_log_movement then
+    insert into public.inventory_movement
+      (workshop_inventory_id, maintenance_task_part_id, quantity_delta, resulting_quantity, reason, created_by_user_id)
+    values
+      (p_workshop_inventory_id, v_part.id, -p_quantity, v_new_quantity, 'task_part_add', p_user_id);
+  end if;
+
+  return json_build_object('part', row_to_json(v_part), 'new_quantity', v_new_quantity);
+end;
+$$;
+
+-- Quita un repuesto de una tarea y devuelve su cantidad al stock.
+-- El repuesto debe pertenecer a una tarea de la orden p_order_id del taller
+-- p_workshop_id.
+-- Devuelve {"part": <fila eliminada>, "new_quantity": <stock>}.
+drop function if exists public.remove_part_from_task(bigint, uuid, boolean);
+create or replace function public.remove_part_from_task(
+  p_order_id bigint,
+  p_workshop_id bigint,
+  p_part_id bigint,
+  p_user_id uuid default null,
+  p_log_movement boolean default true
+)
+returns json
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_new_quantity bigint;
+  v_part public.maintenance_task_part;
+begin
+  delete from public.maintenance_task_part tp
+  using public.maintenance_task t, public.maintenance_order o
+  where tp.id = p_part_id
+    and t.id = tp.maintenance_task_id
+    and o.id = t.maintenance_order_id
+    and o.id = p_order_id
+    and o.workshop_id = p_workshop_id
+  returning tp.* into v_part;
+
+  if not found then
+    raise exception 'Repuesto usado % no encontrado', p_part_id using errcode = 'P0002';
+  end if;
+
+  update public.workshop_inventory wi
+  set quantity = wi.quantity + v_part.quantity_used,
+      updated_at = now(),
+      last_updated_by_user_id = coalesce(p_user_id, wi.last_updated_by_user_id)
+  where wi.id = v_part.workshop_inventory_id
+    and wi.workshop_id = p_workshop_id
+  returning wi.quantity into v_new_quantity;
+
+  if p_log_movement then
+    insert into public.inventory_movement
+      (workshop_inventory_id, maintenance_task_part_id, quantity_delta, resulting_quantity, reason, created_by_user_id)
+    values
+      (v_part.workshop_inventory_id, null, v_part.quantity_used, v_new_quantity, 'task_part_remove', p_user_id);
+  end if;
+
+  return json_build_object('part', row_to_json(v_part), 'new_quantity', v_new_quantity);
+end;
+$$;
+
+-- =====================================================================
+-- Creación de órdenes de mantención
+-- =====================================================================
+
+-- Crea una orden de mantención en una sola transacción:
+-- 1. Bloquea el vehículo (serializa creaciones concurrentes para el mismo vehículo).
+-- 2. Verifica que no tenga otra orden activa (sin fecha de salida y con
+--    estado que no sea de finalización).
+-- 3. Inserta la orden.
+-- 4. Si se indica usuario, cambia el estado del vehículo (por defecto
+--    'En Taller') y registra el cambio en vehicle_status_log.
+-- Devuelve {"order": <fila>, "vehicle_status_changed": bool} o, si ya existe
+-- una orden activa, {"order": null, "error": "active_order", "active_order_id": id}.
+create or replace function public.create_maintenance_order(
+  p_workshop_id bigint,
+  p_vehicle_id bigint,
+  p_mileage bigint,
+  p_maintenance_type_id bigint,
+  p_order_status_id bigint,
+  p_assigned_mechanic_id uuid default null,
+  p_entry_date date default null,
+  p_observations text default '',
+  p_user_id uuid default null,
+  p_vehicle_status_name text default 'En Taller'
+)
+returns json
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_current_status_id bigint;
+  v_target_status_id bigint;
+  v_active_order_id bigint;
+  v_order public.maintenance_order;
+  v_status_changed boolean := false;
+begin
+  select v.vehicle_status_id into v_current_status_id
+  from public.vehicle v
+  where v.id = p_vehicle_id
+  for update;
+
+  if not found then
+    raise exception 'Vehículo % no encontrado', p_vehicle_id using errcode = 'P0002';
+  end if;
+
+  select o.id into v_active_order_id
+  from public.maintenance_order o
+  join public.maintenance_order_status s on s.id = o.order_status_id
+  where o.vehicle_id = p_vehicle_id
+    and o.exit_date is null
+    and s.name !~* '(cancel|termin|final|complet|cerrad)'
+  order by o.created_at desc
+  limit 1;
+
+  if v_active_order_id is not null then
+    return json_build_object('order', null, 'error', 'active_order', 'active_order_id', v_active_order_id);
+  end if;
+
+  insert into public.maintenance_order (
+    workshop_id, vehicle_id, mileage, maintenance_type_id, order_status_id,
+    assigned_mechanic_id, entry_date, observations
+  )
+  values (
+    p_workshop_id, p_vehicle_id, p_mileage, p_maintenance_type_id, p_order_status_id,
+    p_assigned_mechanic_id, coalesce(p_entry_date, current_date), coalesce(p_observations, '')
+  )
+  returning * into v_order;
+
+  if p_user_id is not null and p_vehicle_status_name is not null then
+    select vs.id into v_target_status_id
+    from public.vehicle_status vs
+    where lower(vs.name) = lower(trim(p_vehicle_status_name))
+    limit 1;
+
+    if v_target_status_id is not null then
+      v_status_changed := (public.transition_vehicle_status(
+        p_vehicle_id, v_target_status_id, p_user_id,
+        format('Automático: Orden de mantención #%s creada', v_order.id)
+      ) ->> 'changed')::boolean;
+    end if;
+  end if;
+
+  return json_build_object('order', row_to_json(v_order), 'vehicle_status_changed', v_status_changed);
+end;
+$$;
+
+-- =====================================================================
+-- Cambio de estado de vehículos
+-- =====================================================================
+
+-- Cambia el estado de un vehículo y registra el cambio en vehicle_status_log
+-- en una sola llamada. Es idempotente: si el vehículo ya tiene ese estado no
+-- modifica nada ni escribe en el historial.
+-- p_fire_station_id (opcional) restringe el cambio a vehículos de ese cuartel.
+-- Devuelve {"found": bool, "changed": bool, "previous_status_id": id}.
+create or replace function public.transition_vehicle_status(
+  p_vehicle_id bigint,
+  p_status_id bigint,
+  p_user_id uuid default null,
+  p_reason text default '',
+  p_fire_station_id bigint default null
+)
+returns json
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_previous_status_id bigint;
+begin
+  select v.vehicle_status_id into v_previous_status_id
+  from public.vehicle v
+  where v.id = p_vehicle_id
+    and (p_fire_station_id is null or v.fire_station_id = p_fire_station_id)
+  for update;
+
+  if not found then
+    return json_build_object('found', false, 'changed', false, 'previous_status_id', null);
+  end if;
+
+  if v_previous_status_id = p_status_id then
+    return json_build_object('found', true, 'changed', false, 'previous_status_id', v_previous_status_id);
+  end if;
+
+  update public.vehicle
+  set vehicle_status_id = p_status_id,
+      updated_at = (now() at time zone 'utc')
+  where id = p_vehicle_id;
+
+  insert into public.vehicle_status_log (vehicle_id, changed_by_user_id, vehicle_status_id, change_date, reason)
+  values (p_vehicle_id, p_user_id, p_status_id, (now() at time zone 'utc'), coalesce(p_reason, ''));
+
+  return json_build_object('found', true, 'changed', true, 'previous_status_id', v_previous_status_id);
+end;
+$$;
@@ -1,6 +1,34 @@
+import os
+import sys
+import threading
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def _is_server_process() -> bool:
+    """
+    Indica si el proceso actual va a atender peticiones.
+
+    Con manage.py solo cuenta `runserver`, y únicamente en el proceso hijo del
+    autoreloader (RUN_MAIN); el resto de los comandos (migrate, shell, tests...)
+    no son servidores. Fuera de manage.py (gunicorn, uvicorn) siempre lo es.
+    """
+    if os.path.basename(sys.argv[0]) != 'manage.py':
+        return True
+    return len(sys.argv) > 1 and sys.argv[1] == 'runserver' and os.environ.get('RUN_MAIN') == 'true'
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Precargar las tablas de catálogo en segundo plano para que la primera
+        # petición no pague las consultas (ver shared.services.reference_data_service)
+        if (
+            getattr(settings, 'REFERENCE_DATA_WARMUP', False)
+            and os.getenv('SUPABASE_URL')
+            and _is_server_process()
+        ):
+            from shared.services.reference_data_service import ReferenceDataService
+            threading.Thread(target=ReferenceDataService.warm_up, daemon=True).start()
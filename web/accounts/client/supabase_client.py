@@ -1,6 +1,11 @@
 import os
 import logging
-from supabase import create_client, Client
+import threading
+import httpx
+from postgrest import SyncPostgrestClient
+from supabase import create_client, Client, ClientOptions
+
+from shared.services.query_metrics import InstrumentedTransport
 
 # Inicializa el logger para este módulo.
 logger = logging.getLogger(__name__)
@@ -13,6 +18,68 @@ _supabase: Client | None = None
 # Singleton para el cliente ADMIN (SERVICE_KEY)
 _supabase_admin: Client | None = None
 
+# Pool HTTP compartido por todos los clientes (keep-alive, HTTP/2 si está disponible).
+# httpx.Client es thread-safe y cada petición lleva sus propias cabeceras, por lo
+# que puede compartirse entre clientes con distintas credenciales.
+_http_client: httpx.Client | None = None
+
+# Protege la creación perezosa de los singletons bajo servidores multi-hilo.
+_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    """Indica si el paquete opcional `h2` está instalado (requerido para HTTP/2)."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Obtiene el pool de conexiones HTTP compartido por los clientes Supabase.
+
+    Se configura con las variables de entorno:
+    - SUPABASE_HTTP_POOL_SIZE: conexiones simultáneas máximas (por defecto 64, ver FANOUT_* en settings).
+    - SUPABASE_HTTP_KEEPALIVE: conexiones keep-alive a conservar (por defecto igual al pool).
+    - SUPABASE_HTTP_TIMEOUT: timeout de lectura/escritura en segundos (por defecto 10).
+    - SUPABASE_HTTP_CONNECT_TIMEOUT: timeout de conexión en segundos (por defecto 5).
+
+    Returns:
+        httpx.Client: El cliente HTTP compartido.
+    """
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                pool_size = int(os.getenv("SUPABASE_HTTP_POOL_SIZE", "64"))
+                keepalive = int(os.getenv("SUPABASE_HTTP_KEEPALIVE", str(pool_size)))
+                timeout = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "10"))
+                connect_timeout = float(os.getenv("SUPABASE_HTTP_CONNECT_TIMEOUT", "5"))
+                http2 = _http2_available()
+                logger.info(
+                    f"🔧 (get_http_client) Creando pool HTTP compartido "
+                    f"(pool={pool_size}, keepalive={keepalive}, timeout={timeout}s, http2={http2})"
+                )
+                # El transporte instrumentado registra cada llamada en la medición
+                # de la petición en curso (ver shared.services.query_metrics).
+                transport = httpx.HTTPTransport(
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=keepalive),
+                    http2=http2,
+                )
+                _http_client = httpx.Client(
+                    transport=InstrumentedTransport(transport),
+                    timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                    follow_redirects=True,
+                )
+    return _http_client
+
+
+def _client_options() -> ClientOptions:
+    """Opciones de cliente que reutilizan el pool HTTP compartido."""
+    return ClientOptions(httpx_client=get_http_client())
+
 def get_supabase() -> Client:
     """
     Obtiene una instancia singleton del cliente Supabase con la clave anónima.
@@ -31,35 +98,94 @@ def get_supabase() -> Client:
     global _supabase
     # Solo crea una nueva instancia si no existe una previamente.
     if _supabase is None:
-        logger.info("🔧 (get_supabase) Creando nueva instancia del cliente Supabase...")
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_ANON_KEY")
         if not url or not key:
             raise RuntimeError("No se encontraron SUPABASE_URL o SUPABASE_ANON_KEY en el entorno.")
-        _supabase = create_client(url, key)
+        options = _client_options()
+        with _lock:
+            if _supabase is None:
+                logger.info("🔧 (get_supabase) Creando nueva instancia del cliente Supabase...")
+                _supabase = create_client(url, key, options=options)
     return _supabase
 
-def get_supabase_with_user(token: str, refresh_token: str) -> Client:
+def create_auth_client() -> Client:
     """
-    Obtiene el cliente Supabase y establece la sesión de un usuario autenticado.
+    Crea un cliente Supabase efímero para operaciones que establecen una sesión
+    (ej. `sign_in_with_password`).
 
-    Utiliza la instancia base del cliente y le inyecta el token de acceso y
-    el token de refresco del usuario para realizar operaciones autenticadas.
+    Iniciar sesión sobre el singleton guardaba la sesión del último usuario en
+    el cliente compartido y cambiaba las credenciales de todas las consultas
+    posteriores. Este cliente no persiste ni refresca la sesión y reutiliza el
+    pool HTTP compartido, por lo que crearlo es barato.
+
+    Raises:
+        RuntimeError: Si las variables de entorno necesarias no están configuradas.
+
+    Returns:
+        Client: Un cliente Supabase nuevo, de uso único.
+    """
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_ANON_KEY")
+    if not url or not key:
+        raise RuntimeError("No se encontraron SUPABASE_URL o SUPABASE_ANON_KEY en el entorno.")
+    options = ClientOptions(
+        httpx_client=get_http_client(),
+        auto_refresh_token=False,
+        persist_session=False,
+    )
+    return create_client(url, key, options=options)
+
+def get_postgrest_for_user(token: str) -> SyncPostgrestClient:
+    """
+    Crea un handle PostgREST ligero que actúa en nombre de un usuario.
+
+    A diferencia de mutar la sesión del singleton, cada handle lleva su propio
+    bearer token en las cabeceras, por lo que es seguro usarlo en peticiones
+    concurrentes. Todos los handles comparten el pool HTTP (ver get_http_client),
+    así que crearlos no abre conexiones nuevas.
 
     Args:
         token (str): El token de acceso JWT del usuario.
-        refresh_token (str): El token de refresco del usuario.
+
+    Raises:
+        RuntimeError: Si las variables de entorno necesarias no están configuradas.
 
     Returns:
-        Client: El cliente Supabase con la sesión del usuario establecida.
+        SyncPostgrestClient: Cliente con `table()`, `from_()` y `rpc()`.
     """
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_ANON_KEY")
+    if not url or not key:
+        raise RuntimeError("No se encontraron SUPABASE_URL o SUPABASE_ANON_KEY en el entorno.")
+
+    return SyncPostgrestClient(
+        f"{url.rstrip('/')}/rest/v1",
+        headers={
+            "apiKey": key,
+            "Authorization": f"Bearer {token}",
+        },
+        http_client=get_http_client(),
+    )
 
-    # Obtiene la instancia singleton del cliente.
-    client = get_supabase()
-    # Establece la sesión del usuario para que las siguientes peticiones
-    # con este cliente se realicen en nombre del usuario.
-    client.auth.set_session(token, refresh_token)
-    logger.debug("👤 (get_supabase_with_user) Sesión de usuario establecida en el cliente Supabase.")
+def get_supabase_with_user(token: str, refresh_token: str) -> SyncPostgrestClient:
+    """
+    Obtiene un cliente para realizar operaciones autenticadas como el usuario.
+
+    Ya no establece la sesión en el singleton compartido (lo que provocaba que
+    peticiones concurrentes se pisaran la sesión); devuelve un handle PostgREST
+    propio de la petición (ver get_postgrest_for_user).
+
+    Args:
+        token (str): El token de acceso JWT del usuario.
+        refresh_token (str): El token de refresco del usuario (se conserva por
+                             compatibilidad; el refresco se gestiona en el login).
+
+    Returns:
+        SyncPostgrestClient: El handle PostgREST con el token del usuario.
+    """
+    client = get_postgrest_for_user(token)
+    logger.debug("👤 (get_supabase_with_user) Handle PostgREST de usuario creado.")
     return client
 
 def get_supabase_admin() -> Client:
@@ -72,14 +198,17 @@ def get_supabase_admin() -> Client:
     global _supabase_admin
     
     if _supabase_admin is None:
-        logger.info("🔑 (get_supabase_admin) Creando nueva instancia del cliente Supabase (ADMIN)...")
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_SERVICE_KEY")
         
         if not url or not key:
             raise RuntimeError("No se encontraron SUPABASE_URL o SUPABASE_SERVICE_KEY en settings.")
         
-        _supabase_admin = create_client(url, key)
-        logger.info("Cliente Admin de Supabase inicializado.")
+        options = _client_options()
+        with _lock:
+            if _supabase_admin is None:
+                logger.info("🔑 (get_supabase_admin) Creando nueva instancia del cliente Supabase (ADMIN)...")
+                _supabase_admin = create_client(url, key, options=options)
+                logger.info("Cliente Admin de Supabase inicializado.")
         
     return _supabase_admin
\ No newline at end of file
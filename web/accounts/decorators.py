@@ -1,10 +1,11 @@
 import logging
 from functools import wraps
-from django.http import HttpRequest, HttpResponseRedirect
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
 from django.shortcuts import redirect
 from django.contrib import messages
-from accounts.client.supabase_client import get_supabase
-from accounts.services.roles_services import RolesService
+from accounts.services.token_service import TokenService
+from accounts.services.principal_service import Principal, PrincipalService
 
 
 logger = logging.getLogger(__name__) 
@@ -15,8 +16,9 @@ def _get_authenticated_user(request: HttpRequest) -> tuple[object | None, HttpRe
     """
     Función auxiliar para verificar el token de Supabase y obtener el usuario autenticado.
 
-    Busca el token en la sesión, lo valida contra Supabase y devuelve el objeto User
-    o una redirección a 'login' si falla la autenticación.
+    Busca el token en la sesión, lo valida (localmente cuando es posible, ver
+    TokenService) y devuelve el objeto User o una redirección a 'login' si falla
+    la autenticación.
 
     Args:
         request: El objeto HttpRequest de Django.
@@ -34,12 +36,10 @@ def _get_authenticated_user(request: HttpRequest) -> tuple[object | None, HttpRe
         logger.warning("🚫 (_get_authenticated_user) No hay token de Supabase en la sesión.")
         return None, redirect('login')
 
-    supabase = get_supabase()
     try:
-        # 2. Validar el token y obtener el usuario de Supabase
+        # 2. Validar el token (caché/JWT local, con fallback a Supabase)
         logger.debug("🔒 (_get_authenticated_user) Validando token y obteniendo usuario...")
-        user_resp = supabase.auth.get_user(token)
-        user = getattr(user_resp, "user", None)
+        user = TokenService.verify_token(token)
         
         # 3. Verificar si el usuario es válido
         if not user:
@@ -57,15 +57,84 @@ def _get_authenticated_user(request: HttpRequest) -> tuple[object | None, HttpRe
         return None, redirect('login')
 
 
+def _get_principal(request: HttpRequest) -> tuple[Principal | None, HttpResponseRedirect | None]:
+    """
+    Resuelve el `Principal` del usuario una sola vez por petición.
+
+    Autentica con _get_authenticated_user y obtiene el perfil (rol, taller,
+    cuartel, estado) mediante PrincipalService, que lo cachea en la sesión.
+    El resultado queda en `request.principal`, de modo que los decoradores
+    apilados solo hacen comprobaciones en memoria.
+
+    Args:
+        request: El objeto HttpRequest de Django.
+
+    Returns:
+        Una tupla: (Principal | None, RedirectResponse | None).
+
+    Raises:
+        Exception: Si falla la consulta del perfil en Supabase.
+    """
+    principal = getattr(request, 'principal', None)
+    if principal is not None:
+        return principal, None
+
+    user, response_redirect = _get_authenticated_user(request)
+    if response_redirect:
+        return None, response_redirect
+
+    principal = PrincipalService.get_principal(request.session, user.id)
+    request.principal = principal
+    request.session["sb_user_id"] = principal.user_id
+    request.session["sb_user_role"] = principal.role_name or "Usuario"
+    return principal, None
+
+
+def wrap_view(view_func, check):
+    """
+    Envuelve una vista con una comprobación de acceso.
+
+    `check(request)` devuelve una respuesta (redirección) para cortar la
+    petición, o None para continuar con la vista. Soporta vistas síncronas y
+    `async def`: en estas últimas la comprobación (sesión y perfil, que son
+    síncronos) se ejecuta con sync_to_async.
+
+    Args:
+        view_func: La función de vista original.
+        check: Función de comprobación que recibe el request.
+
+    Returns:
+        La función de vista decorada (asíncrona si la vista lo es).
+    """
+    if iscoroutinefunction(view_func):
+        async def _async_wrapped(request: HttpRequest, *args, **kwargs):
+            response = await sync_to_async(check)(request)
+            if response is not None:
+                return response
+            return await view_func(request, *args, **kwargs)
+
+        wrapped = wraps(view_func)(_async_wrapped)
+        markcoroutinefunction(wrapped)
+        return wrapped
+
+    @wraps(view_func)
+    def _wrapped(request: HttpRequest, *args, **kwargs):
+        response = check(request)
+        if response is not None:
+            return response
+        return view_func(request, *args, **kwargs)
+    return _wrapped
+
+
 # --- Decoradores ---
 
 def require_supabase_login(view_func):
     """
     Decorador para vistas de Django que requieren un usuario autenticado vía Supabase.
 
-    Utiliza _get_authenticated_user para verificar la autenticación. Si es exitosa,
-    obtiene el rol del usuario (usando RolesService) y lo almacena en la sesión 
-    (`sb_user_id`, `sb_user_role`) antes de ejecutar la vista.
+    Utiliza _get_principal para verificar la autenticación y resolver el rol
+    del usuario, que queda almacenado en la sesión (`sb_user_id`, `sb_user_role`)
+    y en `request.principal` antes de ejecutar la vista.
 
     Args:
         view_func: La función de vista original a decorar.
@@ -73,53 +142,34 @@ def require_supabase_login(view_func):
     Returns:
         La función de vista decorada.
     """
-    @wraps(view_func)
-    def _wrapped(request: HttpRequest, *args, **kwargs):
-        # Llama a la función auxiliar para manejar la autenticación
-        user, response_redirect = _get_authenticated_user(request)
+    def _check(request: HttpRequest) -> HttpResponse | None:
+        try:
+            principal, response_redirect = _get_principal(request)
+        except Exception as e:
+            # Capturar error al obtener el perfil/rol
+            logger.error(f"❌ (require_login) Error al obtener rol del usuario: {e}", exc_info=True)
+            messages.error(request, "Error al verificar los permisos del usuario.")
+            request.session.flush() # Limpiar sesión si falla la obtención del rol
+            return redirect('login')
 
         # Redirige si la autenticación falló
         if response_redirect:
-            return response_redirect 
-
-
-        # Si user no es None (autenticación exitosa), proceder
-        if user:
-            try:
-                # Obtener el rol del usuario usando RolesService
-                role = RolesService.get_user_role(user.id)
-                logger.info(f"🎭 (require_login) Rol obtenido para {user.id}: {role}")
-                
-                # Almacenar ID y Rol en la sesión de Django
-                request.session["sb_user_id"] = user.id
-                request.session["sb_user_role"] = role or "Usuario" 
-                logger.debug(f"ℹ️ (require_login) Sesión actualizada: ID={user.id}, Rol={request.session['sb_user_role']}")
-            
-            except Exception as e:
-                 # Capturar error al obtener el rol
-                logger.error(f"❌ (require_login) Error al obtener rol para {user.id}: {e}", exc_info=True)
-                messages.error(request, "Error al verificar los permisos del usuario.")
-                request.session.flush() # Limpiar sesión si falla la obtención del rol
-                return redirect('login')
-        else:
-            # Esto no debería ocurrir si _get_authenticated_user funciona correctamente,
-            # pero es una salvaguarda.
-            logger.error("❌ (require_login) _get_authenticated_user devolvió (None, None), estado inesperado.")
-            return redirect('login')
+            return response_redirect
 
+        logger.debug(f"ℹ️ (require_login) Sesión actualizada: ID={principal.user_id}, Rol={request.session['sb_user_role']}")
 
-        # Ejecutar la vista original si todo está bien
-        return view_func(request, *args, **kwargs)
-    return _wrapped
+        # Acceso concedido: se ejecuta la vista
+        return None
+    return wrap_view(view_func, _check)
 
 
 def require_role(required_role):
     """
     Decorador de fábrica para vistas de Django que requieren un rol específico.
 
-    Utiliza _get_authenticated_user para la autenticación inicial. Si es exitosa,
-    consulta la tabla `user_profile` (uniéndola con `role`) para obtener el nombre 
-    del rol actual del usuario y lo compara con `required_role`.
+    Utiliza _get_principal para la autenticación y la resolución del rol
+    (una sola consulta por petición, cacheada en la sesión) y lo compara
+    con `required_role`.
 
     Args:
         required_role (str): El nombre exacto del rol requerido (sensible a mayúsculas/minúsculas). 
@@ -130,82 +180,33 @@ def require_role(required_role):
     """
 
     def decorator(view_func):
-        @wraps(view_func)
-        def _wrapped(request: HttpRequest, *args, **kwargs):
-            # Llama a la función auxiliar para manejar la autenticación
-            user, response_redirect = _get_authenticated_user(request)
-            
+        def _check(request: HttpRequest) -> HttpResponse | None:
+            try:
+                principal, response_redirect = _get_principal(request)
+            except Exception as e:
+                logger.error(f"❌ (require_role) Error verificando rol (req: '{required_role}'): {e}", exc_info=True)
+                messages.error(request, "Error al verificar permisos.")
+                return redirect('unauthorized')
+
             if response_redirect:
                 return response_redirect # Redirige si la autenticación falló
-            
-            # Si user no es None (autenticación exitosa), proceder a verificar el rol
-            user_id = getattr(user, 'id', None) 
-            if user_id:
-                try:
-                    logger.debug(f"👤 (require_role) Verificando si {user_id} tiene el rol '{required_role}'...")
-                    supabase = get_supabase() # Re-obtener cliente por si acaso
-                    
-                    # Buscar el rol del usuario desde la tabla 'user_profile' uniéndola con 'role'
-                    role_resp = (
-                        supabase.table("user_profile")
-                        .select("role_id, role:role_id(name)") 
-                        .eq("id", user_id)                   
-                        .maybe_single()                      
-                        .execute()
-                    )
-                    
-                    user_role_name = '' 
-                    
-                    # Verificar si se encontró el perfil de usuario y extraer el nombre del rol
-                    if not role_resp.data:
-                        logger.warning(f"⚠️ (require_role) Usuario {user_id} no encontrado en 'user_profile'. Acceso denegado.")
-                        messages.error(request, "No tienes permisos (perfil de usuario no encontrado).")
-                        return redirect('unauthorized') 
-                    
-                    role_relation_data = role_resp.data.get('role')
-                    if isinstance(role_relation_data, dict):
-                        user_role_name = role_relation_data.get('name', '')
-                        logger.debug(f"🎭 (require_role) Rol obtenido de relación: '{user_role_name}'")
-                    else:
-                        role_id = role_resp.data.get('role_id')
-                        if role_id:
-                            logger.debug(f"🤔 (require_role) Buscando nombre para role_id={role_id}...")
-                            role_direct_result = (
-                                supabase.table("role")
-                                .select("name")
-                                .eq("id", role_id)
-                                .maybe_single()
-                                .execute()
-                            )
-                            if role_direct_result.data:
-                                user_role_name = role_direct_result.data.get('name', '')
-                                logger.debug(f"🎭 (require_role) Rol obtenido directo: '{user_role_name}'")
-                            else:
-                                 logger.warning(f"⚠️ (require_role) No se encontró nombre para role_id={role_id}.")
-                        else:
-                            logger.warning(f"⚠️ (require_role) Usuario {user_id} sin 'role_id'.")
-                            
-                    # Comparar el rol obtenido con el requerido
-                    # Super Admin tiene acceso a todo el sistema
-                    if user_role_name == 'Super Admin':
-                        logger.info(f"✅ (require_role) Acceso concedido para {user_id} (Super Admin tiene acceso total)")
-                    elif user_role_name != required_role:
-                        logger.warning(f"🚫 (require_role) Acceso denegado: '{user_role_name}' != '{required_role}'.")
-                        messages.error(request, f"Acceso denegado. Se requiere el rol: '{required_role}'")
-                        return redirect('unauthorized') 
-                    else:
-                        logger.info(f"✅ (require_role) Acceso concedido para {user_id} (Rol: '{user_role_name}')")
-                    
-                except Exception as e:
-                    logger.error(f"❌ (require_role) Error verificando rol para {user_id} (req: '{required_role}'): {e}", exc_info=True)
-                    messages.error(request, "Error al verificar permisos.")
-                    return redirect('unauthorized')
-            else:
-                # Salvaguarda, aunque no debería ocurrir
-                logger.error("❌ (require_role) _get_authenticated_user devolvió un objeto sin 'id' o None.")
+
+            user_id = principal.user_id
+            if not principal.has_profile:
+                logger.warning(f"⚠️ (require_role) Usuario {user_id} no encontrado en 'user_profile'. Acceso denegado.")
+                messages.error(request, "No tienes permisos (perfil de usuario no encontrado).")
                 return redirect('unauthorized')
 
-            # Ejecutar la vista original si el rol coincide
-            return view_func(request, *args, **kwargs)
-        return _wrapped
-    return decorator
\ No newline at end of file
+            # Comparar el rol obtenido con el requerido
+            # Super Admin tiene acceso a todo el sistema
+            if not principal.has_role(required_role):
+                logger.warning(f"🚫 (require_role) Acceso denegado: '{principal.role_name}' != '{required_role}'.")
+                messages.error(request, f"Acceso denegado. Se requiere el rol: '{required_role}'")
+                return redirect('unauthorized')
+
+            logger.info(f"✅ (require_role) Acceso concedido para {user_id} (Rol: '{principal.role_name}')")
+
+            # Rol válido: se ejecuta la vista
+            return None
+        return wrap_view(view_func, _check)
+    return decorator
@@ -1,5 +1,5 @@
 import logging
-from ..client.supabase_client import get_supabase
+from ..client.supabase_client import get_supabase, create_auth_client
 from supabase import AuthApiError
 
 # Inicializa el logger para este módulo.
@@ -27,7 +27,8 @@ class AuthService:
         """
         
         logger.info(f"🔑 (login) Intentando iniciar sesión para el usuario: {email}")
-        supabase = get_supabase()
+        # Cliente efímero: no se debe guardar la sesión en el singleton compartido
+        supabase = create_auth_client()
         
         try:           
             # Llama a la API de Supabase para iniciar sesión con email y contraseña.
@@ -54,18 +55,23 @@ class AuthService:
             return None, "Ocurrió un error inesperado."
         
     @staticmethod
-    def logout():
+    def logout(access_token: str | None = None):
         """
         Cierra la sesión del usuario actual en Supabase.
 
+        Args:
+            access_token (str | None): El token de acceso del usuario cuya sesión
+                                       se debe invalidar.
+
         Returns:
             str | None: Un mensaje de error si la operación falla, de lo contrario None.
         """
 
         logger.info("🚪 (logout) Intentando cerrar sesión en Supabase.")
         try:
-            # Llama al método de Supabase para invalidar la sesión actual.
-            get_supabase().auth.sign_out()
+            # Invalida la sesión del usuario indicado (el singleton no guarda sesiones).
+            if access_token:
+                get_supabase().auth.admin.sign_out(access_token)
             logger.info("✅ (logout) Sesión cerrada exitosamente en Supabase.")
             return None
         except Exception as e:
@@ -0,0 +1,160 @@
+import logging
+import time
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from shared.services.cache_scope import bounded_ttl
+
+from ..client.supabase_client import get_supabase
+
+logger = logging.getLogger(__name__)
+
+# Clave de sesión donde se guarda el principal serializado
+SESSION_KEY = "sb_principal"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Identidad y permisos del usuario autenticado, resueltos una vez por petición.
+
+    Attributes:
+        user_id: UUID del usuario en auth.users.
+        role_name: Nombre del rol (ej. "Admin Taller"). Vacío si no tiene rol.
+        workshop_id: ID del taller asignado, si corresponde.
+        fire_station_id: ID del cuartel asignado, si corresponde.
+        fire_station_name: Nombre del cuartel asignado, si corresponde.
+        is_active: Estado del perfil en user_profile.
+        has_profile: False si el usuario no tiene fila en user_profile.
+    """
+    user_id: str
+    role_name: str = ""
+    workshop_id: int | None = None
+    fire_station_id: int | None = None
+    fire_station_name: str = ""
+    is_active: bool = False
+    has_profile: bool = False
+
+    def has_role(self, *role_names: str) -> bool:
+        """Indica si el usuario tiene alguno de los roles dados (Super Admin siempre cumple)."""
+        return self.role_name == "Super Admin" or self.role_name in role_names
+
+
+class PrincipalService:
+    """
+    Clase de servicio que resuelve y cachea el `Principal` del usuario.
+
+    El principal se guarda en la sesión de Django con un TTL corto
+    (`PRINCIPAL_CACHE_TTL`). Para que los cambios hechos por otro usuario
+    (ej. un administrador cambiando un rol) se reflejen antes de que expire
+    el TTL, cada usuario tiene un número de versión en la caché de Django que
+    se incrementa con `invalidate(user_id)`; una sesión con una versión
+    distinta se considera obsoleta.
+
+    La versión solo es visible para todos los workers con una caché
+    compartida (REDIS_URL). Con la caché en memoria por defecto, la
+    invalidación afecta a las peticiones atendidas por el mismo proceso y en
+    los demás el principal se renueva al vencer el TTL (acotado por
+    LOCAL_CACHE_MAX_STALENESS, ver shared.services.cache_scope).
+    """
+
+    @staticmethod
+    def _version_key(user_id: str) -> str:
+        return f"principal_version:{user_id}"
+
+    @staticmethod
+    def _get_version(user_id: str) -> int:
+        return cache.get(PrincipalService._version_key(user_id), 0)
+
+    @staticmethod
+    def invalidate(user_id: str) -> None:
+        """
+        Invalida el principal cacheado de un usuario.
+
+        Con caché compartida alcanza a todas sus sesiones; sin ella, solo a
+        las atendidas por este proceso (el resto espera al TTL). Debe llamarse
+        siempre que se modifique su perfil (rol, taller, cuartel, estado) o se
+        elimine el usuario.
+        """
+        if not user_id:
+            return
+        key = PrincipalService._version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+        logger.debug(f"🗑️ (PrincipalService) Principal invalidado para {user_id}")
+
+    @staticmethod
+    def load_principal(user_id: str) -> Principal:
+        """
+        Consulta user_profile (con rol y cuartel) y construye el principal.
+
+        Args:
+            user_id: UUID del usuario autenticado.
+
+        Returns:
+            Principal: El principal del usuario (`has_profile=False` si no tiene perfil).
+
+        Raises:
+            Exception: Los errores de Supabase se propagan al llamador.
+        """
+        logger.debug(f"🔍 (PrincipalService) Cargando perfil de {user_id}...")
+        result = (
+            get_supabase().table("user_profile")
+            .select("id, is_active, workshop_id, fire_station_id, role:role_id(name), fire_station:fire_station_id(name)")
+            .eq("id", user_id)
+            .maybe_single()
+            .execute()
+        )
+        profile = getattr(result, "data", None) if result is not None else None
+        if not profile:
+            logger.warning(f"⚠️ (PrincipalService) Usuario {user_id} no encontrado en 'user_profile'.")
+            return Principal(user_id=user_id)
+
+        role_data = profile.get("role")
+        fire_station_data = profile.get("fire_station")
+        return Principal(
+            user_id=user_id,
+            role_name=role_data.get("name", "") if isinstance(role_data, dict) else "",
+            workshop_id=profile.get("workshop_id"),
+            fire_station_id=profile.get("fire_station_id"),
+            fire_station_name=fire_station_data.get("name", "") if isinstance(fire_station_data, dict) else "",
+            is_active=bool(profile.get("is_active")),
+            has_profile=True,
+        )
+
+    @staticmethod
+    def get_principal(session, user_id: str) -> Principal:
+        """
+        Obtiene el principal desde la sesión o, si no es válido, desde Supabase.
+
+        Args:
+            session: La sesión de Django del request.
+            user_id: UUID del usuario autenticado.
+
+        Returns:
+            Principal: El principal vigente del usuario.
+        """
+        ttl = bounded_ttl(getattr(settings, "PRINCIPAL_CACHE_TTL", 60))
+        version = PrincipalService._get_version(user_id)
+        cached = session.get(SESSION_KEY)
+
+        if (
+            isinstance(cached, dict)
+            and cached.get("user_id") == user_id
+            and cached.get("version") == version
+            and time.time() - cached.get("cached_at", 0) < ttl
+        ):
+            return Principal(**cached["data"])
+
+        principal = PrincipalService.load_principal(user_id)
+        session[SESSION_KEY] = {
+            "user_id": user_id,
+            "version": version,
+            "cached_at": time.time(),
+            "data": asdict(principal),
+        }
+        return principal
@@ -2,6 +2,7 @@ import logging
 from time import process_time_ns
 from urllib import request
 from ..client.supabase_client import get_supabase
+from .principal_service import PrincipalService
 
 logger = logging.getLogger(__name__) 
 
@@ -148,6 +149,7 @@ class RolesService:
             
             if result.data:
                 logger.info(f"✅ Rol actualizado para usuario {user_id}: {role_name}")
+                PrincipalService.invalidate(user_id)
                 return True
             
             logger.warning(f"⚠️ No se pudo actualizar el rol para usuario {user_id}")
@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import jwt
+from django.conf import settings
+
+from ..client.supabase_client import get_supabase
+
+logger = logging.getLogger(__name__)
+
+
+class TokenService:
+    """
+    Clase de servicio para validar los JWT de acceso emitidos por Supabase.
+
+    La validación se intenta primero de forma local (firma + expiración) usando
+    el secreto JWT del proyecto (HS256) o las claves públicas del endpoint JWKS
+    (RS256/ES256). Los claims verificados se guardan en una caché acotada con
+    TTL, indexada por el hash SHA-256 del token, de modo que las siguientes
+    peticiones con el mismo token no requieren ningún round-trip.
+
+    Solo se recurre a `supabase.auth.get_user` cuando no es posible validar
+    localmente (sin secreto configurado o `kid` desconocido en el JWKS).
+    """
+
+    # Caché: hash del token -> (usuario, timestamp de expiración de la entrada)
+    _cache: "OrderedDict[str, tuple[SimpleNamespace, float]]" = OrderedDict()
+    _lock = threading.Lock()
+    _jwks_client: jwt.PyJWKClient | None = None
+
+    @staticmethod
+    def _hash_token(token: str) -> str:
+        """Calcula la clave de caché para un token sin almacenarlo en claro."""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _cache_get(cls, key: str) -> SimpleNamespace | None:
+        """Obtiene un usuario de la caché si la entrada sigue vigente."""
+        with cls._lock:
+            entry = cls._cache.get(key)
+            if not entry:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del cls._cache[key]
+                return None
+            cls._cache.move_to_end(key)
+            return user
+
+    @classmethod
+    def _cache_set(cls, key: str, user: SimpleNamespace, token_exp: float | None) -> None:
+        """
+        Guarda un usuario en la caché.
+
+        La entrada nunca sobrevive a la expiración del propio token y se
+        descartan las entradas más antiguas al superar el tamaño máximo.
+        """
+        ttl = getattr(settings, "SUPABASE_TOKEN_CACHE_TTL", 300)
+        max_size = getattr(settings, "SUPABASE_TOKEN_CACHE_MAX_SIZE", 1024)
+        expires_at = time.time() + ttl
+        if token_exp:
+            expires_at = min(expires_at, token_exp)
+
+        with cls._lock:
+            cls._cache[key] = (user, expires_at)
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > max_size:
+                cls._cache.popitem(last=False)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Vacía por completo la caché de tokens verificados."""
+        with cls._lock:
+            cls._cache.clear()
+
+    @classmethod
+    def invalidate(cls, token: str) -> None:
+        """Elimina un token concreto de la caché (ej. al cerrar sesión)."""
+        if not token:
+            return
+        with cls._lock:
+            cls._cache.pop(cls._hash_token(token), None)
+
+    @classmethod
+    def _get_jwks_client(cls) -> jwt.PyJWKClient | None:
+        """Obtiene (de forma perezosa) el cliente JWKS configurado."""
+        jwks_url = getattr(settings, "SUPABASE_JWKS_URL", None)
+        if not jwks_url:
+            return None
+        if cls._jwks_client is None:
+            logger.info(f"🔧 (TokenService) Inicializando cliente JWKS: {jwks_url}")
+            cls._jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True)
+        return cls._jwks_client
+
+    @staticmethod
+    def _user_from_claims(claims: dict) -> SimpleNamespace:
+        """Construye un objeto usuario mínimo (compatible con `User.id`) desde los claims."""
+        return SimpleNamespace(
+            id=claims.get("sub"),
+            email=claims.get("email"),
+            phone=claims.get("phone"),
+            role=claims.get("role"),
+            app_metadata=claims.get("app_metadata") or {},
+            user_metadata=claims.get("user_metadata") or {},
+        )
+
+    @classmethod
+    def _decode_locally(cls, token: str) -> dict | None:
+        """
+        Valida firma y expiración del token sin salir del proceso.
+
+        Returns:
+            dict | None: Los claims verificados, o None si no hay material de
+                         claves para validar localmente (se debe usar el fallback).
+
+        Raises:
+            jwt.InvalidTokenError: Si el token es inválido o ha expirado.
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        audience = getattr(settings, "SUPABASE_JWT_AUDIENCE", "authenticated")
+        options = {"require": ["exp", "sub"]}
+
+        if algorithm == "HS256":
+            secret = getattr(settings, "SUPABASE_JWT_SECRET", None)
+            if not secret:
+                return None
+            return jwt.decode(token, secret, algorithms=["HS256"], audience=audience, options=options)
+
+        jwks_client = cls._get_jwks_client()
+        if jwks_client is None or not header.get("kid"):
+            return None
+        try:
+            signing_key = jwks_client.get_signing_key_from_jwt(token)
+        except jwt.PyJWKClientError as e:
+            # kid desconocido o JWKS inaccesible: se delega en Supabase
+            logger.warning(f"⚠️ (TokenService) No se pudo resolver la clave del token: {e}")
+            return None
+        return jwt.decode(
+            token, signing_key.key, algorithms=["RS256", "ES256"], audience=audience, options=options
+        )
+
+    @classmethod
+    def verify_token(cls, token: str) -> SimpleNamespace | object | None:
+        """
+        Verifica un token de acceso de Supabase y devuelve el usuario asociado.
+
+        Args:
+            token (str): El JWT de acceso del usuario.
+
+        Returns:
+            El objeto usuario (con al menos el atributo `id`) si el token es
+            válido, o None si es inválido o ha expirado.
+
+        Raises:
+            Exception: Los errores de red del fallback remoto se propagan.
+        """
+        key = cls._hash_token(token)
+        cached_user = cls._cache_get(key)
+        if cached_user is not None:
+            logger.debug(f"⚡ (TokenService) Token encontrado en caché para {cached_user.id}.")
+            return cached_user
+
+        try:
+            claims = cls._decode_locally(token)
+        except jwt.ExpiredSignatureError:
+            logger.info("⌛ (TokenService) Token expirado.")
+            return None
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"🚫 (TokenService) Token inválido: {e}")
+            return None
+
+        if claims is not None:
+            user = cls._user_from_claims(claims)
+            cls._cache_set(key, user, claims.get("exp"))
+            logger.debug(f"🔒 (TokenService) Token validado localmente para {user.id}.")
+            return user
+
+        # Fallback: validación remota contra Supabase
+        logger.debug("🌐 (TokenService) Validación local no disponible, consultando a Supabase...")
+        user_resp = get_supabase().auth.get_user(token)
+        user = getattr(user_resp, "user", None)
+        if not user:
+            return None
+
+        try:
+            token_exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.InvalidTokenError:
+            token_exp = None
+        cls._cache_set(key, user, token_exp)
+        return user
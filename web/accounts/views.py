@@ -6,6 +6,7 @@ from .client.supabase_client import get_supabase
 from .decorators import require_supabase_login
 from .services.auth_service import AuthService
 from .services.roles_services import RolesService
+from .services.token_service import TokenService
 
 logger = logging.getLogger(__name__)
 
@@ -145,7 +146,9 @@ def logout_view(request):
     logger.info(f"🚪 (logout_view) Cerrando sesión para {user_email}...")
 
     # 1. Intentar cerrar sesión en Supabase (AuthService maneja errores internos)
-    AuthService.logout()
+    AuthService.logout(request.session.get("sb_access_token"))
+    # Descartar el token de la caché de verificación local
+    TokenService.invalidate(request.session.get("sb_access_token"))
     # 2. Limpiar la sesión de Django
     request.session.flush()
     # 3. Mostrar mensaje y redirigir
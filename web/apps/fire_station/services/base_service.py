@@ -2,6 +2,8 @@ import logging
 from typing import Any, Dict, List, Optional
 from accounts.client.supabase_client import get_supabase
 from supabase import PostgrestAPIError
+from shared.services.identity_map import IdentityMap
+from shared.services.query_metrics import QueryMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +34,8 @@ class FireStationBaseService:
             Los datos de la respuesta o una lista vacía en caso de error.
         """
         try:
-            response = query.execute()
+            with QueryMetrics.label(method_name):
+                response = query.execute()
             logger.debug(f"📊 ({method_name}) Respuesta de Supabase: {response.data}")
             return response.data if response.data is not None else []
         except PostgrestAPIError as e:
@@ -57,10 +60,12 @@ class FireStationBaseService:
         try:
             # Compatibilidad: algunos builders no exponen maybe_single()
             if hasattr(query, 'maybe_single'):
-                response = query.maybe_single().execute()
+                with QueryMetrics.label(method_name):
+                    response = query.maybe_single().execute()
                 data = response.data
             else:
-                response = query.execute()
+                with QueryMetrics.label(method_name):
+                    response = query.execute()
                 data = response.data
                 # Si data es lista, tomar el primer elemento (insert/update/select)
                 if isinstance(data, list):
@@ -74,3 +79,27 @@ class FireStationBaseService:
             logger.error(f"❌ ({method_name}) Error inesperado: {e}", exc_info=True)
             return None
 
+    @staticmethod
+    def _execute_single_by_id(table: str, row_id: Any, projection: str, query, method_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Como _execute_single, pero reutiliza la fila si ya se leyó en esta
+        petición con la misma proyección (ver IdentityMap).
+
+        Args:
+            table: Tabla de la fila.
+            row_id: ID de la fila.
+            projection: Identificador de las columnas y filtros de alcance de la consulta.
+            query: La consulta de PostgREST a ejecutar si la fila no está en memoria.
+            method_name: El nombre del método que llama para logging.
+
+        Returns:
+            Los datos del registro o None si no existe o hay error.
+        """
+        return IdentityMap.get_or_load(
+            table, row_id, projection, lambda: FireStationBaseService._execute_single(query, method_name)
+        )
+
+    @staticmethod
+    def _invalidate_row(table: str, row_id: Any = None) -> None:
+        """Invalida una fila (o toda la tabla) del identity map tras una escritura."""
+        IdentityMap.invalidate(table, row_id)
@@ -4,6 +4,9 @@ from datetime import datetime
 from supabase import PostgrestAPIError
 from .base_service import FireStationBaseService
 from accounts.client.supabase_client import get_supabase_admin
+from accounts.services.principal_service import PrincipalService
+from shared.services.reference_data_service import ReferenceDataService
+from shared.services.auth_user_service import AuthUserService
 
 logger = logging.getLogger(__name__)
 
@@ -36,13 +39,12 @@ class UserService(FireStationBaseService):
             'get_all_users'
         )
         
-        # Obtener emails de auth.users para cada usuario
+        # Obtener emails de auth.users para todos los usuarios en una sola llamada
+        auth_users = AuthUserService.get_auth_users_by_ids(user.get('id') for user in users)
         for user in users:
-            user_id = user.get('id')
-            if user_id:
-                auth_user = cls.get_user_auth_data(user_id)
-                if auth_user:
-                    user['email'] = auth_user.get('email')
+            auth_user = auth_users.get(user.get('id'))
+            if auth_user:
+                user['email'] = auth_user.get('email')
         
         return users
     
@@ -177,6 +179,7 @@ class UserService(FireStationBaseService):
             
             if response.data and len(response.data) > 0:
                 logger.info(f"✅ Usuario {user_id} actualizado correctamente")
+                PrincipalService.invalidate(user_id)
                 return True, None
             else:
                 logger.error(f"❌ Error al actualizar usuario {user_id}: respuesta vacía")
@@ -271,6 +274,7 @@ class UserService(FireStationBaseService):
                 logger.error(f"⚠️ Error eliminando usuario {user_id} de auth: {auth_error}", exc_info=True)
                 # Continuar aunque falle la eliminación de auth, el perfil ya se eliminó
             
+            PrincipalService.invalidate(user_id)
             logger.info(f"✅ Usuario {user_id} eliminado correctamente")
             return True
             
@@ -281,11 +285,7 @@ class UserService(FireStationBaseService):
     @classmethod
     def get_all_roles(cls) -> List[Dict[str, Any]]:
         """Obtiene todos los roles disponibles."""
-        client = cls.get_client()
-        return cls._execute_query(
-            client.table('role').select('*').order('name'),
-            'get_all_roles'
-        )
+        return ReferenceDataService.get_table('role')
     
     @classmethod
     def get_fire_station_roles(cls) -> List[Dict[str, Any]]:
@@ -1,9 +1,14 @@
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime
 from decimal import Decimal
 from supabase import PostgrestAPIError
 from .base_service import FireStationBaseService
+from shared.services.concurrency import run_parallel
+from shared.services.export import iter_keyset
+from shared.services.reference_data_service import ReferenceDataService
+from shared.services.vehicle_status_service import VehicleStatusService
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +18,10 @@ class VehicleService(FireStationBaseService):
     Servicio para la gestión de vehículos del cuartel.
     """
     
+    # Paginación de la línea de tiempo del historial
+    TIMELINE_PAGE_SIZE = 25
+    TIMELINE_MAX_PAGE_SIZE = 100
+    
     @classmethod
     def get_all_vehicles(cls, fire_station_id: int, filters: Dict = None) -> List[Dict[str, Any]]:
         """
@@ -47,6 +56,37 @@ class VehicleService(FireStationBaseService):
         
         return vehicles
     
+    @classmethod
+    def iter_vehicles_for_export(cls, fire_station_id: int, filters: Dict = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre la flota del cuartel para exportarla, en bloques paginados por
+        ID (ver shared.services.export.iter_keyset).
+        
+        Args:
+            fire_station_id: ID del cuartel.
+            filters: Diccionario con filtros opcionales (los mismos de get_all_vehicles).
+            
+        Yields:
+            Cada vehículo con sus catálogos embebidos.
+        """
+        client = cls.get_client()
+        
+        def build_query():
+            query = client.table('vehicle').select(
+                '*, vehicle_type(name), vehicle_status(name), fuel_type(name), '
+                'transmission_type(name), oil_type(name), coolant_type(name)'
+            ).eq('fire_station_id', fire_station_id)
+            if filters:
+                if filters.get('status_id'):
+                    query = query.eq('vehicle_status_id', filters['status_id'])
+                if filters.get('vehicle_type_id'):
+                    query = query.eq('vehicle_type_id', filters['vehicle_type_id'])
+                if filters.get('license_plate'):
+                    query = query.ilike('license_plate', f'%{filters["license_plate"]}%')
+            return query
+        
+        return iter_keyset(build_query, 'iter_vehicles_for_export')
+    
     @classmethod
     def get_vehicle(cls, vehicle_id: int, fire_station_id: int = None) -> Optional[Dict[str, Any]]:
         """
@@ -72,7 +112,10 @@ class VehicleService(FireStationBaseService):
         if fire_station_id:
             query = query.eq('fire_station_id', fire_station_id)
         
-        vehicle = cls._execute_single(query, 'get_vehicle')
+        # Si otra parte de la petición ya leyó el vehículo, se reutiliza la fila
+        vehicle = cls._execute_single_by_id(
+            'vehicle', vehicle_id, f'get_vehicle:fire_station={fire_station_id}', query, 'get_vehicle'
+        )
         
         return vehicle
     
@@ -229,6 +272,7 @@ class VehicleService(FireStationBaseService):
                 .execute()
             
             if response.data and len(response.data) > 0:
+                cls._invalidate_row('vehicle', vehicle_id)
                 logger.info(f"✅ Vehículo {vehicle_id} actualizado correctamente")
                 return True, None
             else:
@@ -278,6 +322,7 @@ class VehicleService(FireStationBaseService):
         )
         
         if result:
+            cls._invalidate_row('vehicle', vehicle_id)
             logger.info(f"✅ Vehículo {vehicle_id} eliminado correctamente")
             return True
         else:
@@ -289,181 +334,296 @@ class VehicleService(FireStationBaseService):
     @classmethod
     def get_vehicle_types(cls) -> List[Dict[str, Any]]:
         """Obtiene todos los tipos de vehículos."""
-        client = cls.get_client()
-        return cls._execute_query(
-            client.table('vehicle_type').select('*').order('name'),
-            'get_vehicle_types'
-        )
+        return ReferenceDataService.get_table('vehicle_type')
     
     @classmethod
     def get_vehicle_statuses(cls) -> List[Dict[str, Any]]:
         """Obtiene todos los estados de vehículos."""
-        client = cls.get_client()
-        return cls._execute_query(
-            client.table('vehicle_status').select('*').order('name'),
-            'get_vehicle_statuses'
-        )
+        return ReferenceDataService.get_table('vehicle_status')
     
     @classmethod
     def get_fuel_types(cls) -> List[Dict[str, Any]]:
         """Obtiene todos los tipos de combustible."""
-        client = cls.get_client()
-        return cls._execute_query(
-            client.table('fuel_type').select('*').order('name'),
-            'get_fuel_types'
-        )
+        return ReferenceDataService.get_table('fuel_type')
     
     @classmethod
     def get_transmission_types(cls) -> List[Dict[str, Any]]:
         """Obtiene todos los tipos de transmisión."""
-        client = cls.get_client()
-        return cls._execute_query(
-            client.table('transmission_type').select('*').order('name'),
-            'get_transmission_types'
-        )
+        return ReferenceDataService.get_table('transmission_type')
     
     @classmethod
     def get_oil_types(cls) -> List[Dict[str, Any]]:
         """Obtiene todos los tipos de aceite."""
-        client = cls.get_client()
-        return cls._execute_query(
-            client.table('oil_type').select('*').order('name'),
-            'get_oil_types'
-        )
+        return ReferenceDataService.get_table('oil_type')
     
     @classmethod
     def get_coolant_types(cls) -> List[Dict[str, Any]]:
         """Obtiene todos los tipos de refrigerante."""
-        client = cls.get_client()
-        return cls._execute_query(
-            client.table('coolant_type').select('*').order('name'),
-            'get_coolant_types'
-        )
+        return ReferenceDataService.get_table('coolant_type')
     
     @classmethod
-    def update_vehicle_status(cls, vehicle_id: int, status_id: int, user_id: str, reason: str = '') -> bool:
+    def update_vehicle_status(cls, vehicle_id: int, status_id: int, user_id: str, reason: str = '', fire_station_id: int = None) -> bool:
         """
         Actualiza el estado de un vehículo y registra el cambio en el log.
         
+        Delega en el servicio compartido VehicleStatusService (una sola llamada,
+        idempotente si el estado no cambia).
+        
         Args:
             vehicle_id: ID del vehículo.
             status_id: ID del nuevo estado.
             user_id: ID del usuario que realiza el cambio.
             reason: Razón del cambio de estado.
+            fire_station_id: ID del cuartel (opcional, para validación).
             
         Returns:
             True si se actualizó correctamente, False en caso contrario.
         """
         logger.info(f"🔄 Actualizando estado de vehículo {vehicle_id} a estado {status_id}")
         
-        client = cls.get_client()
+        return VehicleStatusService.update_vehicle_status(
+            vehicle_id=vehicle_id,
+            status_id=status_id,
+            user_id=user_id,
+            reason=reason,
+            fire_station_id=fire_station_id
+        )
+    
+    @staticmethod
+    def _parse_timestamp(value: Any) -> Optional[datetime]:
+        """Convierte una fecha ISO de PostgREST (con o sin hora y zona) a datetime."""
+        if not isinstance(value, str):
+            return value
+        try:
+            # Normalizar formato: reemplazar Z por +00:00 si existe
+            if value.endswith('Z'):
+                value = value[:-1] + '+00:00'
+            return datetime.fromisoformat(value)
+        except ValueError:
+            logger.warning(f"⚠️ No se pudo parsear fecha {value}")
+            return None
+    
+    @staticmethod
+    def _encode_timeline_cursor(entry: Dict[str, Any]) -> str:
+        """Codifica la posición (timestamp, tipo, id) de una entrada de la línea de tiempo."""
+        return f"{entry['timestamp']}|{entry['kind']}|{entry['id']}"
+    
+    @classmethod
+    def _decode_timeline_cursor(cls, cursor: str) -> Optional[Tuple[str, str, int]]:
+        """
+        Decodifica un cursor "timestamp|tipo|id".
         
-        # Actualizar el vehículo
-        update_data = {
-            'vehicle_status_id': status_id,
-            'updated_at': datetime.utcnow().isoformat()
-        }
+        Returns:
+            Tupla (timestamp, tipo, id), o None si el cursor no es válido.
+        """
+        try:
+            timestamp, kind, entry_id = cursor.split('|')
+            if kind not in ('status', 'order') or cls._parse_timestamp(timestamp) is None:
+                return None
+            return timestamp, kind, int(entry_id)
+        except (AttributeError, ValueError):
+            return None
+    
+    @classmethod
+    def _timeline_page_size(cls, page_size: Any) -> int:
+        """Normaliza el tamaño de página de la línea de tiempo (1..TIMELINE_MAX_PAGE_SIZE)."""
+        try:
+            page_size = int(page_size or cls.TIMELINE_PAGE_SIZE)
+        except (TypeError, ValueError):
+            page_size = cls.TIMELINE_PAGE_SIZE
+        return max(1, min(page_size, cls.TIMELINE_MAX_PAGE_SIZE))
+    
+    @classmethod
+    def get_vehicle_timeline_calls(
+        cls,
+        vehicle_id: int,
+        fire_station_id: int,
+        before: Optional[str] = None,
+        page_size: int = None,
+    ) -> Dict[str, Callable[[], List[Dict[str, Any]]]]:
+        """
+        Prepara las consultas de una página de la línea de tiempo de un vehículo
+        sin ejecutarlas, para que el llamador las lance en un mismo run_parallel
+        junto a otras consultas (ver vehicle_history). La página se arma luego
+        con build_vehicle_timeline.
         
-        vehicle_updated = cls._execute_single(
-            client.table('vehicle')
-                .update(update_data)
-                .eq('id', vehicle_id),
-            'update_vehicle_status'
-        )
+        Cada fuente se lee con un cursor sobre (change_date, id) y (entry_date, id)
+        respectivamente, usando los índices (vehicle_id, change_date, id) y
+        (vehicle_id, entry_date, id), por lo que el costo de una página no depende
+        del largo del historial.
         
-        if not vehicle_updated:
-            return False
+        Args:
+            vehicle_id: ID del vehículo.
+            fire_station_id: ID del cuartel (el vehículo debe pertenecer a él).
+            before: Cursor de la última entrada de la página anterior.
+            page_size: Cantidad de entradas por página (máximo TIMELINE_MAX_PAGE_SIZE).
+            
+        Returns:
+            Diccionario con los callables 'status_log' y 'orders'.
+        """
+        page_size = cls._timeline_page_size(page_size)
+        client = cls.get_client()
         
-        # Registrar el cambio en el log
-        log_data = {
-            'vehicle_id': vehicle_id,
-            'changed_by_user_id': user_id,
-            'vehicle_status_id': status_id,
-            'change_date': datetime.utcnow().isoformat(),
-            'reason': reason,
-            'created_at': datetime.utcnow().isoformat()
+        # El vehículo embebido con !inner limita ambas fuentes al cuartel
+        status_query = client.table('vehicle_status_log').select(
+            'id, change_date, reason, vehicle:vehicle_id!inner(fire_station_id), vehicle_status(name), '
+            'changed_by:user_profile!vehicle_status_log_changed_by_user_id_fkey(first_name, last_name)'
+        ).eq('vehicle_id', vehicle_id).eq('vehicle.fire_station_id', fire_station_id)
+        
+        order_query = client.table('maintenance_order').select(
+            'id, entry_date, exit_date, mileage, observations, vehicle:vehicle_id!inner(fire_station_id), '
+            'order_status:order_status_id(name), maintenance_type:maintenance_type_id(name), '
+            'workshop:workshop_id(name)'
+        ).eq('vehicle_id', vehicle_id).eq('vehicle.fire_station_id', fire_station_id)
+        
+        position = cls._decode_timeline_cursor(before) if before else None
+        if position is not None:
+            timestamp, kind, entry_id = position
+            day = timestamp[:10]
+            if kind == 'status':
+                status_query = status_query.or_(
+                    f'change_date.lt.{timestamp},and(change_date.eq.{timestamp},id.lt.{entry_id})'
+                )
+                order_query = order_query.lte('entry_date', day)
+            else:
+                status_query = status_query.lt('change_date', timestamp)
+                order_query = order_query.or_(f'entry_date.lt.{day},and(entry_date.eq.{day},id.lt.{entry_id})')
+        
+        # Se pide una fila extra por fuente para saber si hay más páginas
+        status_query = status_query.order('change_date', desc=True).order('id', desc=True).limit(page_size + 1)
+        order_query = order_query.order('entry_date', desc=True).order('id', desc=True).limit(page_size + 1)
+        
+        return {
+            'status_log': partial(cls._execute_query, status_query, 'get_vehicle_timeline'),
+            'orders': partial(cls._execute_query, order_query, 'get_vehicle_timeline'),
         }
+    
+    @classmethod
+    def build_vehicle_timeline(
+        cls,
+        vehicle_id: int,
+        status_log: List[Dict[str, Any]],
+        orders: List[Dict[str, Any]],
+        page_size: int = None,
+    ) -> Dict[str, Any]:
+        """
+        Mezcla por fecha las filas de get_vehicle_timeline_calls en una página.
+        
+        Una orden ocupa el inicio (00:00) de su día de ingreso y, a igual fecha,
+        los cambios de estado van antes que las órdenes.
         
-        log_created = cls._execute_single(
-            client.table('vehicle_status_log').insert(log_data),
-            'create_status_log'
+        Args:
+            vehicle_id: ID del vehículo (para logging).
+            status_log: Filas de la consulta 'status_log'.
+            orders: Filas de la consulta 'orders'.
+            page_size: El mismo tamaño de página usado al preparar las consultas.
+            
+        Returns:
+            Diccionario con:
+            - entries: Lista de entradas con kind ('status' u 'order'), id,
+              timestamp, date (datetime) y los datos de la fuente.
+            - next_cursor: Cursor para la página siguiente, o None si no hay más.
+            - page_size: Tamaño de página efectivo.
+        """
+        page_size = cls._timeline_page_size(page_size)
+        page = {'entries': [], 'next_cursor': None, 'page_size': page_size}
+        
+        entries = []
+        for log_entry in status_log or []:
+            entries.append({
+                'kind': 'status',
+                'id': log_entry['id'],
+                'timestamp': log_entry['change_date'],
+                'date': cls._parse_timestamp(log_entry['change_date']),
+                'status': (log_entry.get('vehicle_status') or {}).get('name'),
+                'reason': log_entry.get('reason'),
+                'changed_by': log_entry.get('changed_by'),
+            })
+        for order in orders or []:
+            timestamp = f"{order['entry_date']}T00:00:00"
+            entries.append({
+                'kind': 'order',
+                'id': order['id'],
+                'timestamp': timestamp,
+                'date': cls._parse_timestamp(timestamp),
+                'status': (order.get('order_status') or {}).get('name'),
+                'maintenance_type': (order.get('maintenance_type') or {}).get('name'),
+                'workshop': (order.get('workshop') or {}).get('name'),
+                'exit_date': cls._parse_timestamp(order.get('exit_date')),
+                'mileage': order.get('mileage'),
+                'observations': order.get('observations'),
+            })
+        
+        entries.sort(
+            key=lambda entry: (entry['date'] or datetime.min, entry['kind'] == 'status', entry['id']),
+            reverse=True
         )
         
-        return log_created is not None
+        page['entries'] = entries[:page_size]
+        if len(entries) > page_size:
+            page['next_cursor'] = cls._encode_timeline_cursor(page['entries'][-1])
+        
+        logger.info(
+            f"📈 Línea de tiempo del vehículo {vehicle_id}: {len(page['entries'])} entrada(s)"
+            f"{' (hay más)' if page['next_cursor'] else ''}"
+        )
+        return page
     
     @classmethod
-    def get_vehicle_status_history(cls, vehicle_id: int, fire_station_id: int = None) -> List[Dict[str, Any]]:
+    def get_vehicle_timeline(
+        cls,
+        vehicle_id: int,
+        fire_station_id: int,
+        before: Optional[str] = None,
+        page_size: int = None,
+    ) -> Dict[str, Any]:
         """
-        Obtiene el historial de cambios de estado de un vehículo.
+        Obtiene una página de la línea de tiempo de un vehículo: cambios de
+        estado (vehicle_status_log) y órdenes de mantención, del más reciente
+        al más antiguo (paginación por cursor). Ambas consultas se hacen en
+        paralelo (ver get_vehicle_timeline_calls y build_vehicle_timeline).
         
         Args:
             vehicle_id: ID del vehículo.
-            fire_station_id: ID del cuartel (opcional, para validación).
+            fire_station_id: ID del cuartel (el vehículo debe pertenecer a él).
+            before: Cursor de la última entrada de la página anterior.
+            page_size: Cantidad de entradas por página (máximo TIMELINE_MAX_PAGE_SIZE).
             
         Returns:
-            Lista de cambios de estado.
+            Diccionario con entries, next_cursor y page_size (ver build_vehicle_timeline).
         """
-        logger.info(f"📋 Obteniendo historial de vehículo {vehicle_id}")
+        results = run_parallel(
+            cls.get_vehicle_timeline_calls(vehicle_id, fire_station_id, before, page_size),
+            defaults={'status_log': [], 'orders': []}
+        )
+        return cls.build_vehicle_timeline(vehicle_id, results['status_log'], results['orders'], page_size)
+    
+    @classmethod
+    def iter_status_log_for_export(cls, fire_station_id: int, vehicle_id: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre el historial de cambios de estado de la flota del cuartel (o de
+        un vehículo) para exportarlo, en bloques paginados por ID (ver
+        shared.services.export.iter_keyset). El ID crece con cada cambio, por
+        lo que el orden es cronológico.
         
+        Args:
+            fire_station_id: ID del cuartel.
+            vehicle_id: ID del vehículo (opcional).
+            
+        Yields:
+            Cada registro de vehicle_status_log con el vehículo, el estado y el
+            usuario que hizo el cambio embebidos.
+        """
         client = cls.get_client()
         
-        # Si se proporciona fire_station_id, validar que el vehículo pertenezca al cuartel
-        if fire_station_id:
-            vehicle = cls.get_vehicle(vehicle_id, fire_station_id)
-            if not vehicle:
-                logger.warning(f"Vehículo {vehicle_id} no pertenece al cuartel {fire_station_id}")
-                return []
-            # Log de vehículo mínimo para contexto
-            try:
-                logger.debug(
-                    f"🔎 Vehículo validado para historial | id={vehicle.get('id')} "
-                    f"patente={vehicle.get('license_plate')} estado={vehicle.get('vehicle_status', {}).get('name')}"
-                )
-            except Exception:
-                logger.debug("🔎 Vehículo validado para historial (sin detalles por formato)")
-        
-        query = client.table('vehicle_status_log').select(
-            '*, vehicle_status(name), changed_by:user_profile!vehicle_status_log_changed_by_user_id_fkey(first_name, last_name)'
-        ).eq('vehicle_id', vehicle_id).order('change_date', desc=True)
-        
-        logger.debug(
-            f"🧠 Ejecutando consulta de historial: tabla=vehicle_status_log, filtro vehicle_id={vehicle_id}, "
-            f"order=change_date desc, include=vehicle_status(name), changed_by(first_name,last_name)"
-        )
-        history = cls._execute_query(query, 'get_vehicle_status_history')
-        
-        # Convertir fechas ISO string a objetos datetime para el template
-        if history:
-            for log_entry in history:
-                if log_entry.get('change_date'):
-                    try:
-                        # Parsear fecha ISO string a datetime
-                        if isinstance(log_entry['change_date'], str):
-                            date_str = log_entry['change_date']
-                            # Normalizar formato: reemplazar Z por +00:00 si existe
-                            if date_str.endswith('Z'):
-                                date_str = date_str[:-1] + '+00:00'
-                            # fromisoformat maneja formato ISO con o sin microsegundos y timezone
-                            log_entry['change_date'] = datetime.fromisoformat(date_str)
-                    except (ValueError, AttributeError) as e:
-                        logger.warning(f"⚠️ No se pudo parsear fecha {log_entry.get('change_date')}: {e}")
-                        # Mantener el valor original si falla el parseo
-        
-        # Logs de resultado
-        try:
-            total = len(history) if isinstance(history, list) else 0
-            logger.info(f"📈 Historial obtenido: {total} cambio(s) para vehículo {vehicle_id}")
-            if total > 0:
-                sample = history[0]
-                logger.info(
-                    "🧾 Primer registro: "
-                    f"fecha={sample.get('change_date')}, "
-                    f"estado={sample.get('vehicle_status', {}).get('name')}, "
-                    f"por={((sample.get('changed_by') or {}).get('first_name','') + ' ' + (sample.get('changed_by') or {}).get('last_name','')).strip()}, "
-                    f"razón={sample.get('reason')}"
-                )
-        except Exception as e:
-            logger.debug(f"ℹ️ No se pudo formatear log de historial (detalle): {e}")
-        
-        return history
-
+        def build_query():
+            query = client.table('vehicle_status_log').select(
+                'id, change_date, reason, vehicle:vehicle_id!inner(license_plate, fire_station_id), '
+                'vehicle_status(name), '
+                'changed_by:user_profile!vehicle_status_log_changed_by_user_id_fkey(first_name, last_name)'
+            ).eq('vehicle.fire_station_id', fire_station_id)
+            if vehicle_id:
+                query = query.eq('vehicle_id', vehicle_id)
+            return query
+        
+        return iter_keyset(build_query, 'iter_status_log_for_export')
@@ -0,0 +1,66 @@
+/**
+ * Fire Station - Vehicle History JavaScript
+ *
+ * Scroll infinito de la línea de tiempo del vehículo: cuando el indicador
+ * de carga entra en pantalla se pide la página siguiente a la API
+ * (paginación por cursor) y se agregan sus filas a la tabla.
+ */
+
+(function() {
+    'use strict';
+
+    document.addEventListener('DOMContentLoaded', function() {
+        const sentinel = document.getElementById('timelineSentinel');
+        const body = document.getElementById('timelineBody');
+
+        if (!sentinel || !body || !sentinel.dataset.nextCursor) {
+            return;
+        }
+
+        let loading = false;
+
+        const observer = new IntersectionObserver(function(entries) {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadNextPage();
+            }
+        }, { rootMargin: '200px' });
+
+        observer.observe(sentinel);
+
+        /**
+         * Carga la página siguiente y la agrega al final de la tabla
+         */
+        async function loadNextPage() {
+            const cursor = sentinel.dataset.nextCursor;
+            if (loading || !cursor) {
+                return;
+            }
+            loading = true;
+
+            try {
+                const response = await fetch(`${sentinel.dataset.url}?before=${encodeURIComponent(cursor)}`, {
+                    headers: { 'X-Requested-With': 'XMLHttpRequest' }
+                });
+                const data = await response.json();
+
+                if (!data.success) {
+                    throw new Error(data.error || 'Respuesta inválida');
+                }
+
+                body.insertAdjacentHTML('beforeend', data.html);
+                sentinel.dataset.nextCursor = data.next_cursor || '';
+
+                if (!data.next_cursor) {
+                    observer.disconnect();
+                    sentinel.classList.add('d-none');
+                }
+            } catch (error) {
+                console.error('Error cargando historial:', error);
+                observer.disconnect();
+                sentinel.innerHTML = '<span class="text-danger">No se pudo cargar más historial. Recarga la página para reintentar.</span>';
+            } finally {
+                loading = false;
+            }
+        }
+    });
+})();
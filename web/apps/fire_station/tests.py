@@ -1,4 +1,194 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
 
+from .services.vehicle_service import VehicleService
+
+
+class FakeQuery:
+    """Consulta de PostgREST falsa: registra los métodos llamados y se devuelve a sí misma."""
+
+    def __init__(self, data=None):
+        self.calls = []
+        self.data = data or []
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return method
+
+    def execute(self):
+        return SimpleNamespace(data=self.data, count=len(self.data))
+
+    def called(self, name):
+        return [args for method, args in self.calls if method == name]
+
+
+def status_row(log_id, change_date):
+    return {'id': log_id, 'change_date': change_date, 'vehicle_status': {'name': 'Disponible'}}
+
+
+def order_row(order_id, entry_date):
+    return {'id': order_id, 'entry_date': entry_date, 'order_status': {'name': 'Pendiente'}}
+
+
+def source_rows(status_log, orders, cursor, page_size):
+    """
+    Replica en memoria los filtros y el orden que get_vehicle_timeline_calls
+    pide a PostgREST, para recorrer páginas sin base de datos.
+    """
+    position = VehicleService._decode_timeline_cursor(cursor) if cursor else None
+    if position is not None:
+        timestamp, kind, entry_id = position
+        day = timestamp[:10]
+        if kind == 'status':
+            status_log = [r for r in status_log if (r['change_date'], r['id']) < (timestamp, entry_id)]
+            orders = [o for o in orders if o['entry_date'] <= day]
+        else:
+            status_log = [r for r in status_log if r['change_date'] < timestamp]
+            orders = [o for o in orders if (o['entry_date'], o['id']) < (day, entry_id)]
+    status_log = sorted(status_log, key=lambda r: (r['change_date'], r['id']), reverse=True)
+    orders = sorted(orders, key=lambda o: (o['entry_date'], o['id']), reverse=True)
+    return status_log[:page_size + 1], orders[:page_size + 1]
+
+
+class TimelineCursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        for entry in (
+            {'timestamp': '2024-05-10T08:30:00', 'kind': 'status', 'id': 7},
+            {'timestamp': '2024-05-10T00:00:00', 'kind': 'order', 'id': 3},
+            {'timestamp': '2024-05-10T08:30:00.123456', 'kind': 'status', 'id': 12},
+        ):
+            cursor = VehicleService._encode_timeline_cursor(entry)
+            self.assertEqual(
+                VehicleService._decode_timeline_cursor(cursor),
+                (entry['timestamp'], entry['kind'], entry['id'])
+            )
+
+    def test_invalid_cursors(self):
+        for cursor in (
+            None,
+            '',
+            'basura',
+            '2024-05-10T08:30:00|status',
+            '2024-05-10T08:30:00|status|7|8',
+            '2024-05-10T08:30:00|vehicle|7',
+            'no-es-fecha|status|7',
+            '2024-05-10T08:30:00|order|abc',
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(VehicleService._decode_timeline_cursor(cursor))
+
+
+class BuildVehicleTimelineTests(SimpleTestCase):
+
+    def test_status_goes_before_order_on_same_date(self):
+        page = VehicleService.build_vehicle_timeline(
+            1,
+            [status_row(1, '2024-05-10T00:00:00'), status_row(2, '2024-05-10T08:30:00')],
+            [order_row(1, '2024-05-10'), order_row(2, '2024-05-11')],
+            page_size=10
+        )
+        self.assertEqual(
+            [(e['kind'], e['id']) for e in page['entries']],
+            [('order', 2), ('status', 2), ('status', 1), ('order', 1)]
+        )
+        self.assertIsNone(page['next_cursor'])
+
+    def test_page_boundary_sets_cursor_of_last_entry(self):
+        page = VehicleService.build_vehicle_timeline(
+            1,
+            [status_row(1, '2024-05-09T10:00:00'), status_row(2, '2024-05-12T10:00:00'),
+             status_row(3, '2024-05-13T10:00:00')],
+            [order_row(1, '2024-05-11'), order_row(2, '2024-05-14'), order_row(3, '2024-05-15')],
+            page_size=2
+        )
+        self.assertEqual([(e['kind'], e['id']) for e in page['entries']], [('order', 3), ('order', 2)])
+        self.assertEqual(page['next_cursor'], '2024-05-14T00:00:00|order|2')
+
+    def test_exact_page_has_no_cursor(self):
+        page = VehicleService.build_vehicle_timeline(
+            1, [status_row(1, '2024-05-09T10:00:00')], [order_row(1, '2024-05-11')], page_size=2
+        )
+        self.assertEqual(len(page['entries']), 2)
+        self.assertIsNone(page['next_cursor'])
+
+    def test_page_size_is_bounded(self):
+        self.assertEqual(VehicleService._timeline_page_size('abc'), VehicleService.TIMELINE_PAGE_SIZE)
+        self.assertEqual(VehicleService._timeline_page_size(0), VehicleService.TIMELINE_PAGE_SIZE)
+        self.assertEqual(VehicleService._timeline_page_size(-5), 1)
+        self.assertEqual(VehicleService._timeline_page_size(10_000), VehicleService.TIMELINE_MAX_PAGE_SIZE)
+
+    def test_walking_pages_returns_every_entry_once(self):
+        # Órdenes y cambios de estado intercalados, con varios en el mismo día
+        status_log = [
+            status_row(1, '2024-05-01T09:00:00'),
+            status_row(2, '2024-05-03T00:00:00'),
+            status_row(3, '2024-05-03T00:00:00'),
+            status_row(4, '2024-05-03T15:45:00'),
+            status_row(5, '2024-05-06T11:00:00'),
+            status_row(6, '2024-05-08T07:30:00'),
+        ]
+        orders = [
+            order_row(1, '2024-05-02'),
+            order_row(2, '2024-05-03'),
+            order_row(3, '2024-05-03'),
+            order_row(4, '2024-05-06'),
+            order_row(5, '2024-05-09'),
+        ]
+        expected = [
+            (e['kind'], e['id'])
+            for e in VehicleService.build_vehicle_timeline(1, status_log, orders, page_size=100)['entries']
+        ]
+        self.assertEqual(len(expected), len(status_log) + len(orders))
+
+        for page_size in (1, 2, 3, 4):
+            with self.subTest(page_size=page_size):
+                seen, cursor = [], None
+                for _ in range(len(expected) + 1):
+                    page = VehicleService.build_vehicle_timeline(
+                        1, *source_rows(status_log, orders, cursor, page_size), page_size=page_size
+                    )
+                    seen.extend((e['kind'], e['id']) for e in page['entries'])
+                    cursor = page['next_cursor']
+                    if cursor is None:
+                        break
+                self.assertEqual(seen, expected)
+
+
+class VehicleTimelineCallsTests(SimpleTestCase):
+
+    def _calls(self, before):
+        queries = {'vehicle_status_log': FakeQuery(), 'maintenance_order': FakeQuery()}
+        client = mock.Mock()
+        client.table.side_effect = queries.__getitem__
+        with mock.patch.object(VehicleService, 'get_client', return_value=client):
+            VehicleService.get_vehicle_timeline_calls(1, 2, before=before, page_size=5)
+        return queries['vehicle_status_log'], queries['maintenance_order']
+
+    def test_status_cursor_filters(self):
+        status_query, order_query = self._calls('2024-05-03T15:45:00|status|4')
+        self.assertEqual(
+            status_query.called('or_'),
+            [('change_date.lt.2024-05-03T15:45:00,and(change_date.eq.2024-05-03T15:45:00,id.lt.4)',)]
+        )
+        self.assertEqual(order_query.called('lte'), [('entry_date', '2024-05-03')])
+        self.assertEqual(status_query.called('limit'), [(6,)])
+
+    def test_order_cursor_filters(self):
+        status_query, order_query = self._calls('2024-05-03T00:00:00|order|3')
+        self.assertEqual(status_query.called('lt'), [('change_date', '2024-05-03T00:00:00')])
+        self.assertEqual(
+            order_query.called('or_'),
+            [('entry_date.lt.2024-05-03,and(entry_date.eq.2024-05-03,id.lt.3)',)]
+        )
+
+    def test_invalid_cursor_reads_first_page(self):
+        status_query, order_query = self._calls('basura')
+        for query in (status_query, order_query):
+            self.assertEqual(query.called('or_'), [])
+            self.assertEqual(query.called('lt'), [])
+            self.assertEqual(query.called('lte'), [])
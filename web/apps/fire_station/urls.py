@@ -12,7 +12,10 @@ urlpatterns = [
     path('vehicles/create/', views.vehicle_create, name='vehicle_create'),
     path('vehicles/<int:vehicle_id>/edit/', views.vehicle_edit, name='vehicle_edit'),
     path('vehicles/<int:vehicle_id>/delete/', views.vehicle_delete, name='vehicle_delete'),
+    path('vehicles/export/', views.vehicles_export, name='vehicles_export'),
+    path('vehicles/history/export/', views.vehicle_status_log_export, name='vehicle_status_log_export'),
     path('vehicles/<int:vehicle_id>/history/', views.vehicle_history, name='vehicle_history'),
+    path('vehicles/<int:vehicle_id>/history/export/', views.vehicle_status_log_export, name='vehicle_history_export'),
     
     # Gestión de Usuarios
     path('users/', views.users_list, name='users_list'),
@@ -30,6 +33,7 @@ urlpatterns = [
     
     # API Endpoints
     path('api/vehicles/<int:vehicle_id>/', views.api_get_vehicle, name='api_get_vehicle'),
+    path('api/vehicles/<int:vehicle_id>/timeline/', views.vehicle_timeline_api, name='vehicle_timeline_api'),
     path('api/users/<str:user_id>/', views.api_get_user, name='api_get_user'),
     path('api/requests/<int:request_id>/', views.api_get_request, name='api_get_request'),
 ]
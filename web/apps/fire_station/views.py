@@ -1,5 +1,7 @@
 import logging
+from functools import partial
 from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
@@ -10,6 +12,8 @@ from .services.dashboard_service import DashboardService
 from .services.vehicle_service import VehicleService
 from .services.user_service import UserService
 from .services.request_service import RequestService
+from shared.services.concurrency import run_parallel, gather_parallel, warn_if_degraded
+from shared.services.export import csv_response, full_name
 from .forms import VehicleCreateForm, VehicleEditForm, UserProfileForm, UserCreateForm
 
 logger = logging.getLogger('apps.fire_station')
@@ -29,7 +33,7 @@ def handle_form_errors(request, form, is_ajax, *, message='⚠️ Corrige los er
 
 @require_supabase_login
 @require_fire_station_user
-def dashboard(request):
+async def dashboard(request):
     """Vista principal del panel del cuartel."""
     fire_station_id = request.fire_station_id
     fire_station_name = request.session.get('fire_station_name', 'Cuartel')
@@ -40,28 +44,23 @@ def dashboard(request):
         'fire_station_name': fire_station_name
     }
     
-    # Obtener estadísticas
-    stats = DashboardService.get_statistics(fire_station_id)
-    context.update(stats)
-    
-    # Obtener vehículos recientes
-    context['recent_vehicles'] = DashboardService.get_recent_vehicles(fire_station_id, limit=5)
-    
-    # Obtener vehículos por tipo
-    context['vehicles_by_type'] = DashboardService.get_vehicles_by_type(fire_station_id)
+    # Estadísticas (incluye vehicles_by_type y vehicles_by_status) y vehículos
+    # recientes en paralelo
+    results = await gather_parallel({
+        'stats': partial(DashboardService.get_statistics, fire_station_id),
+        'recent_vehicles': partial(DashboardService.get_recent_vehicles, fire_station_id, limit=5),
+    }, defaults={'stats': {}, 'recent_vehicles': []})
+    warn_if_degraded(request, results)
+    context.update(results['stats'])
+    context['recent_vehicles'] = results['recent_vehicles']
     
     return render(request, 'fire_station/dashboard.html', context)
 
 
 # ===== GESTIÓN DE VEHÍCULOS =====
 
-@require_supabase_login
-@require_fire_station_user
-def vehicles_list(request):
-    """Lista de vehículos del cuartel."""
-    fire_station_id = request.fire_station_id
-    
-    # Obtener filtros
+def _get_vehicle_filters(request):
+    """Filtros del listado de vehículos presentes en la query string."""
     filters = {}
     if request.GET.get('status_id'):
         filters['status_id'] = request.GET.get('status_id')
@@ -69,23 +68,70 @@ def vehicles_list(request):
         filters['vehicle_type_id'] = request.GET.get('vehicle_type_id')
     if request.GET.get('license_plate'):
         filters['license_plate'] = request.GET.get('license_plate')
+    return filters
+
+
+@require_supabase_login
+@require_fire_station_user
+def vehicles_list(request):
+    """Lista de vehículos del cuartel."""
+    fire_station_id = request.fire_station_id
+    filters = _get_vehicle_filters(request)
+    
+    results = run_parallel({
+        'vehicles': partial(VehicleService.get_all_vehicles, fire_station_id, filters),
+        'vehicle_types': VehicleService.get_vehicle_types,
+        'vehicle_statuses': VehicleService.get_vehicle_statuses,
+        'fuel_types': VehicleService.get_fuel_types,
+        'transmission_types': VehicleService.get_transmission_types,
+        'oil_types': VehicleService.get_oil_types,
+        'coolant_types': VehicleService.get_coolant_types,
+    }, defaults={
+        'vehicles': [], 'vehicle_types': [], 'vehicle_statuses': [], 'fuel_types': [],
+        'transmission_types': [], 'oil_types': [], 'coolant_types': [],
+    })
+    warn_if_degraded(request, results)
     
     context = {
         'page_title': 'Gestión de Vehículos',
         'active_page': 'vehicles',
-        'vehicles': VehicleService.get_all_vehicles(fire_station_id, filters),
-        'vehicle_types': VehicleService.get_vehicle_types(),
-        'vehicle_statuses': VehicleService.get_vehicle_statuses(),
-        'fuel_types': VehicleService.get_fuel_types(),
-        'transmission_types': VehicleService.get_transmission_types(),
-        'oil_types': VehicleService.get_oil_types(),
-        'coolant_types': VehicleService.get_coolant_types(),
+        **results,
         'filters': filters
     }
     
     return render(request, 'fire_station/vehicles_list.html', context)
 
 
+@require_supabase_login
+@require_fire_station_user
+def vehicles_export(request):
+    """Exporta la flota del cuartel (con los filtros del listado) a CSV en streaming."""
+    fire_station_id = request.fire_station_id
+    vehicles = VehicleService.iter_vehicles_for_export(fire_station_id, _get_vehicle_filters(request))
+    
+    columns = [
+        ('ID', 'id'),
+        ('Patente', 'license_plate'),
+        ('Marca', 'brand'),
+        ('Modelo', 'model'),
+        ('Año', 'year'),
+        ('Tipo', 'vehicle_type.name'),
+        ('Estado', 'vehicle_status.name'),
+        ('Kilometraje', 'mileage'),
+        ('Kilometraje actualizado', 'mileage_last_updated'),
+        ('Combustible', 'fuel_type.name'),
+        ('Transmisión', 'transmission_type.name'),
+        ('Aceite', 'oil_type.name'),
+        ('Capacidad aceite (L)', 'oil_capacity_liters'),
+        ('Refrigerante', 'coolant_type.name'),
+        ('N° motor', 'engine_number'),
+        ('VIN', 'vin'),
+        ('Fecha inscripción', 'registration_date'),
+        ('Próxima revisión', 'next_revision_date'),
+    ]
+    return csv_response(request, f'flota_cuartel_{fire_station_id}', columns, vehicles)
+
+
 @require_http_methods(["POST"])
 @require_supabase_login
 @require_fire_station_user
@@ -205,8 +251,22 @@ def vehicle_edit(request, vehicle_id):
             from datetime import datetime
             data['mileage_last_updated'] = datetime.utcnow().date().isoformat()
         
+        # El cambio de estado se aplica aparte para que quede registrado en el historial
+        new_status_id = data.pop('vehicle_status_id')
+        
         success, errors = VehicleService.update_vehicle(vehicle_id, fire_station_id, data)
         
+        if success and new_status_id != vehicle.get('vehicle_status_id'):
+            success = VehicleService.update_vehicle_status(
+                vehicle_id,
+                new_status_id,
+                request.session.get('sb_user_id'),
+                reason='Estado modificado desde la edición del vehículo',
+                fire_station_id=fire_station_id
+            )
+            if not success:
+                errors = {'vehicle_status_id': ['No se pudo actualizar el estado del vehículo.']}
+        
         if success:
             message = '✅ Vehículo actualizado correctamente.'
             if is_ajax:
@@ -597,23 +657,78 @@ def vehicle_history(request, vehicle_id):
     """Vista del historial de cambios de estado de un vehículo."""
     fire_station_id = request.fire_station_id
     
-    vehicle = VehicleService.get_vehicle(vehicle_id, fire_station_id)
+    # El vehículo y las dos fuentes de la primera página de la línea de tiempo
+    # se consultan en un mismo run_parallel; el resto se carga al hacer scroll
+    # desde vehicle_timeline_api
+    results = run_parallel({
+        'vehicle': partial(VehicleService.get_vehicle, vehicle_id, fire_station_id),
+        **VehicleService.get_vehicle_timeline_calls(vehicle_id, fire_station_id),
+    }, defaults={'status_log': [], 'orders': []})
+    vehicle = results['vehicle']
     if not vehicle:
         messages.error(request, '❌ Vehículo no encontrado.')
         return redirect('fire_station:vehicles_list')
+    warn_if_degraded(request, results)
     
-    history = VehicleService.get_vehicle_status_history(vehicle_id, fire_station_id)
+    timeline = VehicleService.build_vehicle_timeline(vehicle_id, results['status_log'], results['orders'])
     
     context = {
         'page_title': f'Historial - {vehicle["license_plate"]}',
         'active_page': 'vehicles',
         'vehicle': vehicle,
-        'history': history
+        'entries': timeline['entries'],
+        'next_cursor': timeline['next_cursor'],
     }
     
     return render(request, 'fire_station/vehicle_history.html', context)
 
 
+@require_supabase_login
+@require_fire_station_user
+def vehicle_timeline_api(request, vehicle_id):
+    """API: página siguiente de la línea de tiempo de un vehículo (scroll infinito)."""
+    fire_station_id = request.fire_station_id
+    
+    timeline = VehicleService.get_vehicle_timeline(
+        vehicle_id,
+        fire_station_id,
+        before=request.GET.get('before'),
+        page_size=request.GET.get('page_size')
+    )
+    
+    html = render_to_string(
+        'fire_station/components/timeline_rows.html',
+        {'entries': timeline['entries']},
+        request=request
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'count': len(timeline['entries']),
+        'next_cursor': timeline['next_cursor']
+    })
+
+
+@require_supabase_login
+@require_fire_station_user
+def vehicle_status_log_export(request, vehicle_id=None):
+    """Exporta el historial de estados de la flota (o de un vehículo) a CSV en streaming."""
+    fire_station_id = request.fire_station_id
+    log = VehicleService.iter_status_log_for_export(fire_station_id, vehicle_id)
+    
+    columns = [
+        ('ID', 'id'),
+        ('Fecha', 'change_date'),
+        ('Patente', 'vehicle.license_plate'),
+        ('Estado', 'vehicle_status.name'),
+        ('Motivo', 'reason'),
+        ('Realizado por', lambda entry: full_name(entry.get('changed_by'))),
+    ]
+    filename = f'historial_vehiculo_{vehicle_id}' if vehicle_id else f'historial_cuartel_{fire_station_id}'
+    return csv_response(request, filename, columns, log)
+
+
 # ===== SOLICITUDES DE MANTENIMIENTO =====
 
 @require_supabase_login
@@ -2,6 +2,8 @@ import logging
 from typing import Any, Dict, List, Optional
 from accounts.client.supabase_client import get_supabase, get_supabase_admin
 from supabase import PostgrestAPIError
+from shared.services.base_service import count_rows
+from shared.services.query_metrics import QueryMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +41,8 @@ class SigveBaseService:
             Los datos de la respuesta o una lista vacía en caso de error.
         """
         try:
-            response = query.execute()
+            with QueryMetrics.label(method_name):
+                response = query.execute()
             logger.debug(f"📊 ({method_name}) Respuesta de Supabase: {response.data}")
             return response.data if response.data is not None else []
         except PostgrestAPIError as e:
@@ -62,7 +65,8 @@ class SigveBaseService:
             Los datos del registro o None en caso de error.
         """
         try:
-            response = query.maybe_single().execute()
+            with QueryMetrics.label(method_name):
+                response = query.maybe_single().execute()
             logger.debug(f"📊 ({method_name}) Respuesta de Supabase: {response.data}")
             return response.data
         except PostgrestAPIError as e:
@@ -72,4 +76,14 @@ class SigveBaseService:
             logger.error(f"❌ ({method_name}) Error inesperado: {e}", exc_info=True)
             return None
 
+    @staticmethod
+    def _count(table: str, filters: Optional[Dict[str, Any]] = None, mode: str = "exact",
+               select: str = "id", method_name: str = "count") -> Optional[int]:
+        """
+        Cuenta filas con una petición HEAD, sin transferir ninguna fila (ver
+        shared.services.base_service.count_rows).
 
+        Returns:
+            Número de filas, o None en caso de error (para distinguirlo de 0).
+        """
+        return count_rows(SigveBaseService.get_client(), table, filters, mode, select, method_name)
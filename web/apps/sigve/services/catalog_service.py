@@ -2,6 +2,7 @@ import logging
 from typing import Dict, List, Any, Optional, Tuple
 from .base_service import SigveBaseService
 from supabase import PostgrestAPIError
+from shared.services.reference_data_service import ReferenceDataService
 
 logger = logging.getLogger(__name__)
 
@@ -464,6 +465,8 @@ class CatalogService(SigveBaseService):
         Returns:
             Lista de items del catálogo.
         """
+        if ReferenceDataService.is_cached_table(table_name):
+            return ReferenceDataService.get_table(table_name)
         client = SigveBaseService.get_client()
         query = client.table(table_name).select("*").order("name")
         return SigveBaseService._execute_query(query, f"get_catalog_items({table_name})")
@@ -487,6 +490,7 @@ class CatalogService(SigveBaseService):
             result = client.table(table_name).insert(data).execute()
             if result.data:
                 logger.info(f"✅ Item creado en {table_name}: {data.get('name')}")
+                ReferenceDataService.invalidate(table_name)
                 return result.data[0] if isinstance(result.data, list) else result.data
             return None
         except Exception as e:
@@ -500,6 +504,7 @@ class CatalogService(SigveBaseService):
         try:
             client.table(table_name).update(data).eq("id", item_id).execute()
             logger.info(f"✅ Item {item_id} actualizado en {table_name}")
+            ReferenceDataService.invalidate(table_name)
             return True
         except Exception as e:
             logger.error(f"❌ Error actualizando item {item_id} en {table_name}: {e}", exc_info=True)
@@ -512,6 +517,7 @@ class CatalogService(SigveBaseService):
         try:
             client.table(table_name).delete().eq("id", item_id).execute()
             logger.info(f"🗑️ Item {item_id} eliminado de {table_name}")
+            ReferenceDataService.invalidate(table_name)
             return True
         except Exception as e:
             logger.error(f"❌ Error eliminando item {item_id} de {table_name}: {e}", exc_info=True)
@@ -9,63 +9,41 @@ logger = logging.getLogger(__name__)
 class DashboardService(SigveBaseService):
     """Servicio para obtener estadísticas del dashboard."""
     
+    # Claves devueltas por la función dashboard_global_stats (database/scripts.sql)
+    STATISTICS_KEYS = (
+        'total_workshops',
+        'total_fire_stations',
+        'total_vehicles',
+        'available_vehicles',
+        'in_maintenance_vehicles',
+        'pending_requests_count',
+    )
+    
     @staticmethod
     def get_statistics() -> Dict[str, Any]:
         """
         Obtiene las estadísticas principales para el dashboard.
         
+        Todos los contadores se calculan en la base de datos con la función
+        `dashboard_global_stats` en un único round-trip.
+        
         Returns:
             Dict con las estadísticas: total_workshops, total_fire_stations,
-            total_vehicles, available_vehicles, in_maintenance_vehicles
+            total_vehicles, available_vehicles, in_maintenance_vehicles,
+            pending_requests_count
         """
         client = SigveBaseService.get_client()
         
         try:
-            # Contar talleres
-            workshops_count = client.table("workshop").select("id", count="exact").execute()
-            total_workshops = workshops_count.count or 0
-            
-            # Contar cuarteles
-            fire_stations_count = client.table("fire_station").select("id", count="exact").execute()
-            total_fire_stations = fire_stations_count.count or 0
-            
-            # Contar vehículos totales
-            vehicles_count = client.table("vehicle").select("id", count="exact").execute()
-            total_vehicles = vehicles_count.count or 0
+            result = client.rpc("dashboard_global_stats", {}).execute()
+            data = result.data or {}
+            stats = {key: data.get(key) or 0 for key in DashboardService.STATISTICS_KEYS}
             
-            # Contar vehículos disponibles (necesitamos el ID del estado "Disponible")
-            # Primero obtenemos el estado
-            available_status = client.table("vehicle_status").select("id").eq("name", "Disponible").maybe_single().execute()
-            available_vehicles = 0
-            if available_status.data:
-                available_count = client.table("vehicle").select("id", count="exact").eq("vehicle_status_id", available_status.data['id']).execute()
-                available_vehicles = available_count.count or 0
-            
-            # Contar vehículos en mantención
-            maintenance_status = client.table("vehicle_status").select("id").eq("name", "En Taller").maybe_single().execute()
-            in_maintenance_vehicles = 0
-            if maintenance_status.data:
-                maintenance_count = client.table("vehicle").select("id", count="exact").eq("vehicle_status_id", maintenance_status.data['id']).execute()
-                in_maintenance_vehicles = maintenance_count.count or 0
-            
-            logger.info(f"📊 Estadísticas obtenidas: {total_workshops} talleres, {total_fire_stations} cuarteles, {total_vehicles} vehículos")
-            
-            return {
-                'total_workshops': total_workshops,
-                'total_fire_stations': total_fire_stations,
-                'total_vehicles': total_vehicles,
-                'available_vehicles': available_vehicles,
-                'in_maintenance_vehicles': in_maintenance_vehicles
-            }
+            logger.info(f"📊 Estadísticas obtenidas: {stats['total_workshops']} talleres, {stats['total_fire_stations']} cuarteles, {stats['total_vehicles']} vehículos")
+            return stats
         except Exception as e:
             logger.error(f"❌ Error obteniendo estadísticas: {e}", exc_info=True)
-            return {
-                'total_workshops': 0,
-                'total_fire_stations': 0,
-                'total_vehicles': 0,
-                'available_vehicles': 0,
-                'in_maintenance_vehicles': 0
-            }
+            return {key: 0 for key in DashboardService.STATISTICS_KEYS}
     
     @staticmethod
     def get_recent_activity(limit: int = 10) -> List[Dict[str, Any]]:
@@ -136,19 +114,8 @@ class DashboardService(SigveBaseService):
         Returns:
             Número de solicitudes pendientes.
         """
-        client = SigveBaseService.get_client()
-        
-        try:
-            pending_count = client.table("data_request") \
-                .select("id", count="exact") \
-                .eq("status", "pendiente") \
-                .execute()
-            
-            count = pending_count.count or 0
-            logger.info(f"📬 Solicitudes pendientes: {count}")
-            return count
-        except Exception as e:
-            logger.error(f"❌ Error obteniendo solicitudes pendientes: {e}", exc_info=True)
-            return 0
-
-
+        count = SigveBaseService._count(
+            "data_request", {"status": "pendiente"}, method_name='get_pending_requests_count'
+        ) or 0
+        logger.info(f"📬 Solicitudes pendientes: {count}")
+        return count
@@ -18,26 +18,21 @@ class FireStationService(SigveBaseService):
             Lista de cuarteles.
         """
         client = SigveBaseService.get_client()
+        # El conteo de vehículos se obtiene como agregado embebido en la misma
+        # consulta (evita una consulta de conteo por cuartel)
         query = client.table("fire_station") \
             .select("""
                 *,
-                commune:commune_id(name, region:region_id(name))
+                commune:commune_id(name, region:region_id(name)),
+                vehicles:vehicle!vehicle_fire_station_id_fkey(count)
             """) \
             .order("name")
         
         fire_stations = SigveBaseService._execute_query(query, "get_all_fire_stations")
         
-        # Contar vehículos para cada cuartel
         for station in fire_stations:
-            try:
-                vehicles_count = client.table("vehicle") \
-                    .select("id", count="exact") \
-                    .eq("fire_station_id", station['id']) \
-                    .execute()
-                station['vehicles_count'] = vehicles_count.count or 0
-            except Exception as e:
-                logger.error(f"❌ Error contando vehículos del cuartel {station['id']}: {e}")
-                station['vehicles_count'] = 0
+            vehicles = station.pop('vehicles', None) or [{}]
+            station['vehicles_count'] = vehicles[0].get('count', 0) or 0
         
         return fire_stations
     
@@ -3,6 +3,7 @@ import json
 from typing import Dict, List, Any, Optional
 from .base_service import SigveBaseService
 from supabase import PostgrestAPIError
+from shared.services.reference_data_service import ReferenceDataService
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +89,8 @@ class RequestService(SigveBaseService):
                 try:
                     logger.info(f"✨ Creando registro en tabla '{target_table}' con datos: {requested_data}")
                     insert_result = client.table(target_table).insert(requested_data).execute()
+                    # Las solicitudes pueden crear items de catálogo (ej. tipos de vehículo)
+                    ReferenceDataService.invalidate(target_table)
                     
                     if not insert_result.data:
                         # Intentar obtener más detalles del error de la respuesta
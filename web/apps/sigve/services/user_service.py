@@ -2,6 +2,9 @@ import logging
 from typing import Dict, List, Any, Optional, Iterable, Tuple
 from .base_service import SigveBaseService
 from supabase import Client, PostgrestAPIError
+from accounts.services.principal_service import PrincipalService
+from shared.services.reference_data_service import ReferenceDataService
+from shared.services.auth_user_service import AuthUserService
 
 logger = logging.getLogger(__name__)
 
@@ -140,30 +143,16 @@ class UserService(SigveBaseService):
             Diccionario con errores por campo si hay duplicados, vacío si no hay.
         """
         errors = {}
-        admin_client: Optional[Client] = None
         client = SigveBaseService.get_client()
         
-        # Verificar email duplicado en auth.users
+        # Verificar email duplicado en auth.users (búsqueda indexada por email)
         if email:
             try:
-                admin_client = SigveBaseService.get_admin_client()
-                # Intentar obtener usuario por email
-                try:
-                    response = admin_client.auth.admin.list_users()
-                    users = getattr(response, 'users', [])
-                    
-                    for user in users:
-                        user_email = getattr(user, 'email', None) or (user.get('email') if isinstance(user, dict) else None)
-                        user_id = getattr(user, 'id', None) or (user.get('id') if isinstance(user, dict) else None)
-                        
-                        if user_email and user_email.lower() == email.lower():
-                            if not exclude_user_id or user_id != exclude_user_id:
-                                errors['email'] = 'Este correo electrónico ya está registrado en otro usuario.'
-                                break
-                except Exception as e:
-                    logger.warning(f"⚠️ No se pudo verificar email duplicado: {e}")
+                existing_user_id = AuthUserService.find_user_id_by_email(email)
+                if existing_user_id and existing_user_id != exclude_user_id:
+                    errors['email'] = 'Este correo electrónico ya está registrado en otro usuario.'
             except Exception as e:
-                logger.warning(f"⚠️ Error obteniendo admin client para verificar email: {e}")
+                logger.warning(f"⚠️ No se pudo verificar email duplicado: {e}")
         
         # Verificar RUT duplicado en user_profile (solo si se proporciona y no es None o vacío)
         if profile_data and profile_data.get('rut'):
@@ -243,6 +232,7 @@ class UserService(SigveBaseService):
                 .execute()
             
             logger.info(f"✅ Usuario {user_id} actualizado")
+            PrincipalService.invalidate(user_id)
             return True, None
         except PostgrestAPIError as e:
             logger.error(f"❌ Error de API actualizando usuario {user_id}: {e.message}", exc_info=True)
@@ -274,6 +264,7 @@ class UserService(SigveBaseService):
             
             if result.data:
                 logger.info(f"🚫 Usuario {user_id} desactivado")
+                PrincipalService.invalidate(user_id)
                 return True
             logger.warning(f"⚠️ No se pudo desactivar el usuario {user_id}, no se encontró.")
             return False
@@ -302,6 +293,7 @@ class UserService(SigveBaseService):
             
             if result.data:
                 logger.info(f"✅ Usuario {user_id} activado")
+                PrincipalService.invalidate(user_id)
                 return True
             logger.warning(f"⚠️ No se pudo activar el usuario {user_id}, no se encontró.")
             return False
@@ -329,6 +321,7 @@ class UserService(SigveBaseService):
             admin_client.auth.admin.delete_user(user_id)
             
             logger.info(f"🗑️ Usuario {user_id} eliminado permanentemente de auth.")
+            PrincipalService.invalidate(user_id)
             return True
         except Exception as e:
             # Captura errores, por ej. si el usuario no existe en auth
@@ -343,9 +336,7 @@ class UserService(SigveBaseService):
         Returns:
             Lista de roles.
         """
-        client = SigveBaseService.get_client()
-        query = client.table("role").select("*").order("name")
-        return SigveBaseService._execute_query(query, "get_all_roles")
+        return ReferenceDataService.get_table("role")
     
     @staticmethod
     def create_user_profile(user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -527,36 +518,7 @@ class UserService(SigveBaseService):
     def _get_auth_users_by_ids(user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
         """
         Obtiene los usuarios desde auth.users dada una lista de IDs.
+        
+        Se resuelven todos en una sola llamada (ver AuthUserService).
         """
-        unique_ids = list({uid for uid in user_ids if uid})
-        if not unique_ids:
-            return {}
-
-        admin_client: Client = SigveBaseService.get_admin_client()
-        auth_users: Dict[str, Dict[str, Any]] = {}
-
-        for user_id in unique_ids:
-            try:
-                response = admin_client.auth.admin.get_user_by_id(user_id)
-                auth_user = getattr(response, "user", None)
-                if not auth_user:
-                    continue
-
-                email = getattr(auth_user, "email", None)
-                if email is None and isinstance(auth_user, dict):
-                    email = auth_user.get("email")
-
-                phone = getattr(auth_user, "phone", None)
-                if phone is None and isinstance(auth_user, dict):
-                    phone = auth_user.get("phone")
-
-                auth_users[user_id] = {
-                    "email": email,
-                    "phone": phone
-                }
-            except Exception as e:
-                logger.warning(f"⚠️ No se pudo obtener auth.users para {user_id}: {e}")
-
-        return auth_users
-
-
+        return AuthUserService.get_auth_users_by_ids(user_ids)
@@ -18,23 +18,17 @@ class WorkshopService(SigveBaseService):
             Lista de talleres.
         """
         client = SigveBaseService.get_client()
+        # El conteo de empleados se obtiene como agregado embebido en la misma
+        # consulta (evita una consulta de conteo por taller)
         query = client.table("workshop") \
-            .select("*") \
+            .select("*, employees:user_profile!user_profile_workshop_id_fkey(count)") \
             .order("name")
         
         workshops = SigveBaseService._execute_query(query, "get_all_workshops")
         
-        # Contar empleados para cada taller
         for workshop in workshops:
-            try:
-                employees_count = client.table("user_profile") \
-                    .select("id", count="exact") \
-                    .eq("workshop_id", workshop['id']) \
-                    .execute()
-                workshop['employees_count'] = employees_count.count or 0
-            except Exception as e:
-                logger.error(f"❌ Error contando empleados del taller {workshop['id']}: {e}")
-                workshop['employees_count'] = 0
+            employees = workshop.pop('employees', None) or [{}]
+            workshop['employees_count'] = employees[0].get('count', 0) or 0
         
         return workshops
     
@@ -286,44 +280,20 @@ class WorkshopService(SigveBaseService):
             - puede_eliminar: True si puede eliminarse, False en caso contrario.
             - mensaje_error: Mensaje descriptivo si no puede eliminarse, None si puede.
         """
-        client = SigveBaseService.get_client()
-        
         try:
-            # Verificar si tiene empleados
-            employees_count = client.table("user_profile") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .execute()
-            
-            if employees_count.count and employees_count.count > 0:
-                return False, f"No se puede eliminar el taller porque tiene {employees_count.count} empleado(s) asociado(s)."
-            
-            # Verificar si tiene órdenes de mantenimiento
-            orders_count = client.table("maintenance_order") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .execute()
-            
-            if orders_count.count and orders_count.count > 0:
-                return False, f"No se puede eliminar el taller porque tiene {orders_count.count} orden(es) de mantenimiento asociada(s)."
-            
-            # Verificar si tiene inventario
-            inventory_count = client.table("workshop_inventory") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .execute()
-            
-            if inventory_count.count and inventory_count.count > 0:
-                return False, f"No se puede eliminar el taller porque tiene {inventory_count.count} item(s) en el inventario."
-            
-            # Verificar si tiene proveedores locales
-            suppliers_count = client.table("supplier") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .execute()
-            
-            if suppliers_count.count and suppliers_count.count > 0:
-                return False, f"No se puede eliminar el taller porque tiene {suppliers_count.count} proveedor(es) local(es) asociado(s)."
+            # Conteos con HEAD: no se descarga ninguna fila
+            dependencies = (
+                ("user_profile", "No se puede eliminar el taller porque tiene {count} empleado(s) asociado(s)."),
+                ("maintenance_order", "No se puede eliminar el taller porque tiene {count} orden(es) de mantenimiento asociada(s)."),
+                ("workshop_inventory", "No se puede eliminar el taller porque tiene {count} item(s) en el inventario."),
+                ("supplier", "No se puede eliminar el taller porque tiene {count} proveedor(es) local(es) asociado(s)."),
+            )
+            for table, message in dependencies:
+                count = SigveBaseService._count(table, {"workshop_id": workshop_id}, method_name='can_delete_workshop')
+                if count is None:
+                    return False, "Error al verificar datos asociados al taller."
+                if count > 0:
+                    return False, message.format(count=count)
             
             return True, None
             
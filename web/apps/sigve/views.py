@@ -1,5 +1,6 @@
 import json
 import logging
+from functools import partial
 from django.contrib import messages
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
@@ -13,6 +14,7 @@ from .services.workshop_service import WorkshopService
 from .services.fire_station_service import FireStationService
 from .services.catalog_service import CatalogService
 from .services.user_service import UserService
+from shared.services.concurrency import run_parallel, gather_parallel, warn_if_degraded
 from .forms import (
     WorkshopForm, FireStationForm, SparePartForm, SupplierForm,
     CatalogItemForm, UserProfileForm, RejectRequestForm, UserCreateForm,
@@ -49,25 +51,24 @@ def format_service_errors(errors):
 
 @require_supabase_login
 @require_role("Admin SIGVE")
-def dashboard(request):
+async def dashboard(request):
     """Vista principal del panel de administración SIGVE."""
     context = {
         'page_title': 'Dashboard',
         'active_page': 'dashboard'
     }
     
-    # Obtener estadísticas
-    stats = DashboardService.get_statistics()
-    context.update(stats)
-    
-    # Obtener actividad reciente
-    context['recent_activity'] = DashboardService.get_recent_activity(limit=10)
-    
-    # Obtener solicitudes pendientes
-    context['pending_requests_count'] = DashboardService.get_pending_requests_count()
-    
-    # Contexto necesario para los modales
-    context['communes'] = FireStationService.get_all_communes()
+    # Estadísticas (incluye pending_requests_count), actividad reciente y
+    # comunas (contexto de los modales) en paralelo
+    results = await gather_parallel({
+        'stats': DashboardService.get_statistics,
+        'recent_activity': partial(DashboardService.get_recent_activity, limit=10),
+        'communes': FireStationService.get_all_communes,
+    }, defaults={'stats': {}, 'recent_activity': [], 'communes': []})
+    warn_if_degraded(request, results)
+    context.update(results['stats'])
+    context['recent_activity'] = results['recent_activity']
+    context['communes'] = results['communes']
     
     return render(request, 'sigve/dashboard.html', context)
 
@@ -1287,13 +1288,18 @@ def catalog_delete(request, catalog_name, item_id):
 @require_role("Admin SIGVE")
 def users_list(request):
     """Lista de todos los usuarios de la plataforma."""
+    results = run_parallel({
+        'users': UserService.get_all_users,
+        'roles': UserService.get_all_roles,
+        'workshops': WorkshopService.get_all_workshops,
+        'fire_stations': FireStationService.get_all_fire_stations,
+    }, defaults={'users': [], 'roles': [], 'workshops': [], 'fire_stations': []})
+    warn_if_degraded(request, results)
+    
     context = {
         'page_title': 'Gestión de Usuarios',
         'active_page': 'users',
-        'users': UserService.get_all_users(),
-        'roles': UserService.get_all_roles(),
-        'workshops': WorkshopService.get_all_workshops(),
-        'fire_stations': FireStationService.get_all_fire_stations()
+        **results
     }
     
     return render(request, 'sigve/users_list.html', context)
@@ -2,6 +2,9 @@ import logging
 from typing import Any, Dict, List, Optional
 from accounts.client.supabase_client import get_supabase
 from supabase import PostgrestAPIError
+from shared.services.identity_map import IdentityMap
+from shared.services.base_service import count_rows
+from shared.services.query_metrics import QueryMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +35,8 @@ class WorkshopBaseService:
             Los datos de la respuesta o una lista vacía en caso de error.
         """
         try:
-            response = query.execute()
+            with QueryMetrics.label(method_name):
+                response = query.execute()
             logger.debug(f"📊 ({method_name}) Respuesta de Supabase: {response.data}")
             return response.data if response.data is not None else []
         except PostgrestAPIError as e:
@@ -55,7 +59,8 @@ class WorkshopBaseService:
             Los datos del registro o None en caso de error.
         """
         try:
-            response = query.maybe_single().execute()
+            with QueryMetrics.label(method_name):
+                response = query.maybe_single().execute()
             logger.debug(f"📊 ({method_name}) Respuesta de Supabase: {response.data}")
             return response.data
         except PostgrestAPIError as e:
@@ -65,4 +70,39 @@ class WorkshopBaseService:
             logger.error(f"❌ ({method_name}) Error inesperado: {e}", exc_info=True)
             return None
 
+    @staticmethod
+    def _execute_single_by_id(table: str, row_id: Any, projection: str, query, method_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Como _execute_single, pero reutiliza la fila si ya se leyó en esta
+        petición con la misma proyección (ver IdentityMap).
+
+        Args:
+            table: Tabla de la fila.
+            row_id: ID de la fila.
+            projection: Identificador de las columnas y filtros de alcance de la consulta.
+            query: La consulta de PostgREST a ejecutar si la fila no está en memoria.
+            method_name: El nombre del método que llama para logging.
+
+        Returns:
+            Los datos del registro o None si no existe o hay error.
+        """
+        return IdentityMap.get_or_load(
+            table, row_id, projection, lambda: WorkshopBaseService._execute_single(query, method_name)
+        )
 
+    @staticmethod
+    def _invalidate_row(table: str, row_id: Any = None) -> None:
+        """Invalida una fila (o toda la tabla) del identity map tras una escritura."""
+        IdentityMap.invalidate(table, row_id)
+
+    @staticmethod
+    def _count(table: str, filters: Optional[Dict[str, Any]] = None, mode: str = "exact",
+               select: str = "id", method_name: str = "count") -> Optional[int]:
+        """
+        Cuenta filas con una petición HEAD, sin transferir ninguna fila (ver
+        shared.services.base_service.count_rows).
+
+        Returns:
+            Número de filas, o None en caso de error (para distinguirlo de 0).
+        """
+        return count_rows(WorkshopBaseService.get_client(), table, filters, mode, select, method_name)
@@ -1,6 +1,7 @@
 import logging
 from typing import Dict, Any
 from .base_service import WorkshopBaseService
+from shared.services.status_registry import StatusRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -8,83 +9,39 @@ logger = logging.getLogger(__name__)
 class DashboardService(WorkshopBaseService):
     """Servicio para el dashboard del taller."""
     
+    # Claves devueltas por la función dashboard_workshop_stats (database/scripts.sql)
+    STATISTICS_KEYS = (
+        'ordenes_en_taller',
+        'ordenes_pendientes',
+        'ordenes_espera_repuesto',
+        'total_ordenes',
+        'repuestos_bajo_stock',
+        'pending_requests_count',
+    )
+    
     @staticmethod
     def get_statistics(workshop_id: int) -> Dict[str, Any]:
         """
         Obtiene las estadísticas del dashboard para un taller específico.
         
+        Todos los contadores se calculan en la base de datos con la función
+        `dashboard_workshop_stats` en un único round-trip.
+        
         Args:
             workshop_id: ID del taller.
             
         Returns:
-            Diccionario con las estadísticas.
+            Diccionario con las estadísticas (incluye pending_requests_count).
         """
         client = WorkshopBaseService.get_client()
-        stats = {}
-        
-        try:
-            # Órdenes en taller
-            ordenes_en_taller = client.table("maintenance_order") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .eq("order_status_id", client.table("maintenance_order_status")
-                    .select("id").eq("name", "En Taller").maybe_single().execute().data.get('id', 0)) \
-                .execute()
-            stats['ordenes_en_taller'] = ordenes_en_taller.count or 0
-        except Exception as e:
-            logger.error(f"❌ Error contando órdenes en taller: {e}")
-            stats['ordenes_en_taller'] = 0
         
         try:
-            # Órdenes pendientes
-            ordenes_pendientes = client.table("maintenance_order") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .eq("order_status_id", client.table("maintenance_order_status")
-                    .select("id").eq("name", "Pendiente").maybe_single().execute().data.get('id', 0)) \
-                .execute()
-            stats['ordenes_pendientes'] = ordenes_pendientes.count or 0
-        except Exception as e:
-            logger.error(f"❌ Error contando órdenes pendientes: {e}")
-            stats['ordenes_pendientes'] = 0
-        
-        try:
-            # Órdenes en espera de repuestos
-            ordenes_espera_repuesto = client.table("maintenance_order") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .eq("order_status_id", client.table("maintenance_order_status")
-                    .select("id").eq("name", "En Espera de Repuestos").maybe_single().execute().data.get('id', 0)) \
-                .execute()
-            stats['ordenes_espera_repuesto'] = ordenes_espera_repuesto.count or 0
+            result = client.rpc("dashboard_workshop_stats", {"p_workshop_id": workshop_id}).execute()
+            data = result.data or {}
+            return {key: data.get(key) or 0 for key in DashboardService.STATISTICS_KEYS}
         except Exception as e:
-            logger.error(f"❌ Error contando órdenes en espera de repuestos: {e}")
-            stats['ordenes_espera_repuesto'] = 0
-        
-        try:
-            # Total de órdenes
-            total_ordenes = client.table("maintenance_order") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .execute()
-            stats['total_ordenes'] = total_ordenes.count or 0
-        except Exception as e:
-            logger.error(f"❌ Error contando total de órdenes: {e}")
-            stats['total_ordenes'] = 0
-        
-        try:
-            # Repuestos con stock bajo (menos de 5 unidades)
-            repuestos_bajo_stock = client.table("workshop_inventory") \
-                .select("id", count="exact") \
-                .eq("workshop_id", workshop_id) \
-                .lt("quantity", 5) \
-                .execute()
-            stats['repuestos_bajo_stock'] = repuestos_bajo_stock.count or 0
-        except Exception as e:
-            logger.error(f"❌ Error contando repuestos con stock bajo: {e}")
-            stats['repuestos_bajo_stock'] = 0
-        
-        return stats
+            logger.error(f"❌ Error obteniendo estadísticas del taller {workshop_id}: {e}", exc_info=True)
+            return {key: 0 for key in DashboardService.STATISTICS_KEYS}
     
     @staticmethod
     def get_active_orders(workshop_id: int, limit: int = 10):
@@ -102,18 +59,12 @@ class DashboardService(WorkshopBaseService):
         
         try:
             # Primero obtener el ID del estado "En Taller"
-            status_resp = client.table("maintenance_order_status") \
-                .select("id") \
-                .eq("name", "En Taller") \
-                .maybe_single() \
-                .execute()
+            status_id = StatusRegistry.get_order_status_id("En Taller")
             
-            if not status_resp.data:
+            if not status_id:
                 logger.warning("⚠️ No se encontró el estado 'En Taller'")
                 return []
             
-            status_id = status_resp.data.get('id')
-            
             # Obtener las órdenes activas
             query = client.table("maintenance_order") \
                 .select("""
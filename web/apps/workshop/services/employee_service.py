@@ -2,6 +2,7 @@ import logging
 from typing import Dict, List, Any, Optional, Tuple
 from .base_service import WorkshopBaseService
 from accounts.client.supabase_client import get_supabase_admin
+from accounts.services.principal_service import PrincipalService
 
 logger = logging.getLogger(__name__)
 
@@ -271,6 +272,7 @@ class EmployeeService(WorkshopBaseService):
                 .execute()
             
             logger.info(f"✅ Empleado {user_id} actualizado")
+            PrincipalService.invalidate(user_id)
             return True, None
         except Exception as e:
             logger.error(f"❌ Error actualizando empleado {user_id}: {e}", exc_info=True)
@@ -1,8 +1,9 @@
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from decimal import Decimal
 from .base_service import WorkshopBaseService
 from supabase import PostgrestAPIError
+from shared.services.export import iter_keyset
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +11,10 @@ logger = logging.getLogger(__name__)
 class InventoryService(WorkshopBaseService):
     """Servicio para gestionar el inventario del taller."""
     
+    # Límites de resultados para la búsqueda de repuestos
+    SEARCH_DEFAULT_LIMIT = 20
+    SEARCH_MAX_LIMIT = 50
+    
     @staticmethod
     def _convert_decimal_to_float(value: Any) -> Any:
         """
@@ -53,7 +58,60 @@ class InventoryService(WorkshopBaseService):
             .order("spare_part_id")
         
         return WorkshopBaseService._execute_query(query, "get_all_inventory")
-    
+
+    @staticmethod
+    def iter_inventory_for_export(workshop_id: int) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre el inventario de un taller para exportarlo con su valorización,
+        en bloques paginados por ID (ver shared.services.export.iter_keyset).
+        
+        Args:
+            workshop_id: ID del taller.
+            
+        Yields:
+            Cada item con el repuesto y proveedor embebidos y `total_value`
+            (cantidad × costo actual).
+        """
+        client = WorkshopBaseService.get_client()
+        
+        def build_query():
+            return client.table("workshop_inventory") \
+                .select("""
+                    id,
+                    quantity,
+                    current_cost,
+                    location,
+                    workshop_sku,
+                    updated_at,
+                    spare_part:spare_part_id(name, sku, brand),
+                    supplier:supplier_id(name)
+                """) \
+                .eq("workshop_id", workshop_id)
+        
+        for item in iter_keyset(build_query, "iter_inventory_for_export"):
+            item['total_value'] = round((item.get('quantity') or 0) * (item.get('current_cost') or 0), 2)
+            yield item
+
+    @staticmethod
+    def get_inventory_options(workshop_id: int):
+        """
+        Obtiene el inventario de un taller con las columnas mínimas para un selector.
+
+        Args:
+            workshop_id: ID del taller.
+
+        Returns:
+            Lista de items (id, quantity, current_cost y nombre del repuesto).
+        """
+        client = WorkshopBaseService.get_client()
+
+        query = client.table("workshop_inventory") \
+            .select("id, quantity, current_cost, spare_part:spare_part_id(name)") \
+            .eq("workshop_id", workshop_id) \
+            .order("spare_part_id")
+
+        return WorkshopBaseService._execute_query(query, "get_inventory_options")
+
     @staticmethod
     def get_inventory_item(inventory_id: int, workshop_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -355,36 +413,34 @@ class InventoryService(WorkshopBaseService):
         """
         Busca repuestos en el catálogo maestro.
         
+        La búsqueda se resuelve en la base de datos (RPC `search_spare_parts`,
+        índice trigram sobre nombre, SKU y marca) con ranking: SKU exacto,
+        prefijo de SKU/nombre, coincidencia parcial y similitud aproximada.
+        
         Args:
             search_term: Término de búsqueda (nombre, SKU o marca).
-            limit: Límite de resultados (opcional, para mejorar rendimiento).
+            limit: Límite de resultados (por defecto SEARCH_DEFAULT_LIMIT, máximo SEARCH_MAX_LIMIT).
             
         Returns:
-            Lista de repuestos que coinciden.
+            Lista de repuestos que coinciden, ordenados por relevancia.
+            Sin término de búsqueda devuelve los primeros repuestos por nombre.
         """
         client = WorkshopBaseService.get_client()
         
-        query = client.table("spare_part").select("*").order("name")
-        
-        # Aplicar límite si se especifica
-        if limit:
-            query = query.limit(limit)
+        try:
+            limit = int(limit or InventoryService.SEARCH_DEFAULT_LIMIT)
+        except (TypeError, ValueError):
+            limit = InventoryService.SEARCH_DEFAULT_LIMIT
+        limit = max(1, min(limit, InventoryService.SEARCH_MAX_LIMIT))
         
-        # Si hay término de búsqueda, filtrar
-        if search_term:
-            # Nota: Supabase no soporta OR en múltiples campos directamente
-            # Necesitamos hacer la búsqueda en Python o usar RPC
-            all_parts = WorkshopBaseService._execute_query(query, "search_spare_parts")
-            search_lower = search_term.lower()
-            
-            filtered = [
-                part for part in all_parts
-                if (search_lower in part.get('name', '').lower() or
-                    search_lower in part.get('sku', '').lower() or
-                    search_lower in part.get('brand', '').lower())
-            ]
-            return filtered
-        else:
+        search_term = (search_term or '').strip()
+        if not search_term:
+            query = client.table("spare_part") \
+                .select("id, name, sku, brand, description") \
+                .order("name") \
+                .limit(limit)
             return WorkshopBaseService._execute_query(query, "search_spare_parts")
-
+        
+        query = client.rpc("search_spare_parts", {"p_query": search_term, "p_limit": limit})
+        return WorkshopBaseService._execute_query(query, "search_spare_parts")
 
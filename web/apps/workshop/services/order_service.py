@@ -1,9 +1,13 @@
 import logging
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
 from datetime import datetime
 from decimal import Decimal
+from django.conf import settings
 from .base_service import WorkshopBaseService
+from supabase import PostgrestAPIError
 from shared.services.vehicle_status_service import VehicleStatusService
+from shared.services.status_registry import StatusRegistry
+from shared.services.export import iter_keyset
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +16,11 @@ class OrderService(WorkshopBaseService):
     """Servicio para gestionar órdenes de mantención."""
     
     # Keywords para identificar estados de finalización
-    COMPLETION_KEYWORDS: Set[str] = {'cancel', 'termin', 'final', 'complet', 'cerrad'}
+    COMPLETION_KEYWORDS: Set[str] = StatusRegistry.COMPLETION_KEYWORDS
+    
+    # Paginación del listado de órdenes
+    DEFAULT_PAGE_SIZE = 25
+    MAX_PAGE_SIZE = 100
     
     @staticmethod
     def _convert_decimal_to_float(value: Any) -> Any:
@@ -29,11 +37,18 @@ class OrderService(WorkshopBaseService):
             return float(value)
         return value
     
+    @staticmethod
+    def _log_inventory_movements() -> bool:
+        """Indica si los movimientos de stock se registran en `inventory_movement`."""
+        return bool(getattr(settings, 'INVENTORY_MOVEMENT_LEDGER', True))
+    
     @staticmethod
     def is_completion_status(status_name: str) -> bool:
         """
         Verifica si un nombre de estado indica finalización de orden.
         
+        Usa el flag `is_completion` precalculado en StatusRegistry.
+        
         Args:
             status_name: Nombre del estado.
             
@@ -43,8 +58,7 @@ class OrderService(WorkshopBaseService):
         if not status_name:
             return False
         
-        status_lower = status_name.lower()
-        return any(keyword in status_lower for keyword in OrderService.COMPLETION_KEYWORDS)
+        return StatusRegistry.is_completion_order_status(status_name)
     
     @staticmethod
     def is_order_completed(order: Dict[str, Any]) -> bool:
@@ -79,19 +93,106 @@ class OrderService(WorkshopBaseService):
         return False
     
     @staticmethod
-    def get_all_orders(workshop_id: int, filters: Dict[str, Any] = None):
+    def _encode_cursor(order: Dict[str, Any]) -> str:
+        """Codifica la posición (entry_date, id) de una orden como cursor."""
+        return f"{order['entry_date']}_{order['id']}"
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+        """
+        Decodifica un cursor "entry_date_id".
+        
+        Returns:
+            Tupla (entry_date, id), o None si el cursor no es válido.
+        """
+        try:
+            entry_date, order_id = cursor.rsplit('_', 1)
+            return datetime.strptime(entry_date, '%Y-%m-%d').date().isoformat(), int(order_id)
+        except (AttributeError, TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _apply_order_filters(query, workshop_id: int, filters: Optional[Dict[str, Any]]):
+        """
+        Aplica el filtro de taller y los filtros opcionales a una consulta de órdenes.
+        
+        Los filtros de patente y cuartel se aplican sobre el vehículo embebido
+        (`vehicle:vehicle_id!inner`), por lo que se resuelven en la base de datos.
         """
-        Obtiene todas las órdenes de mantención de un taller con filtros opcionales.
+        query = query.eq("workshop_id", workshop_id)
+        if not filters:
+            return query
+        
+        if filters.get('status_id'):
+            query = query.eq("order_status_id", filters['status_id'])
+        
+        if filters.get('license_plate'):
+            # Escapar comodines de LIKE para buscar la patente literal
+            search_plate = filters['license_plate'].strip()
+            search_plate = search_plate.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.ilike("vehicle.license_plate", f"%{search_plate}%")
+        
+        if filters.get('fire_station_id'):
+            query = query.eq("vehicle.fire_station_id", int(filters['fire_station_id']))
+        
+        return query
+    
+    @staticmethod
+    def get_orders_page(
+        workshop_id: int,
+        filters: Dict[str, Any] = None,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        page_size: int = None,
+        with_count: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Obtiene una página de órdenes de mantención de un taller (paginación por cursor).
+        
+        Las órdenes se ordenan por (entry_date, id) descendente y la página se
+        ubica con un cursor sobre esas columnas, por lo que el costo no depende
+        de cuántas órdenes históricas tenga el taller.
         
         Args:
             workshop_id: ID del taller.
-            filters: Diccionario con filtros opcionales (status, license_plate, fire_station_id).
+            filters: Diccionario con filtros opcionales (status_id, license_plate, fire_station_id).
+            after: Cursor de la última orden de la página anterior (página siguiente).
+            before: Cursor de la primera orden de la página siguiente (página anterior).
+            page_size: Cantidad de órdenes por página (máximo MAX_PAGE_SIZE).
+            with_count: Si es True, incluye el total de órdenes que cumplen los filtros.
             
         Returns:
-            Lista de órdenes con información relacionada.
+            Diccionario con:
+            - orders: Lista de órdenes de la página.
+            - next_cursor: Cursor para la página siguiente, o None.
+            - prev_cursor: Cursor para la página anterior, o None.
+            - total_count: Total de órdenes con los filtros aplicados (None si with_count es False).
+            - page_size: Tamaño de página efectivo.
         """
+        try:
+            page_size = int(page_size or OrderService.DEFAULT_PAGE_SIZE)
+        except (TypeError, ValueError):
+            page_size = OrderService.DEFAULT_PAGE_SIZE
+        page_size = max(1, min(page_size, OrderService.MAX_PAGE_SIZE))
+        
+        page = {
+            'orders': [],
+            'next_cursor': None,
+            'prev_cursor': None,
+            'total_count': None,
+            'page_size': page_size,
+        }
+        
         client = WorkshopBaseService.get_client()
         
+        after_position = OrderService._decode_cursor(after) if after else None
+        before_position = OrderService._decode_cursor(before) if before and not after_position else None
+        backwards = before_position is not None
+        position = before_position or after_position
+        
+        # Con cursor, el conteo se hace aparte (el filtro del cursor lo alteraría)
+        count_method = "exact" if with_count and position is None else None
+        
         query = client.table("maintenance_order") \
             .select("""
                 id,
@@ -100,7 +201,7 @@ class OrderService(WorkshopBaseService):
                 mileage,
                 total_cost,
                 observations,
-                vehicle:vehicle_id(
+                vehicle:vehicle_id!inner(
                     id,
                     license_plate,
                     brand,
@@ -112,37 +213,114 @@ class OrderService(WorkshopBaseService):
                 order_status:order_status_id(id, name),
                 maintenance_type:maintenance_type_id(id, name),
                 assigned_mechanic:assigned_mechanic_id(id, first_name, last_name)
-            """) \
-            .eq("workshop_id", workshop_id) \
-            .order("entry_date", desc=True)
+            """, count=count_method)
+        query = OrderService._apply_order_filters(query, workshop_id, filters)
+        
+        if position is not None:
+            entry_date, order_id = position
+            op = "gt" if backwards else "lt"
+            query = query.or_(f"entry_date.{op}.{entry_date},and(entry_date.eq.{entry_date},id.{op}.{order_id})")
+        
+        # Se pide una fila extra para saber si hay más páginas en esa dirección
+        query = query \
+            .order("entry_date", desc=not backwards) \
+            .order("id", desc=not backwards) \
+            .limit(page_size + 1)
+        
+        try:
+            response = query.execute()
+        except PostgrestAPIError as e:
+            logger.error(f"❌ (get_orders_page) Error de API: {e.message}", exc_info=True)
+            return page
+        except Exception as e:
+            logger.error(f"❌ (get_orders_page) Error inesperado: {e}", exc_info=True)
+            return page
+        
+        orders = response.data or []
+        has_more = len(orders) > page_size
+        orders = orders[:page_size]
+        if backwards:
+            orders.reverse()
+        
+        page['orders'] = orders
+        if orders:
+            if backwards:
+                page['prev_cursor'] = OrderService._encode_cursor(orders[0]) if has_more else None
+                page['next_cursor'] = OrderService._encode_cursor(orders[-1])
+            else:
+                page['prev_cursor'] = OrderService._encode_cursor(orders[0]) if position is not None else None
+                page['next_cursor'] = OrderService._encode_cursor(orders[-1]) if has_more else None
+        
+        if with_count:
+            if count_method:
+                page['total_count'] = response.count or 0
+            else:
+                page['total_count'] = OrderService.count_orders(workshop_id, filters)
+        
+        return page
+    
+    @staticmethod
+    def count_orders(workshop_id: int, filters: Dict[str, Any] = None) -> int:
+        """
+        Cuenta las órdenes de un taller que cumplen los filtros (sin traer filas).
         
-        # Aplicar filtros si existen
-        if filters:
-            if filters.get('status_id'):
-                query = query.eq("order_status_id", filters['status_id'])
+        Args:
+            workshop_id: ID del taller.
+            filters: Diccionario con filtros opcionales (status_id, license_plate, fire_station_id).
             
-            # Para license_plate necesitamos filtrar en Python después
-            # porque Supabase no soporta filtrado en relaciones anidadas directamente
-        
-        orders = WorkshopBaseService._execute_query(query, "get_all_orders")
-        
-        # Filtrar por patente si se especificó
-        if filters and filters.get('license_plate'):
-            search_plate = filters['license_plate'].lower()
-            orders = [
-                order for order in orders 
-                if order.get('vehicle', {}).get('license_plate', '').lower().find(search_plate) >= 0
-            ]
-        
-        # Filtrar por cuartel si se especificó
-        if filters and filters.get('fire_station_id'):
-            fire_station_id = int(filters['fire_station_id'])
-            orders = [
-                order for order in orders 
-                if order.get('vehicle', {}).get('fire_station', {}).get('id') == fire_station_id
-            ]
-        
-        return orders
+        Returns:
+            Cantidad de órdenes, o 0 en caso de error.
+        """
+        client = WorkshopBaseService.get_client()
+        
+        query = client.table("maintenance_order") \
+            .select("id, vehicle:vehicle_id!inner(id)", count="exact", head=True)
+        query = OrderService._apply_order_filters(query, workshop_id, filters)
+        
+        try:
+            return query.execute().count or 0
+        except Exception as e:
+            logger.error(f"❌ (count_orders) Error contando órdenes: {e}", exc_info=True)
+            return 0
+    
+    @staticmethod
+    def iter_orders_for_export(workshop_id: int, filters: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todas las órdenes de un taller para exportarlas, en bloques
+        paginados por ID (ver shared.services.export.iter_keyset).
+        
+        Args:
+            workshop_id: ID del taller.
+            filters: Diccionario con filtros opcionales (status_id, license_plate, fire_station_id).
+            
+        Yields:
+            Cada orden con el vehículo, cuartel, estado, tipo y mecánico embebidos.
+        """
+        client = WorkshopBaseService.get_client()
+        
+        def build_query():
+            query = client.table("maintenance_order") \
+                .select("""
+                    id,
+                    entry_date,
+                    exit_date,
+                    mileage,
+                    total_cost,
+                    observations,
+                    vehicle:vehicle_id!inner(
+                        license_plate,
+                        brand,
+                        model,
+                        year,
+                        fire_station:fire_station_id(name)
+                    ),
+                    order_status:order_status_id(name),
+                    maintenance_type:maintenance_type_id(name),
+                    assigned_mechanic:assigned_mechanic_id(first_name, last_name)
+                """)
+            return OrderService._apply_order_filters(query, workshop_id, filters)
+        
+        return iter_keyset(build_query, "iter_orders_for_export")
     
     @staticmethod
     def get_order(order_id: int, workshop_id: int) -> Optional[Dict[str, Any]]:
@@ -173,127 +351,204 @@ class OrderService(WorkshopBaseService):
             .eq("id", order_id) \
             .eq("workshop_id", workshop_id)
         
-        return WorkshopBaseService._execute_single(query, "get_order")
-    
+        # Las vistas de tareas y repuestos validan la orden y luego el servicio
+        # la vuelve a leer: se reutiliza la fila dentro de la petición.
+        return WorkshopBaseService._execute_single_by_id(
+            "maintenance_order", order_id, f"get_order:workshop={workshop_id}", query, "get_order"
+        )
+
     @staticmethod
-    def create_order(workshop_id: int, data: Dict[str, Any], user_id: str = None) -> Optional[Dict[str, Any]]:
+    def get_order_detail(order_id: int, workshop_id: int) -> Optional[Dict[str, Any]]:
         """
-        Crea una nueva orden de mantención y actualiza el estado del vehículo a "En Mantención".
+        Obtiene una orden con sus tareas y repuestos en una sola consulta.
+
+        Las tareas (con su tipo) y los repuestos de cada tarea (con el nombre del
+        repuesto del inventario) se traen como recursos embebidos. Además calcula
+        los subtotales de costo:
+        - Por tarea: 'parts_cost' (repuestos) y 'subtotal' (mano de obra + repuestos).
+        - Por orden: 'labor_cost', 'parts_cost' y 'tasks_total'.
+
+        Args:
+            order_id: ID de la orden.
+            workshop_id: ID del taller.
+
+        Returns:
+            Datos de la orden con la lista 'tasks' (cada una con 'parts'), o None.
+        """
+        client = WorkshopBaseService.get_client()
+
+        query = client.table("maintenance_order") \
+            .select("""
+                *,
+                vehicle:vehicle_id(
+                    *,
+                    vehicle_status:vehicle_status_id(id, name),
+                    fire_station:fire_station_id(id, name)
+                ),
+                order_status:order_status_id(*),
+                maintenance_type:maintenance_type_id(*),
+                assigned_mechanic:assigned_mechanic_id(id, first_name, last_name, rut),
+                tasks:maintenance_task(
+                    id,
+                    description,
+                    cost,
+                    created_at,
+                    task_type:task_type_id(id, name, description),
+                    parts:maintenance_task_part(
+                        id,
+                        quantity_used,
+                        cost_per_unit,
+                        created_at,
+                        workshop_inventory:workshop_inventory_id(
+                            id,
+                            spare_part:spare_part_id(id, name, sku, brand)
+                        )
+                    )
+                )
+            """) \
+            .eq("id", order_id) \
+            .eq("workshop_id", workshop_id) \
+            .order("created_at", foreign_table="tasks")
+
+        order = WorkshopBaseService._execute_single(query, "get_order_detail")
+        if not order:
+            return None
+
+        labor_cost = 0.0
+        parts_cost = 0.0
+        for task in order.get('tasks') or []:
+            task['parts'] = task.get('parts') or []
+            task_parts_cost = sum(
+                (part.get('quantity_used') or 0) * (part.get('cost_per_unit') or 0)
+                for part in task['parts']
+            )
+            task['parts_cost'] = task_parts_cost
+            task['subtotal'] = (task.get('cost') or 0) + task_parts_cost
+            labor_cost += task.get('cost') or 0
+            parts_cost += task_parts_cost
+
+        order['tasks'] = order.get('tasks') or []
+        order['labor_cost'] = labor_cost
+        order['parts_cost'] = parts_cost
+        order['tasks_total'] = labor_cost + parts_cost
+        return order
+
+    @staticmethod
+    def create_order(workshop_id: int, data: Dict[str, Any], user_id: str = None) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """
+        Crea una nueva orden de mantención y actualiza el estado del vehículo a "En Taller".
+        
+        Usa la función `create_maintenance_order` de la base de datos, que en una
+        sola transacción verifica que el vehículo no tenga otra orden activa,
+        inserta la orden, cambia el estado del vehículo y registra el cambio en
+        vehicle_status_log.
         
         Args:
             workshop_id: ID del taller.
             data: Datos de la orden (vehicle_id, mileage, maintenance_type_id, etc).
             user_id: ID del usuario que crea la orden (para registrar el cambio de estado).
+                Sin user_id no se cambia el estado del vehículo.
             
         Returns:
-            Datos de la orden creada o None.
+            Tupla (orden_creada, errores):
+            - orden_creada: Datos de la orden creada o None si hubo error.
+            - errores: Diccionario con errores por campo (ej. orden activa existente), None si no hay.
         """
         client = WorkshopBaseService.get_client()
         
-        # Verificar si el vehículo ya tiene una orden activa
-        if OrderService.has_active_order(data['vehicle_id']):
-            logger.warning(f"⚠️ Vehículo {data['vehicle_id']} ya posee una orden activa. No se creará una nueva.")
-            return None
-        
-        # Preparar datos de la orden
-        order_data = {
-            'workshop_id': workshop_id,
-            'vehicle_id': data['vehicle_id'],
-            'mileage': data['mileage'],
-            'maintenance_type_id': data['maintenance_type_id'],
-            'order_status_id': data.get('order_status_id'),
-            'assigned_mechanic_id': data.get('assigned_mechanic_id'),
-            'entry_date': data.get('entry_date', datetime.now().isoformat()),
-            'observations': data.get('observations', '')
+        vehicle_id = data['vehicle_id']
+        entry_date = data.get('entry_date') or datetime.now().date().isoformat()
+        
+        params = {
+            'p_workshop_id': workshop_id,
+            'p_vehicle_id': vehicle_id,
+            'p_mileage': data['mileage'],
+            'p_maintenance_type_id': data['maintenance_type_id'],
+            'p_order_status_id': data.get('order_status_id'),
+            'p_assigned_mechanic_id': data.get('assigned_mechanic_id'),
+            'p_entry_date': str(entry_date),
+            'p_observations': data.get('observations', ''),
+            'p_user_id': user_id,
+            'p_vehicle_status_name': 'En Taller',
         }
         
         try:
-            result = client.table("maintenance_order").insert(order_data).execute()
+            result = client.rpc("create_maintenance_order", params).execute()
+            payload = result.data or {}
             
-            if result.data:
-                order_id = result.data[0]['id'] if isinstance(result.data, list) else result.data['id']
-                logger.info(f"✅ Orden de mantención creada: {order_id}")
-                
-                # Actualizar el estado del vehículo a "En Taller"
-                if user_id:
-                    vehicle_id = data['vehicle_id']
-                    status_updated = VehicleStatusService.update_vehicle_status_by_name(
-                        vehicle_id=vehicle_id,
-                        status_name='En Taller',
-                        user_id=user_id,
-                        reason=f'Orden de mantención #{order_id} creada',
-                        auto_generated=True
-                    )
-                    
-                    if status_updated:
-                        logger.info(f"✅ Estado del vehículo {vehicle_id} actualizado a 'En Taller'")
-                    else:
-                        logger.warning(f"⚠️ No se pudo actualizar el estado del vehículo {vehicle_id}")
-                else:
-                    logger.warning("⚠️ No se proporcionó user_id, no se actualizará el estado del vehículo")
-                
-                return result.data[0] if isinstance(result.data, list) else result.data
-            return None
+            if payload.get('error') == 'active_order':
+                logger.warning(f"⚠️ Vehículo {vehicle_id} ya posee una orden activa. No se creará una nueva.")
+                return None, {'vehicle_id': 'El vehículo seleccionado ya cuenta con una orden activa en el taller.'}
+            
+            order = payload.get('order')
+            if not order:
+                return None, None
+            
+            logger.info(f"✅ Orden de mantención creada: {order['id']}")
+            if payload.get('vehicle_status_changed'):
+                WorkshopBaseService._invalidate_row("vehicle", vehicle_id)
+                logger.info(f"✅ Estado del vehículo {vehicle_id} actualizado a 'En Taller'")
+            elif not user_id:
+                logger.warning("⚠️ No se proporcionó user_id, no se actualizará el estado del vehículo")
+            
+            return order, None
+        except PostgrestAPIError as e:
+            logger.error(f"❌ Error de API creando orden de mantención: {e.message}", exc_info=True)
+            return None, None
         except Exception as e:
             logger.error(f"❌ Error creando orden de mantención: {e}", exc_info=True)
-            return None
+            return None, None
     
     @staticmethod
     def get_active_orders_for_vehicles(vehicle_ids: List[int]) -> Dict[int, Dict[str, Any]]:
         """
         Retorna un mapa vehicle_id -> orden activa (si existe) para los vehículos proporcionados.
-        Una orden se considera activa si su estado no es Cancelado/Terminado/Completado/Finalizado
-        y si la fecha de salida aún es nula.
+        
+        Lee la tabla `vehicle_fleet_state` (una fila por vehículo, mantenida por
+        triggers; ver database/scripts.sql), por lo que es una búsqueda por
+        clave primaria sin importar cuántas órdenes históricas tenga cada
+        vehículo. Una orden se considera activa si su estado no es de
+        finalización y la fecha de salida aún es nula.
+        
+        Args:
+            vehicle_ids: IDs de los vehículos.
+            
+        Returns:
+            Diccionario vehicle_id -> {order_id, status_name, workshop_id}; los
+            vehículos sin orden activa no aparecen.
         """
         if not vehicle_ids:
             return {}
         
         client = WorkshopBaseService.get_client()
         
-        try:
-            query = client.table("maintenance_order") \
-                .select("""
-                    id,
-                    vehicle_id,
-                    exit_date,
-                    created_at,
-                    order_status:order_status_id(name)
-                """) \
-                .in_("vehicle_id", vehicle_ids) \
-                .order("created_at", desc=True)
-            
-            orders = WorkshopBaseService._execute_query(query, "get_active_orders_for_vehicles")
-            active_map: Dict[int, Dict[str, Any]] = {}
-            
-            for order in orders:
-                vehicle_id = order.get('vehicle_id')
-                if vehicle_id in active_map:
-                    continue
-                
-                status_name = (order.get('order_status') or {}).get('name', '') or ''
-                exit_date = order.get('exit_date')
-                
-                # Usar el método centralizado para verificar si está completada
-                is_completed = OrderService.is_completion_status(status_name) or exit_date is not None
-                
-                if not is_completed:
-                    active_map[vehicle_id] = {
-                        'order_id': order.get('id'),
-                        'status_name': status_name
-                    }
-            
-            return active_map
-        except Exception as e:
-            logger.error(f"❌ Error obteniendo órdenes activas para vehículos: {e}", exc_info=True)
-            return {}
+        query = client.table("vehicle_fleet_state") \
+            .select("vehicle_id, open_order_id, open_order_status_name, open_order_workshop_id") \
+            .in_("vehicle_id", vehicle_ids) \
+            .not_.is_("open_order_id", "null")
+        
+        states = WorkshopBaseService._execute_query(query, "get_active_orders_for_vehicles")
+        return {
+            state['vehicle_id']: {
+                'order_id': state.get('open_order_id'),
+                'status_name': state.get('open_order_status_name') or '',
+                'workshop_id': state.get('open_order_workshop_id'),
+            }
+            for state in states
+        }
     
     @staticmethod
     def has_active_order(vehicle_id: int) -> bool:
         """
-        Indica si el vehículo tiene alguna orden activa.
+        Indica si el vehículo tiene alguna orden activa (ver get_active_orders_for_vehicles).
         """
-        active_map = OrderService.get_active_orders_for_vehicles([vehicle_id])
-        return vehicle_id in active_map
+        client = WorkshopBaseService.get_client()
+        
+        state = WorkshopBaseService._execute_single(
+            client.table("vehicle_fleet_state").select("open_order_id").eq("vehicle_id", vehicle_id),
+            "has_active_order"
+        )
+        return bool(state and state.get('open_order_id'))
     
     @staticmethod
     def update_order(order_id: int, workshop_id: int, data: Dict[str, Any], user_id: str = None) -> bool:
@@ -333,22 +588,19 @@ class OrderService(WorkshopBaseService):
                 .eq("workshop_id", workshop_id) \
                 .execute()
             
+            WorkshopBaseService._invalidate_row("maintenance_order", order_id)
             logger.info(f"✅ Orden {order_id} actualizada")
             
             # Si cambió el estado de la orden y tenemos user_id, actualizar estado del vehículo
             if new_status_id and new_status_id != old_status_id and user_id and vehicle_id:
-                # Obtener el nombre del nuevo estado de orden
-                order_status = client.table("maintenance_order_status") \
-                    .select("name") \
-                    .eq("id", new_status_id) \
-                    .maybe_single() \
-                    .execute()
+                # Obtener el nuevo estado de orden desde el registro (sin consulta)
+                order_status = StatusRegistry.get_order_status_by_id(new_status_id)
                 
-                if order_status.data:
-                    status_name = order_status.data.get('name', '')
+                if order_status:
+                    status_name = order_status['name']
                     
                     # Si la orden se marca como terminada/completada, poner vehículo "Disponible"
-                    if OrderService.is_completion_status(status_name):
+                    if order_status['is_completion']:
                         VehicleStatusService.update_vehicle_status_by_name(
                             vehicle_id=vehicle_id,
                             status_name='Disponible',
@@ -367,32 +619,6 @@ class OrderService(WorkshopBaseService):
             logger.error(f"❌ Error actualizando orden {order_id}: {e}", exc_info=True)
             return False
     
-    @staticmethod
-    def get_order_tasks(order_id: int):
-        """
-        Obtiene todas las tareas de una orden de mantención.
-        
-        Args:
-            order_id: ID de la orden.
-            
-        Returns:
-            Lista de tareas con información de tipo de tarea.
-        """
-        client = WorkshopBaseService.get_client()
-        
-        query = client.table("maintenance_task") \
-            .select("""
-                id,
-                description,
-                cost,
-                created_at,
-                task_type:task_type_id(id, name, description)
-            """) \
-            .eq("maintenance_order_id", order_id) \
-            .order("created_at")
-        
-        return WorkshopBaseService._execute_query(query, "get_order_tasks")
-    
     @staticmethod
     def create_task(order_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -462,153 +688,97 @@ class OrderService(WorkshopBaseService):
             return False
     
     @staticmethod
-    def get_task_parts(task_id: int):
-        """
-        Obtiene todos los repuestos usados en una tarea.
-        
-        Args:
-            task_id: ID de la tarea.
-            
-        Returns:
-            Lista de repuestos usados.
-        """
-        client = WorkshopBaseService.get_client()
-        
-        query = client.table("maintenance_task_part") \
-            .select("""
-                id,
-                quantity_used,
-                cost_per_unit,
-                created_at,
-                workshop_inventory:workshop_inventory_id(
-                    id,
-                    spare_part:spare_part_id(id, name, sku, brand)
-                )
-            """) \
-            .eq("maintenance_task_id", task_id)
-        
-        return WorkshopBaseService._execute_query(query, "get_task_parts")
-    
-    @staticmethod
-    def add_part_to_task(task_id: int, workshop_inventory_id: int, quantity: int) -> Optional[Dict[str, Any]]:
+    def add_part_to_task(task_id: int, workshop_inventory_id: int, quantity: int, order_id: int,
+                         workshop_id: int, user_id: str = None) -> Optional[Dict[str, Any]]:
         """
         Agrega un repuesto a una tarea y descuenta del inventario.
         
+        Usa la función `add_part_to_task` de la base de datos, que descuenta el
+        stock con un UPDATE condicional (quantity >= cantidad), inserta el
+        repuesto usado y registra el movimiento en `inventory_movement`, todo en
+        una sola transacción. La función verifica que la tarea pertenezca a la
+        orden y la orden al taller.
+        
         Args:
             task_id: ID de la tarea.
             workshop_inventory_id: ID del inventario del taller.
             quantity: Cantidad a usar.
+            order_id: ID de la orden a la que debe pertenecer la tarea.
+            workshop_id: ID del taller al que debe pertenecer la orden.
+            user_id: ID del usuario que realiza la operación (para auditoría).
             
         Returns:
-            Datos del repuesto agregado o None si falla.
+            Datos del repuesto agregado (incluye 'new_quantity' con el stock resultante) o None si falla.
         """
         client = WorkshopBaseService.get_client()
         
+        params = {
+            'p_order_id': order_id,
+            'p_workshop_id': workshop_id,
+            'p_task_id': task_id,
+            'p_workshop_inventory_id': workshop_inventory_id,
+            'p_quantity': quantity,
+            'p_user_id': user_id,
+            'p_log_movement': OrderService._log_inventory_movements(),
+        }
+        
         try:
-            # 1. Obtener el costo actual del repuesto
-            inventory = client.table("workshop_inventory") \
-                .select("current_cost, quantity") \
-                .eq("id", workshop_inventory_id) \
-                .maybe_single() \
-                .execute()
-            
-            if not inventory.data:
-                logger.error(f"❌ Inventario {workshop_inventory_id} no encontrado")
-                return None
-            
-            current_cost = inventory.data.get('current_cost', 0)
-            # Convertir Decimal a float si es necesario (puede venir de la BD como Decimal)
-            current_cost = OrderService._convert_decimal_to_float(current_cost)
-            available_quantity = inventory.data.get('quantity', 0)
-            
-            # Verificar stock disponible
-            if available_quantity < quantity:
-                logger.error(f"❌ Stock insuficiente: disponible={available_quantity}, requerido={quantity}")
-                return None
-            
-            # 2. Crear el registro de uso de repuesto
-            part_data = {
-                'maintenance_task_id': task_id,
-                'workshop_inventory_id': workshop_inventory_id,
-                'quantity_used': quantity,
-                'cost_per_unit': current_cost
-            }
-            
-            result = client.table("maintenance_task_part").insert(part_data).execute()
-            
+            result = client.rpc("add_part_to_task", params).execute()
             if not result.data:
                 return None
             
-            # 3. Descontar del inventario
-            new_quantity = available_quantity - quantity
-            client.table("workshop_inventory") \
-                .update({'quantity': new_quantity}) \
-                .eq("id", workshop_inventory_id) \
-                .execute()
-            
-            logger.info(f"✅ Repuesto agregado a tarea {task_id} y stock actualizado")
-            return result.data[0] if isinstance(result.data, list) else result.data
+            part = dict(result.data.get('part') or {})
+            part['new_quantity'] = result.data.get('new_quantity')
+            logger.info(f"✅ Repuesto agregado a tarea {task_id} y stock actualizado (stock: {part['new_quantity']})")
+            return part
             
+        except PostgrestAPIError as e:
+            logger.error(f"❌ Error de API agregando repuesto a tarea {task_id}: {e.message}", exc_info=True)
+            return None
         except Exception as e:
             logger.error(f"❌ Error agregando repuesto a tarea: {e}", exc_info=True)
             return None
     
     @staticmethod
-    def delete_part_from_task(part_id: int) -> bool:
+    def delete_part_from_task(part_id: int, order_id: int, workshop_id: int, user_id: str = None) -> bool:
         """
         Elimina un repuesto de una tarea y devuelve el stock al inventario.
         
+        Usa la función `remove_part_from_task` de la base de datos (una sola
+        transacción: elimina el registro, devuelve el stock y registra el
+        movimiento). Solo elimina el repuesto si pertenece a una tarea de la
+        orden indicada y la orden al taller.
+        
         Args:
             part_id: ID del registro maintenance_task_part.
+            order_id: ID de la orden a la que debe pertenecer el repuesto.
+            workshop_id: ID del taller al que debe pertenecer la orden.
+            user_id: ID del usuario que realiza la operación (para auditoría).
             
         Returns:
             True si se eliminó correctamente, False en caso contrario.
         """
         client = WorkshopBaseService.get_client()
         
+        params = {
+            'p_order_id': order_id,
+            'p_workshop_id': workshop_id,
+            'p_part_id': part_id,
+            'p_user_id': user_id,
+            'p_log_movement': OrderService._log_inventory_movements(),
+        }
+        
         try:
-            # 1. Obtener la información del repuesto usado
-            part = client.table("maintenance_task_part") \
-                .select("workshop_inventory_id, quantity_used") \
-                .eq("id", part_id) \
-                .maybe_single() \
-                .execute()
-            
-            if not part.data:
-                logger.error(f"❌ Repuesto usado {part_id} no encontrado")
-                return False
-            
-            workshop_inventory_id = part.data['workshop_inventory_id']
-            quantity_used = part.data['quantity_used']
-            
-            # 2. Obtener el stock actual
-            inventory = client.table("workshop_inventory") \
-                .select("quantity") \
-                .eq("id", workshop_inventory_id) \
-                .maybe_single() \
-                .execute()
-            
-            if not inventory.data:
+            result = client.rpc("remove_part_from_task", params).execute()
+            if not result.data:
                 return False
             
-            current_quantity = inventory.data.get('quantity', 0)
-            
-            # 3. Eliminar el registro
-            client.table("maintenance_task_part") \
-                .delete() \
-                .eq("id", part_id) \
-                .execute()
-            
-            # 4. Devolver el stock
-            new_quantity = current_quantity + quantity_used
-            client.table("workshop_inventory") \
-                .update({'quantity': new_quantity}) \
-                .eq("id", workshop_inventory_id) \
-                .execute()
-            
-            logger.info(f"🗑️ Repuesto eliminado de tarea y stock devuelto")
+            logger.info(f"🗑️ Repuesto eliminado de tarea y stock devuelto (stock: {result.data.get('new_quantity')})")
             return True
             
+        except PostgrestAPIError as e:
+            logger.error(f"❌ Error de API eliminando repuesto {part_id}: {e.message}", exc_info=True)
+            return False
         except Exception as e:
             logger.error(f"❌ Error eliminando repuesto de tarea: {e}", exc_info=True)
             return False
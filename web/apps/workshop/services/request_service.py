@@ -60,29 +60,13 @@ class RequestService(WorkshopBaseService):
         Returns:
             Número de solicitudes pendientes.
         """
-        client = RequestService.get_client()
-        
-        # Primero obtener los usuarios del taller
-        users_query = client.table('user_profile').select('id').eq('workshop_id', workshop_id)
-        users_result = RequestService._execute_query(users_query, 'get_workshop_users_for_count')
-        user_ids = [user['id'] for user in users_result]
-        
-        if not user_ids:
-            return 0
-        
-        query = (
-            client.table('data_request')
-            .select('id', count='exact')
-            .in_('requesting_user_id', user_ids)
-            .eq('status', 'pendiente')
-        )
-        
-        try:
-            response = query.execute()
-            return response.count if response.count is not None else 0
-        except Exception as e:
-            logger.error(f"❌ Error al contar solicitudes pendientes: {e}", exc_info=True)
-            return 0
+        # Un solo conteo HEAD filtrando por el taller del solicitante (recurso embebido)
+        return RequestService._count(
+            'data_request',
+            {'status': 'pendiente', 'requesting_user.workshop_id': workshop_id},
+            select='id, requesting_user:user_profile!data_request_requesting_user_id_fkey!inner(workshop_id)',
+            method_name='get_pending_requests_count'
+        ) or 0
     
     @staticmethod
     def get_request(request_id: int, workshop_id: int) -> Optional[Dict[str, Any]]:
@@ -1,6 +1,8 @@
 import logging
 from typing import Dict, List, Any, Optional, Tuple
 from .base_service import WorkshopBaseService
+from shared.services.reference_data_service import ReferenceDataService
+from shared.services.status_registry import StatusRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -156,48 +158,28 @@ class VehicleService(WorkshopBaseService):
             
         Returns:
             Diccionario con errores por campo si hay duplicados, vacío si no hay.
+            Si un conteo falla retorna un error 'general'.
         """
-        client = WorkshopBaseService.get_client()
         errors = {}
-        
-        # Verificar patente duplicada
-        if 'license_plate' in data and data['license_plate']:
-            query = client.table("vehicle") \
-                .select("id", count="exact") \
-                .eq("license_plate", data['license_plate'].upper())
-            
-            if exclude_id:
-                query = query.neq("id", exclude_id)
-            
-            result = query.execute()
-            if result.count and result.count > 0:
-                errors['license_plate'] = 'Esta patente ya está registrada en el sistema.'
-        
-        # Verificar VIN duplicado (si se proporciona)
-        if 'vin' in data and data['vin']:
-            query = client.table("vehicle") \
-                .select("id", count="exact") \
-                .eq("vin", data['vin'])
-            
-            if exclude_id:
-                query = query.neq("id", exclude_id)
-            
-            result = query.execute()
-            if result.count and result.count > 0:
-                errors['vin'] = 'Este número de chasis (VIN) ya está registrado en otro vehículo.'
-        
-        # Verificar número de motor duplicado (si se proporciona)
-        if 'engine_number' in data and data['engine_number']:
-            query = client.table("vehicle") \
-                .select("id", count="exact") \
-                .eq("engine_number", data['engine_number'])
-            
-            if exclude_id:
-                query = query.neq("id", exclude_id)
-            
-            result = query.execute()
-            if result.count and result.count > 0:
-                errors['engine_number'] = 'Este número de motor ya está registrado en otro vehículo.'
+        exclude = {'id': ('neq', exclude_id)} if exclude_id else {}
+        
+        # Conteos HEAD por campo único: no se descarga ninguna fila
+        checks = (
+            ('license_plate', lambda value: value.upper(), 'Esta patente ya está registrada en el sistema.'),
+            ('vin', lambda value: value, 'Este número de chasis (VIN) ya está registrado en otro vehículo.'),
+            ('engine_number', lambda value: value, 'Este número de motor ya está registrado en otro vehículo.'),
+        )
+        for field, normalize, message in checks:
+            if not data.get(field):
+                continue
+            count = WorkshopBaseService._count(
+                "vehicle", {field: normalize(data[field]), **exclude}, method_name='check_duplicates'
+            )
+            if count is None:
+                # Sin poder verificar no se permite guardar
+                return {'general': 'Error al verificar si el vehículo ya está registrado. Intenta nuevamente.'}
+            if count > 0:
+                errors[field] = message
         
         return errors
     
@@ -231,14 +213,10 @@ class VehicleService(WorkshopBaseService):
         
         try:
             # Obtener el estado por defecto "Disponible"
-            status = client.table("vehicle_status") \
-                .select("id") \
-                .eq("name", "Disponible") \
-                .maybe_single() \
-                .execute()
+            status_id = StatusRegistry.get_vehicle_status_id("Disponible")
             
-            if status.data:
-                data['vehicle_status_id'] = status.data['id']
+            if status_id:
+                data['vehicle_status_id'] = status_id
             
             result = client.table("vehicle").insert(data).execute()
             
@@ -281,48 +259,23 @@ class VehicleService(WorkshopBaseService):
         """
         Obtiene todos los datos de catálogo necesarios para crear un vehículo.
         
+        Los catálogos se sirven desde ReferenceDataService (caché en memoria).
+        
         Returns:
             Diccionario con listas de tipos de vehículo, combustible, transmisión, etc.
         """
-        client = WorkshopBaseService.get_client()
-        
-        catalog_data = {}
-        
-        try:
-            # Tipos de vehículo
-            catalog_data['vehicle_types'] = client.table("vehicle_type") \
-                .select("id, name") \
-                .order("name") \
-                .execute().data or []
-            
-            # Tipos de combustible
-            catalog_data['fuel_types'] = client.table("fuel_type") \
-                .select("id, name") \
-                .order("name") \
-                .execute().data or []
-            
-            # Tipos de transmisión
-            catalog_data['transmission_types'] = client.table("transmission_type") \
-                .select("id, name") \
-                .order("name") \
-                .execute().data or []
-            
-            # Tipos de aceite
-            catalog_data['oil_types'] = client.table("oil_type") \
-                .select("id, name") \
-                .order("name") \
-                .execute().data or []
-            
-            # Tipos de refrigerante
-            catalog_data['coolant_types'] = client.table("coolant_type") \
-                .select("id, name") \
-                .order("name") \
-                .execute().data or []
-            
-        except Exception as e:
-            logger.error(f"❌ Error obteniendo datos de catálogo: {e}", exc_info=True)
+        catalog_tables = {
+            'vehicle_types': 'vehicle_type',
+            'fuel_types': 'fuel_type',
+            'transmission_types': 'transmission_type',
+            'oil_types': 'oil_type',
+            'coolant_types': 'coolant_type',
+        }
         
-        return catalog_data
+        return {
+            key: ReferenceDataService.get_table(table, ("id", "name"))
+            for key, table in catalog_tables.items()
+        }
     
     @staticmethod
     def get_maintenance_types():
@@ -332,13 +285,7 @@ class VehicleService(WorkshopBaseService):
         Returns:
             Lista de tipos de mantención.
         """
-        client = WorkshopBaseService.get_client()
-        
-        query = client.table("maintenance_type") \
-            .select("id, name, description") \
-            .order("name")
-        
-        return WorkshopBaseService._execute_query(query, "get_maintenance_types")
+        return ReferenceDataService.get_table("maintenance_type", ("id", "name", "description"))
     
     @staticmethod
     def get_order_statuses():
@@ -348,13 +295,7 @@ class VehicleService(WorkshopBaseService):
         Returns:
             Lista de estados de orden.
         """
-        client = WorkshopBaseService.get_client()
-        
-        query = client.table("maintenance_order_status") \
-            .select("id, name, description") \
-            .order("name")
-        
-        return WorkshopBaseService._execute_query(query, "get_order_statuses")
+        return ReferenceDataService.get_table("maintenance_order_status", ("id", "name", "description"))
     
     @staticmethod
     def get_task_types():
@@ -364,13 +305,7 @@ class VehicleService(WorkshopBaseService):
         Returns:
             Lista de tipos de tarea.
         """
-        client = WorkshopBaseService.get_client()
-        
-        query = client.table("task_type") \
-            .select("id, name, description") \
-            .order("name")
-        
-        return WorkshopBaseService._execute_query(query, "get_task_types")
+        return ReferenceDataService.get_table("task_type", ("id", "name", "description"))
 
 
 
@@ -318,9 +318,6 @@
             if (addForm) {
                 addForm.reset();
                 clearFormErrorsForAdd(addForm);
-                // Restablecer el select a su estado inicial
-                sparePartSelect.innerHTML = '<option value="">Selecciona un repuesto</option>' + 
-                    Array.from(sparePartSelect.options).slice(1).map(opt => opt.outerHTML).join('');
             }
         });
         
@@ -417,142 +414,117 @@
             });
         }
         
-        // Búsqueda mejorada en el select (filtrado de opciones)
-        const originalOptions = Array.from(sparePartSelect.options);
-        let searchInput = null;
-        let searchLoader = null;
+        // Autocompletado de repuestos: la búsqueda se resuelve en el servidor
+        const searchUrl = sparePartSelect.getAttribute('data-search-url');
+        if (!searchUrl) return;
+        
+        const searchContainer = document.createElement('div');
+        searchContainer.className = 'mb-2 position-relative';
+        searchContainer.innerHTML = `
+            <input type="text" 
+                   id="sparePartSearch" 
+                   class="form-control" 
+                   autocomplete="off"
+                   placeholder="Buscar por SKU, nombre o marca...">
+            <div id="sparePartSearchLoader" class="spare-part-search-loader" style="display: none;">
+                <span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span>
+            </div>
+        `;
+        sparePartSelect.parentNode.insertBefore(searchContainer, sparePartSelect);
+        const searchInput = document.getElementById('sparePartSearch');
+        const searchLoader = document.getElementById('sparePartSearchLoader');
         let searchTimeout = null;
+        let searchController = null;
         
-        // Crear campo de búsqueda si hay muchas opciones
-        if (originalOptions.length > 10) {
-            const searchContainer = document.createElement('div');
-            searchContainer.className = 'mb-2 position-relative';
-            searchContainer.innerHTML = `
-                <input type="text" 
-                       id="sparePartSearch" 
-                       class="form-control" 
-                       placeholder="Buscar repuesto...">
-                <div id="sparePartSearchLoader" class="spare-part-search-loader" style="display: none;">
-                    <span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span>
-                </div>
-            `;
-            sparePartSelect.parentNode.insertBefore(searchContainer, sparePartSelect);
-            searchInput = document.getElementById('sparePartSearch');
-            searchLoader = document.getElementById('sparePartSearchLoader');
+        function escapeHtml(value) {
+            const div = document.createElement('div');
+            div.textContent = value == null ? '' : String(value);
+            return div.innerHTML;
+        }
+        
+        function renderOptions(parts, searchTerm) {
+            let placeholder = 'Escribe para buscar un repuesto';
+            if (searchTerm && parts.length === 0) {
+                placeholder = 'Sin resultados para la búsqueda';
+            } else if (parts.length > 0) {
+                placeholder = 'Selecciona un repuesto';
+            }
             
-            searchInput.addEventListener('input', function() {
-                const searchTerm = this.value.toLowerCase().trim();
-                
-                // Mostrar loader
-                if (searchLoader) {
-                    searchLoader.style.display = 'block';
-                }
-                
-                // Limpiar timeout anterior si existe
-                if (searchTimeout) {
-                    clearTimeout(searchTimeout);
-                }
-                
-                // Ejecutar búsqueda con un pequeño delay para mejor rendimiento
-                searchTimeout = setTimeout(function() {
-                    const options = Array.from(sparePartSelect.options);
-                    let visibleOptions = [];
-                    
-                    // Filtrar opciones
-                    options.forEach(function(option) {
-                        if (option.value === '') {
-                            // Mantener la opción vacía siempre visible
-                            option.style.display = '';
-                            return;
-                        }
-                        
-                        const text = option.textContent.toLowerCase();
-                        const isVisible = text.includes(searchTerm);
-                        option.style.display = isVisible ? '' : 'none';
-                        
-                        if (isVisible) {
-                            visibleOptions.push(option);
-                        }
-                    });
-                    
-                    // Si hay al menos una opción visible (excluyendo la vacía), seleccionar la primera automáticamente
-                    if (visibleOptions.length > 0 && searchTerm.length > 0) {
-                        const selectedOption = visibleOptions[0];
-                        const selectedValue = selectedOption.value;
-                        
-                        // Buscar el índice de la opción
-                        let optionIndex = -1;
-                        for (let i = 0; i < sparePartSelect.options.length; i++) {
-                            if (sparePartSelect.options[i] === selectedOption) {
-                                optionIndex = i;
-                                break;
-                            }
-                        }
-                        
-                        if (optionIndex >= 0 && selectedValue) {
-                            // Establecer el valor usando múltiples métodos para asegurar que funcione
-                            sparePartSelect.selectedIndex = optionIndex;
-                            sparePartSelect.value = selectedValue;
-                            
-                            // Verificar y forzar si es necesario
-                            setTimeout(function() {
-                                if (sparePartSelect.value !== selectedValue) {
-                                    sparePartSelect.selectedIndex = optionIndex;
-                                    sparePartSelect.value = selectedValue;
-                                }
-                                
-                                // Disparar evento change
-                                sparePartSelect.dispatchEvent(new Event('change', { bubbles: true }));
-                            }, 0);
-                        }
-                    } else if (visibleOptions.length === 0 && searchTerm.length > 0) {
-                        // Si no hay opciones visibles, resetear a la opción vacía
-                        sparePartSelect.selectedIndex = 0;
-                        sparePartSelect.value = '';
-                    } else if (searchTerm.length === 0) {
-                        // Si se limpia la búsqueda, resetear a la opción vacía
-                        sparePartSelect.selectedIndex = 0;
-                        sparePartSelect.value = '';
-                    }
-                    
-                    // Ocultar loader
-                    if (searchLoader) {
-                        searchLoader.style.display = 'none';
-                    }
-                }, 150);
-            });
+            sparePartSelect.innerHTML = `<option value="">${placeholder}</option>` + parts.map(part => `
+                <option value="${escapeHtml(part.id)}" data-sku="${escapeHtml(part.sku)}" data-name="${escapeHtml(part.name)}" data-brand="${escapeHtml(part.brand || '')}">
+                    ${escapeHtml(part.sku)} - ${escapeHtml(part.name)}${part.brand ? ' (' + escapeHtml(part.brand) + ')' : ''}
+                </option>
+            `).join('');
             
-            // Manejar tecla Escape para limpiar búsqueda
-            searchInput.addEventListener('keydown', function(e) {
-                if (e.key === 'Escape') {
-                    e.preventDefault();
-                    this.value = '';
-                    
-                    // Limpiar timeout si existe
-                    if (searchTimeout) {
-                        clearTimeout(searchTimeout);
-                    }
-                    
-                    // Ocultar loader
-                    if (searchLoader) {
-                        searchLoader.style.display = 'none';
-                    }
-                    
-                    // Mostrar todas las opciones
-                    const options = sparePartSelect.querySelectorAll('option');
-                    options.forEach(function(option) {
-                        option.style.display = '';
-                    });
-                    
-                    // Resetear el select
-                    sparePartSelect.value = '';
-                    sparePartSelect.selectedIndex = 0;
-                    
-                    // Disparar evento input para que se ejecute la lógica de limpieza
-                    this.dispatchEvent(new Event('input', { bubbles: true }));
+            // Seleccionar automáticamente el resultado más relevante
+            if (parts.length > 0 && searchTerm) {
+                sparePartSelect.selectedIndex = 1;
+                sparePartSelect.dispatchEvent(new Event('change', { bubbles: true }));
+            }
+        }
+        
+        function searchSpareParts(searchTerm) {
+            if (searchController) {
+                searchController.abort();
+            }
+            searchController = new AbortController();
+            
+            if (searchLoader) {
+                searchLoader.style.display = 'block';
+            }
+            
+            fetch(`${searchUrl}?q=${encodeURIComponent(searchTerm)}`, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                signal: searchController.signal
+            })
+            .then(response => response.json())
+            .then(data => {
+                renderOptions((data && data.spare_parts) || [], searchTerm);
+            })
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    console.error('Error buscando repuestos:', error);
+                }
+            })
+            .finally(() => {
+                if (searchLoader) {
+                    searchLoader.style.display = 'none';
                 }
             });
         }
+        
+        searchInput.addEventListener('input', function() {
+            const searchTerm = this.value.trim();
+            
+            if (searchTimeout) {
+                clearTimeout(searchTimeout);
+            }
+            
+            if (searchTerm.length < 2) {
+                renderOptions([], '');
+                return;
+            }
+            
+            // Esperar a que el usuario deje de escribir antes de consultar
+            searchTimeout = setTimeout(function() {
+                searchSpareParts(searchTerm);
+            }, 250);
+        });
+        
+        // Manejar tecla Escape para limpiar búsqueda
+        searchInput.addEventListener('keydown', function(e) {
+            if (e.key === 'Escape') {
+                e.preventDefault();
+                this.value = '';
+                this.dispatchEvent(new Event('input', { bubbles: true }));
+            }
+        });
+        
+        // Limpiar la búsqueda cuando se cierra el modal
+        addModal.addEventListener('hidden.bs.modal', function() {
+            searchInput.value = '';
+            renderOptions([], '');
+        });
     }
 
     /**
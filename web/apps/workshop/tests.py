@@ -1,3 +1,115 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .services.base_service import WorkshopBaseService
+from .services.order_service import OrderService
+
+
+class FakeQuery:
+    """Consulta de PostgREST falsa: registra los métodos llamados y se devuelve a sí misma."""
+
+    def __init__(self, data=None, count=None):
+        self.calls = []
+        self.data = data or []
+        self.count = count
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return method
+
+    def execute(self):
+        return SimpleNamespace(data=self.data, count=self.count)
+
+    def called(self, name):
+        return [(args, kwargs) for method, args, kwargs in self.calls if method == name]
+
+
+def order_row(order_id, entry_date):
+    return {'id': order_id, 'entry_date': entry_date}
+
+
+class OrderCursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        for order in (order_row(42, '2024-05-10'), order_row(1, '2023-12-31')):
+            cursor = OrderService._encode_cursor(order)
+            self.assertEqual(OrderService._decode_cursor(cursor), (order['entry_date'], order['id']))
+
+    def test_invalid_cursors(self):
+        for cursor in (None, 123, '', 'basura', '2024-05-10', '2024-13-40_1', '2024-05-10_x', 'fecha_1'):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(OrderService._decode_cursor(cursor))
+
+
+class OrdersPageTests(SimpleTestCase):
+
+    def _page(self, rows, count=None, **kwargs):
+        query = FakeQuery(rows, count)
+        client = mock.Mock()
+        client.table.return_value = query
+        with mock.patch.object(WorkshopBaseService, 'get_client', return_value=client), \
+                mock.patch.object(OrderService, 'count_orders', return_value=99) as count_orders:
+            page = OrderService.get_orders_page(1, page_size=2, **kwargs)
+        return page, query, count_orders
+
+    def test_first_page_with_more_rows(self):
+        rows = [order_row(9, '2024-05-12'), order_row(8, '2024-05-11'), order_row(7, '2024-05-11')]
+        page, query, count_orders = self._page(rows, count=5)
+
+        self.assertEqual([o['id'] for o in page['orders']], [9, 8])
+        self.assertIsNone(page['prev_cursor'])
+        self.assertEqual(page['next_cursor'], '2024-05-11_8')
+        self.assertEqual(page['total_count'], 5)
+        count_orders.assert_not_called()
+        self.assertEqual(query.called('or_'), [])
+        self.assertEqual(query.called('limit'), [((3,), {})])
+
+    def test_after_cursor_last_page(self):
+        rows = [order_row(7, '2024-05-11'), order_row(3, '2024-05-01')]
+        page, query, _ = self._page(rows, after='2024-05-11_8', with_count=False)
+
+        self.assertEqual([o['id'] for o in page['orders']], [7, 3])
+        self.assertEqual(page['prev_cursor'], '2024-05-11_7')
+        self.assertIsNone(page['next_cursor'])
+        self.assertIsNone(page['total_count'])
+        self.assertEqual(
+            query.called('or_'),
+            [(('entry_date.lt.2024-05-11,and(entry_date.eq.2024-05-11,id.lt.8)',), {})]
+        )
+        self.assertEqual(query.called('order'), [(('entry_date',), {'desc': True}), (('id',), {'desc': True})])
+
+    def test_before_cursor_reverses_rows(self):
+        # Hacia atrás la consulta viene en orden ascendente
+        rows = [order_row(8, '2024-05-11'), order_row(9, '2024-05-12'), order_row(10, '2024-05-12')]
+        page, query, count_orders = self._page(rows, before='2024-05-11_7')
+
+        self.assertEqual([o['id'] for o in page['orders']], [9, 8])
+        self.assertEqual(page['prev_cursor'], '2024-05-12_9')
+        self.assertEqual(page['next_cursor'], '2024-05-11_8')
+        self.assertEqual(page['total_count'], 99)
+        count_orders.assert_called_once()
+        self.assertEqual(
+            query.called('or_'),
+            [(('entry_date.gt.2024-05-11,and(entry_date.eq.2024-05-11,id.gt.7)',), {})]
+        )
+        self.assertEqual(query.called('order'), [(('entry_date',), {'desc': False}), (('id',), {'desc': False})])
+
+    def test_before_cursor_first_page_has_no_prev(self):
+        rows = [order_row(8, '2024-05-11'), order_row(9, '2024-05-12')]
+        page, _, _ = self._page(rows, before='2024-05-11_7', with_count=False)
+
+        self.assertEqual([o['id'] for o in page['orders']], [9, 8])
+        self.assertIsNone(page['prev_cursor'])
+        self.assertEqual(page['next_cursor'], '2024-05-11_8')
+
+    def test_invalid_cursor_reads_first_page(self):
+        page, query, _ = self._page([order_row(9, '2024-05-12')], count=1, after='basura')
+
+        self.assertEqual(query.called('or_'), [])
+        self.assertIsNone(page['prev_cursor'])
+        self.assertIsNone(page['next_cursor'])
+        self.assertEqual(page['total_count'], 1)
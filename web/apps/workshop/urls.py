@@ -16,6 +16,7 @@ urlpatterns = [
     # Gestión de Órdenes de Mantención
     path('orders/', views.orders_list, name='orders_list'),
     path('orders/create/', views.order_create, name='order_create'),
+    path('orders/export/', views.orders_export, name='orders_export'),
     path('orders/<int:order_id>/', views.order_detail, name='order_detail'),
     path('orders/<int:order_id>/update/', views.order_update, name='order_update'),
     
@@ -30,6 +31,8 @@ urlpatterns = [
     # Gestión de Inventario
     path('inventory/', views.inventory_list, name='inventory_list'),
     path('inventory/add/', views.inventory_add, name='inventory_add'),
+    path('inventory/export/', views.inventory_export, name='inventory_export'),
+    path('api/spare-parts/search/', views.spare_part_search_api, name='spare_part_search_api'),
     path('api/inventory/<int:inventory_id>/', views.inventory_detail_api, name='inventory_detail_api'),
     path('inventory/<int:inventory_id>/update/', views.inventory_update, name='inventory_update'),
     path('inventory/<int:inventory_id>/delete/', views.inventory_delete, name='inventory_delete'),
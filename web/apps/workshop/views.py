@@ -1,9 +1,11 @@
 import logging
 import json
 from datetime import datetime
+from functools import partial
+from urllib.parse import urlencode
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.views.decorators.http import require_http_methods, require_GET, require_POST
 
 from .decorators import require_workshop_user, require_admin_taller
@@ -15,6 +17,8 @@ from .services.employee_service import EmployeeService
 from .services.vehicle_service import VehicleService
 from .services.request_service import RequestService
 from apps.sigve.services.workshop_service import WorkshopService
+from shared.services.concurrency import run_parallel, gather_parallel, warn_if_degraded
+from shared.services.export import csv_response, full_name
 from .forms import (
     VehicleSearchForm, VehicleCreateForm, MaintenanceOrderForm,
     MaintenanceTaskForm, TaskPartForm, InventoryAddForm,
@@ -28,14 +32,24 @@ logger = logging.getLogger(__name__)
 # ===== DASHBOARD DEL TALLER =====
 
 @require_workshop_user
-def dashboard(request):
+async def dashboard(request):
     """Vista principal del panel del taller."""
     workshop_id = request.workshop_id
     
     logger.debug("================================================")
     logger.debug(f"Dashboard Workshop, workshop_id: '{workshop_id}'")
 
-    workshop_details = WorkshopService.get_workshop(workshop_id)
+    # Taller, estadísticas (incluye pending_requests_count), órdenes activas y
+    # estados de orden son independientes: se consultan en paralelo
+    results = await gather_parallel({
+        'workshop': partial(WorkshopService.get_workshop, workshop_id),
+        'stats': partial(DashboardService.get_statistics, workshop_id),
+        'active_orders': partial(DashboardService.get_active_orders, workshop_id, limit=10),
+        'order_statuses': VehicleService.get_order_statuses,
+    }, defaults={'stats': {}, 'active_orders': [], 'order_statuses': []})
+    warn_if_degraded(request, results)
+
+    workshop_details = results['workshop']
     workshop_name = workshop_details.get('name') if workshop_details else "Nombre Taller No Disponible"
 
     # Se obtiene los detalles del taller usando el servicio
@@ -44,19 +58,11 @@ def dashboard(request):
         'active_page': 'dashboard',
         'workshop_name': workshop_name
     }
-    
-    # Obtener estadísticas
-    stats = DashboardService.get_statistics(workshop_id)
-    context.update(stats)
-    
-    # Obtener órdenes activas (en taller)
-    context['active_orders'] = DashboardService.get_active_orders(workshop_id, limit=10)
-    
-    # Obtener solicitudes pendientes
-    context['pending_requests_count'] = RequestService.get_pending_requests_count(workshop_id)
+    context.update(results['stats'])
+    context['active_orders'] = results['active_orders']
     
     # Obtener IDs de estados de orden para los links del dashboard
-    order_statuses = VehicleService.get_order_statuses()
+    order_statuses = results['order_statuses']
     status_id_map = {status['name']: status['id'] for status in order_statuses}
     context['status_id_en_taller'] = status_id_map.get('En Taller')
     context['status_id_pendiente'] = status_id_map.get('Pendiente')
@@ -69,26 +75,33 @@ def dashboard(request):
 
 @require_workshop_user
 @require_GET
-def order_create_context_api(request):
+async def order_create_context_api(request):
     """Devuelve datos de contexto para inicializar el modal de órdenes."""
-    from .services.order_service import OrderService
-    
     workshop_id = request.workshop_id
     
-    maintenance_types = VehicleService.get_maintenance_types()
-    all_order_statuses = VehicleService.get_order_statuses()
+    results = await gather_parallel({
+        'maintenance_types': VehicleService.get_maintenance_types,
+        'order_statuses': VehicleService.get_order_statuses,
+        'fire_stations': VehicleService.get_all_fire_stations,
+        'vehicle_catalog_data': VehicleService.get_catalog_data,
+        'mechanics': partial(EmployeeService.get_mechanics, workshop_id),
+    }, defaults={
+        'maintenance_types': [], 'order_statuses': [], 'fire_stations': [],
+        'vehicle_catalog_data': {}, 'mechanics': [],
+    })
+    maintenance_types = results['maintenance_types']
     
     # Filtrar estados de finalización (Cancelada, Terminada, etc.) para creación
     # Solo se permiten estados activos al crear una orden
     order_statuses = [
-        status for status in all_order_statuses
+        status for status in results['order_statuses']
         if not OrderService.is_completion_status(status.get('name', ''))
     ]
     
-    fire_stations = VehicleService.get_all_fire_stations()
-    vehicle_catalog_data = VehicleService.get_catalog_data()
+    fire_stations = results['fire_stations']
+    vehicle_catalog_data = results['vehicle_catalog_data']
     
-    mechanics = EmployeeService.get_mechanics(workshop_id)
+    mechanics = results['mechanics']
     mechanics_with_full_name = [
         {
             **mechanic,
@@ -232,14 +245,6 @@ def order_create_api(request):
     
     cleaned = form.cleaned_data
     
-    if OrderService.has_active_order(cleaned['vehicle_id']):
-        return JsonResponse({
-            'success': False,
-            'errors': {
-                'vehicle_id': ['El vehículo seleccionado ya cuenta con una orden activa en el taller.']
-            }
-        }, status=400)
-    
     order_data = {
         'vehicle_id': cleaned['vehicle_id'],
         'mileage': cleaned['mileage'],
@@ -250,7 +255,14 @@ def order_create_api(request):
         'observations': cleaned.get('observations', '')
     }
     
-    order = OrderService.create_order(workshop_id, order_data, user_id)
+    # La verificación de orden activa se hace dentro de la misma transacción
+    order, errors = OrderService.create_order(workshop_id, order_data, user_id)
+    
+    if errors:
+        return JsonResponse({
+            'success': False,
+            'errors': {field: [message] for field, message in errors.items()}
+        }, status=400)
     
     if not order:
         return JsonResponse({
@@ -264,32 +276,102 @@ def order_create_api(request):
     })
 
 
+def _get_order_filters(request):
+    """
+    Filtros del listado de órdenes presentes en la query string.
+    
+    Raises:
+        ValueError: Si status_id o fire_station_id no son enteros.
+    """
+    filters = {}
+    for key in ('status_id', 'fire_station_id'):
+        value = request.GET.get(key, '').strip()
+        if value:
+            try:
+                filters[key] = int(value)
+            except ValueError:
+                raise ValueError(f"Filtro '{key}' inválido: {value}")
+    if request.GET.get('license_plate'):
+        filters['license_plate'] = request.GET.get('license_plate')
+    return filters
+
+
 @require_workshop_user
 def orders_list(request):
     """Lista de órdenes de mantención del taller con filtros."""
     workshop_id = request.workshop_id
+    try:
+        filters = _get_order_filters(request)
+    except ValueError as e:
+        messages.error(request, f'❌ {e}')
+        return redirect('workshop:orders_list')
     
-    # Obtener filtros
-    filters = {}
-    if request.GET.get('status_id'):
-        filters['status_id'] = request.GET.get('status_id')
-    if request.GET.get('license_plate'):
-        filters['license_plate'] = request.GET.get('license_plate')
-    if request.GET.get('fire_station_id'):
-        filters['fire_station_id'] = request.GET.get('fire_station_id')
+    # Paginación por cursor: ?after=<cursor> (siguiente) o ?before=<cursor> (anterior)
+    page = OrderService.get_orders_page(
+        workshop_id,
+        filters,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        page_size=request.GET.get('page_size'),
+        with_count=request.GET.get('count') != '0'
+    )
+    
+    # Los enlaces anterior/siguiente conservan filtros, tamaño de página y count=0
+    page_params = dict(filters)
+    if request.GET.get('page_size'):
+        page_params['page_size'] = page['page_size']
+    if request.GET.get('count') == '0':
+        page_params['count'] = '0'
     
     context = {
         'page_title': 'Órdenes de Mantención',
         'active_page': 'orders',
-        'orders': OrderService.get_all_orders(workshop_id, filters),
+        'orders': page['orders'],
+        'page': page,
         'order_statuses': VehicleService.get_order_statuses(),
         'fire_stations': VehicleService.get_all_fire_stations(),
-        'filters': filters
+        'filters': filters,
+        'filters_query': urlencode(filters),
+        'page_query': urlencode(page_params)
     }
     
     return render(request, 'workshop/orders_list.html', context)
 
 
+@require_GET
+@require_workshop_user
+def orders_export(request):
+    """Exporta las órdenes del taller (con los filtros del listado) a CSV en streaming."""
+    workshop_id = request.workshop_id
+    
+    # Los filtros se validan antes de crear la respuesta: un error dentro del
+    # streaming ya no podría devolverse como 400
+    try:
+        filters = _get_order_filters(request)
+    except ValueError as e:
+        logger.warning(f"⚠️ (orders_export) {e}")
+        return HttpResponseBadRequest(str(e))
+    orders = OrderService.iter_orders_for_export(workshop_id, filters)
+    
+    columns = [
+        ('N° Orden', 'id'),
+        ('Fecha ingreso', 'entry_date'),
+        ('Fecha salida', 'exit_date'),
+        ('Patente', 'vehicle.license_plate'),
+        ('Marca', 'vehicle.brand'),
+        ('Modelo', 'vehicle.model'),
+        ('Año', 'vehicle.year'),
+        ('Cuartel', 'vehicle.fire_station.name'),
+        ('Estado', 'order_status.name'),
+        ('Tipo de mantención', 'maintenance_type.name'),
+        ('Mecánico', lambda order: full_name(order.get('assigned_mechanic'))),
+        ('Kilometraje', 'mileage'),
+        ('Costo total', 'total_cost'),
+        ('Observaciones', 'observations'),
+    ]
+    return csv_response(request, f'ordenes_taller_{workshop_id}', columns, orders)
+
+
 @require_workshop_user
 def order_create(request):
     """Vista para crear una nueva orden de mantención."""
@@ -377,11 +459,12 @@ def order_create(request):
                     'observations': form.cleaned_data.get('observations', '')
                 }
                 
-                if OrderService.has_active_order(order_data['vehicle_id']):
-                    messages.error(request, '❌ El vehículo seleccionado ya cuenta con una orden activa en el taller.')
-                    return redirect('workshop:order_create')
+                # La verificación de orden activa se hace dentro de la misma transacción
+                order, errors = OrderService.create_order(workshop_id, order_data, user_id)
                 
-                order = OrderService.create_order(workshop_id, order_data, user_id)
+                if errors and errors.get('vehicle_id'):
+                    messages.error(request, f"❌ {errors['vehicle_id']}")
+                    return redirect('workshop:order_create')
                 
                 if order:
                     messages.success(request, f'✅ Orden de mantención #{order["id"]} creada correctamente.')
@@ -404,32 +487,40 @@ def order_detail(request, order_id):
     """Vista detallada de una orden de mantención (ficha de trabajo)."""
     workshop_id = request.workshop_id
     
-    order = OrderService.get_order(order_id, workshop_id)
+    # La orden (con tareas, repuestos y subtotales en una sola consulta) y las
+    # opciones de los formularios son independientes: se consultan en paralelo
+    results = run_parallel({
+        'order': partial(OrderService.get_order_detail, order_id, workshop_id),
+        'task_types': VehicleService.get_task_types,
+        'inventory': partial(InventoryService.get_inventory_options, workshop_id),
+        'order_statuses': VehicleService.get_order_statuses,
+        'maintenance_types': VehicleService.get_maintenance_types,
+        'mechanics': partial(EmployeeService.get_mechanics, workshop_id),
+    }, defaults={
+        'task_types': [], 'inventory': [], 'order_statuses': [],
+        'maintenance_types': [], 'mechanics': [],
+    })
+    order = results.pop('order')
     
+    if 'order' in results.degraded:
+        messages.error(request, '❌ No se pudo cargar la orden. Intenta nuevamente.')
+        return redirect('workshop:orders_list')
     if not order:
         messages.error(request, '❌ Orden no encontrada o no pertenece a este taller.')
         return redirect('workshop:orders_list')
+    warn_if_degraded(request, results)
     
     # Verificar si la orden está completada
     order['is_completed'] = OrderService.is_order_completed(order)
     
-    # Obtener tareas y repuestos
-    tasks = OrderService.get_order_tasks(order_id)
-    
-    # Para cada tarea, obtener sus repuestos
-    for task in tasks:
-        task['parts'] = OrderService.get_task_parts(task['id'])
+    tasks = order.pop('tasks')
     
     context = {
         'page_title': f'Orden #{order_id}',
         'active_page': 'orders',
         'order': order,
         'tasks': tasks,
-        'task_types': VehicleService.get_task_types(),
-        'inventory': InventoryService.get_all_inventory(workshop_id),
-        'order_statuses': VehicleService.get_order_statuses(),
-        'maintenance_types': VehicleService.get_maintenance_types(),
-        'mechanics': EmployeeService.get_mechanics(workshop_id)
+        **results
     }
     
     return render(request, 'workshop/order_detail.html', context)
@@ -597,7 +688,9 @@ def part_add_to_task(request, order_id):
     inventory_id = int(request.POST.get('workshop_inventory_id'))
     quantity = int(request.POST.get('quantity_used'))
     
-    part = OrderService.add_part_to_task(task_id, inventory_id, quantity)
+    part = OrderService.add_part_to_task(
+        task_id, inventory_id, quantity, order_id, workshop_id, request.session.get('sb_user_id')
+    )
     
     if part:
         messages.success(request, '✅ Repuesto agregado y stock actualizado.')
@@ -624,7 +717,7 @@ def part_remove_from_task(request, order_id, part_id):
         messages.error(request, '❌ No se pueden eliminar repuestos de una orden terminada.')
         return redirect('workshop:order_detail', order_id=order_id)
     
-    success = OrderService.delete_part_from_task(part_id)
+    success = OrderService.delete_part_from_task(part_id, order_id, workshop_id, request.session.get('sb_user_id'))
     
     if success:
         messages.success(request, '🗑️ Repuesto eliminado y stock devuelto.')
@@ -642,18 +735,57 @@ def inventory_list(request):
     workshop_id = request.workshop_id
     user_id = request.session.get('sb_user_id')
     
+    results = run_parallel({
+        'inventory': partial(InventoryService.get_all_inventory, workshop_id),
+        'suppliers': partial(SupplierService.get_all_suppliers, workshop_id),
+        'request_types': RequestService.get_all_request_types,
+    }, defaults={'inventory': [], 'suppliers': [], 'request_types': []})
+    warn_if_degraded(request, results)
+    
     context = {
         'page_title': 'Inventario del Taller',
         'active_page': 'inventory',
-        'inventory': InventoryService.get_all_inventory(workshop_id),
-        'spare_parts': InventoryService.search_spare_parts(),
-        'suppliers': SupplierService.get_all_suppliers(workshop_id),
-        'request_types': RequestService.get_all_request_types()
+        **results
     }
     
     return render(request, 'workshop/inventory_list.html', context)
 
 
+@require_GET
+@require_workshop_user
+def inventory_export(request):
+    """Exporta el inventario del taller con su valorización a CSV en streaming."""
+    workshop_id = request.workshop_id
+    inventory = InventoryService.iter_inventory_for_export(workshop_id)
+    
+    columns = [
+        ('SKU', 'spare_part.sku'),
+        ('SKU taller', 'workshop_sku'),
+        ('Repuesto', 'spare_part.name'),
+        ('Marca', 'spare_part.brand'),
+        ('Proveedor', 'supplier.name'),
+        ('Ubicación', 'location'),
+        ('Cantidad', 'quantity'),
+        ('Costo unitario', 'current_cost'),
+        ('Valor total', 'total_value'),
+        ('Actualizado', 'updated_at'),
+    ]
+    return csv_response(request, f'inventario_taller_{workshop_id}', columns, inventory)
+
+
+@require_GET
+@require_workshop_user
+def spare_part_search_api(request):
+    """Autocompletado de repuestos del catálogo maestro para el modal de inventario."""
+    query = request.GET.get('q', '').strip()
+    spare_parts = InventoryService.search_spare_parts(query, request.GET.get('limit'))
+    
+    return JsonResponse({
+        'success': True,
+        'spare_parts': spare_parts
+    })
+
+
 @require_http_methods(["POST"])
 @require_workshop_user
 def inventory_add(request):
@@ -0,0 +1,8 @@
+"""
+Benchmarks de round-trips a Supabase por vista.
+
+- postgrest_stub: servidor PostgREST/Auth en memoria (httpx.MockTransport)
+  con datos sembrados a partir del esquema de database/scripts.sql.
+- run_benchmarks: recorre las vistas de sigve, workshop y fire_station con el
+  cliente de pruebas de Django y reporta llamadas remotas, bytes y tiempo.
+"""
@@ -0,0 +1,754 @@
+"""
+Servidor PostgREST/Auth en memoria para benchmarks.
+
+Implementa el subconjunto de la API de PostgREST que usan los servicios
+(select con recursos embebidos, filtros, or/and, order, limit, conteos,
+insert/update/delete, rpc) sobre tablas en memoria, y responde a las rutas de
+Supabase Auth con usuarios sintéticos. Se conecta a los clientes de Supabase a
+través del pool HTTP compartido (httpx.MockTransport), por lo que el código de
+la aplicación se ejecuta sin cambios y cada petición queda contabilizada.
+
+El esquema (tablas, columnas y claves foráneas) se lee de database/scripts.sql.
+"""
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import httpx
+
+# ---------------------------------------------------------------------------
+# Esquema
+# ---------------------------------------------------------------------------
+
+_TABLE_RE = re.compile(r"create table (?:if not exists )?public\.(\w+)\s*\((.*?)\)\s*TABLESPACE", re.S | re.I)
+_FK_RE = re.compile(
+    r"constraint\s+(\w+)\s+foreign\s+KEY\s*\((\w+)\)\s*references\s+(?:public\.)?(\w+)\s*\((\w+)\)",
+    re.I,
+)
+
+
+@dataclass
+class ForeignKey:
+    name: str
+    table: str
+    column: str
+    ref_table: str
+    ref_column: str
+
+
+@dataclass
+class Schema:
+    """Tablas (columna -> tipo) y claves foráneas del esquema."""
+    tables: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    foreign_keys: List[ForeignKey] = field(default_factory=list)
+
+    @classmethod
+    def from_sql(cls, path: Path) -> "Schema":
+        schema = cls()
+        sql = path.read_text(encoding="utf-8")
+        for table, body in _TABLE_RE.findall(sql):
+            columns: Dict[str, str] = {}
+            for line in body.splitlines():
+                line = line.strip().rstrip(",")
+                if not line or line.lower().startswith("constraint"):
+                    continue
+                parts = line.split()
+                columns[parts[0]] = " ".join(parts[1:]).lower()
+            schema.tables[table] = columns
+            for name, column, ref_table, ref_column in _FK_RE.findall(body):
+                schema.foreign_keys.append(ForeignKey(name, table, column, ref_table, ref_column))
+        return schema
+
+    def fks_from(self, table: str) -> List[ForeignKey]:
+        return [fk for fk in self.foreign_keys if fk.table == table]
+
+    def fks_to(self, table: str) -> List[ForeignKey]:
+        return [fk for fk in self.foreign_keys if fk.ref_table == table]
+
+
+# ---------------------------------------------------------------------------
+# Datos sembrados
+# ---------------------------------------------------------------------------
+
+# Nombres conocidos de tablas de catálogo (los servicios buscan algunos por nombre)
+CATALOG_NAMES: Dict[str, List[str]] = {
+    "role": ["Super Admin", "Admin SIGVE", "Admin Taller", "Mecánico", "Jefe Cuartel", "Usuario"],
+    "vehicle_status": ["Disponible", "En Taller", "Fuera de Servicio", "En Mantención"],
+    "maintenance_order_status": ["Pendiente", "En Taller", "En Espera de Repuestos", "Terminada", "Cancelada"],
+    "vehicle_type": ["Carro Bomba", "Escala", "Rescate"],
+    "fuel_type": ["Diésel", "Gasolina"],
+    "transmission_type": ["Manual", "Automática"],
+    "oil_type": ["15W-40", "10W-30"],
+    "coolant_type": ["Orgánico", "Inorgánico"],
+    "task_type": ["Cambio de aceite", "Revisión de frenos", "Diagnóstico"],
+    "maintenance_type": ["Preventiva", "Correctiva"],
+    "request_type": ["Nuevo repuesto", "Nuevo tipo de vehículo"],
+    "region": ["Metropolitana", "Valparaíso"],
+}
+
+REQUEST_STATUSES = ["pendiente", "aprobada", "rechazada"]
+BASE_DATE = date(2024, 1, 1)
+
+
+def _user_uuid(index: int) -> str:
+    return str(uuid.UUID(int=index + 1))
+
+
+class Database:
+    """Tablas en memoria sembradas de forma determinista a partir del esquema."""
+
+    def __init__(self, schema: Schema, scale: int = 10):
+        self.schema = schema
+        self.scale = scale
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.auth_users: Dict[str, Dict[str, Any]] = {}
+        self._seed()
+
+    # --- Sembrado ---
+
+    def _row_count(self, table: str) -> int:
+        if table in CATALOG_NAMES:
+            return len(CATALOG_NAMES[table])
+        return self.scale
+
+    def _seed_order(self) -> List[str]:
+        """Ordena las tablas para que las referenciadas se siembren primero."""
+        ordered: List[str] = []
+        pending = dict(self.schema.tables)
+        while pending:
+            progressed = False
+            for table in list(pending):
+                deps = {fk.ref_table for fk in self.schema.fks_from(table) if fk.ref_table != table}
+                if deps <= set(ordered) or not deps & set(pending):
+                    ordered.append(table)
+                    del pending[table]
+                    progressed = True
+            if not progressed:
+                ordered.extend(pending)
+                break
+        return ordered
+
+    def _value(self, table: str, column: str, col_type: str, index: int, fks: Dict[str, ForeignKey]) -> Any:
+        nullable = "not null" not in col_type
+        if column in fks:
+            fk = fks[column]
+            targets = self.tables.get(fk.ref_table) or []
+            if not targets:
+                return None
+            return targets[index % len(targets)][fk.ref_column]
+        if column == "name" and table in CATALOG_NAMES:
+            return CATALOG_NAMES[table][index]
+        if table == "data_request" and column == "status":
+            return REQUEST_STATUSES[index % len(REQUEST_STATUSES)]
+        if column == "exit_date":
+            return None if index % 2 == 0 else (BASE_DATE + timedelta(days=index + 5)).isoformat()
+        if col_type.startswith("uuid"):
+            return _user_uuid(index) if table == "user_profile" and column == "id" else None
+        if col_type.startswith("bigint") or col_type.startswith("integer") or col_type.startswith("smallint"):
+            return (index + 1) * 1000 if column != "quantity" else 10 + index
+        if col_type.startswith("double") or col_type.startswith("numeric") or col_type.startswith("real"):
+            return float((index + 1) * 1500)
+        if col_type.startswith("boolean"):
+            return True
+        if col_type.startswith("jsonb") or col_type.startswith("json"):
+            return {}
+        if col_type.startswith("date"):
+            return (BASE_DATE + timedelta(days=index)).isoformat()
+        if col_type.startswith("timestamp"):
+            return datetime(2024, 1, 1, 10, 0, 0).replace(day=1 + index % 28).isoformat()
+        if col_type.startswith("character") or col_type.startswith("text"):
+            if column == "email":
+                return f"user{index + 1}@example.com"
+            return f"{table} {column} {index + 1}"
+        return None if nullable else f"{column} {index + 1}"
+
+    def _seed(self) -> None:
+        for table in self._seed_order():
+            columns = self.schema.tables[table]
+            fks = {fk.column: fk for fk in self.schema.fks_from(table) if fk.ref_table != table}
+            rows = []
+            for index in range(self._row_count(table)):
+                row = {}
+                for column, col_type in columns.items():
+                    if column == "id" and not col_type.startswith("uuid"):
+                        row[column] = index + 1
+                    else:
+                        row[column] = self._value(table, column, col_type, index, fks)
+                rows.append(row)
+            self.tables[table] = rows
+
+        # El primer usuario es Super Admin con taller y cuartel asignados, de
+        # modo que puede recorrer las vistas de las tres aplicaciones.
+        roles = {row["name"]: row["id"] for row in self.tables.get("role", [])}
+        for index, profile in enumerate(self.tables.get("user_profile", [])):
+            if index == 0:
+                profile.update({"role_id": roles.get("Super Admin"), "workshop_id": 1, "fire_station_id": 1})
+            profile["is_active"] = True
+            self.auth_users[profile["id"]] = {
+                "id": profile["id"],
+                "aud": "authenticated",
+                "role": "authenticated",
+                "email": f"user{index + 1}@example.com",
+                "phone": "",
+                "app_metadata": {},
+                "user_metadata": {},
+                "created_at": "2024-01-01T00:00:00Z",
+            }
+
+    @property
+    def admin_user_id(self) -> str:
+        return self.tables["user_profile"][0]["id"]
+
+    def next_id(self, table: str) -> int:
+        return max((row.get("id") or 0 for row in self.tables.get(table, [])), default=0) + 1
+
+
+# ---------------------------------------------------------------------------
+# Parseo de consultas PostgREST
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SelectItem:
+    """Elemento de `select`: columna o recurso embebido."""
+    name: str
+    alias: str
+    children: Optional[List["SelectItem"]] = None
+    hints: List[str] = field(default_factory=list)
+
+    @property
+    def is_embed(self) -> bool:
+        return self.children is not None
+
+
+def _split_top_level(text: str, sep: str = ",") -> List[str]:
+    parts, depth, current, quoted = [], 0, [], False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        if not quoted:
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == sep and depth == 0:
+                parts.append("".join(current))
+                current = []
+                continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [part for part in parts if part != ""]
+
+
+def parse_select(text: Optional[str]) -> List[SelectItem]:
+    text = re.sub(r"\s+", "", text or "*")
+    items = []
+    for part in _split_top_level(text):
+        children = None
+        if part.endswith(")") and "(" in part:
+            head, inner = part.split("(", 1)
+            children = parse_select(inner[:-1] or "*")
+        else:
+            head = part
+        head = head.split("::", 1)[0]
+        alias, _, name = head.rpartition(":")
+        name, *hints = name.split("!")
+        items.append(SelectItem(name=name, alias=alias or name, children=children, hints=hints))
+    return items
+
+
+def _parse_list(value: str) -> List[str]:
+    value = value.strip()
+    if value.startswith("(") and value.endswith(")"):
+        value = value[1:-1]
+    return [item.strip().strip('"') for item in _split_top_level(value)]
+
+
+def _like_to_regex(pattern: str) -> re.Pattern:
+    regex, i = "", 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+            continue
+        regex += ".*" if char in "%*" else "." if char == "_" else re.escape(char)
+        i += 1
+    return re.compile(f"^{regex}$", re.S)
+
+
+def _coerce(row_value: Any, value: str) -> Tuple[Any, Any]:
+    if isinstance(row_value, bool):
+        return row_value, value.lower() == "true"
+    if isinstance(row_value, (int, float)):
+        try:
+            return row_value, float(value)
+        except ValueError:
+            return str(row_value), value
+    return row_value, value
+
+
+def _compare(row_value: Any, op: str, value: str) -> bool:
+    if op == "is":
+        lowered = value.lower()
+        if lowered == "null":
+            return row_value is None
+        if lowered in ("true", "false"):
+            return row_value is (lowered == "true")
+        return False
+    if op == "in":
+        options = _parse_list(value)
+        return any(_compare(row_value, "eq", option) for option in options)
+    if row_value is None:
+        return False
+    if op in ("like", "ilike"):
+        flags_value = str(row_value)
+        regex = _like_to_regex(value)
+        if op == "ilike":
+            return re.match(regex.pattern, flags_value, re.I | re.S) is not None
+        return regex.match(flags_value) is not None
+    left, right = _coerce(row_value, value)
+    try:
+        return {
+            "eq": lambda: left == right,
+            "neq": lambda: left != right,
+            "gt": lambda: left > right,
+            "gte": lambda: left >= right,
+            "lt": lambda: left < right,
+            "lte": lambda: left <= right,
+        }.get(op, lambda: True)()
+    except TypeError:
+        return False
+
+
+# Condición: (ruta de columna, op, valor, negada) o ("and"/"or", [condiciones], negada)
+Condition = Tuple[Any, Any, Any, bool]
+
+
+def _parse_condition(column: str, expression: str) -> Condition:
+    negate = False
+    if expression.startswith("not."):
+        negate, expression = True, expression[4:]
+    op, _, value = expression.partition(".")
+    return (column, op, unquote(value), negate)
+
+
+def _parse_logic(text: str) -> List[Condition]:
+    """Parsea el contenido de or=(...) / and=(...)."""
+    conditions = []
+    for part in _split_top_level(text[1:-1] if text.startswith("(") else text):
+        negate = False
+        if part.startswith("not."):
+            negate, part = True, part[4:]
+        if part.startswith("or(") or part.startswith("and("):
+            kind, inner = part.split("(", 1)
+            conditions.append((kind, _parse_logic("(" + inner), None, negate))
+        else:
+            column, _, expression = part.partition(".")
+            cond = _parse_condition(column, expression)
+            conditions.append((cond[0], cond[1], cond[2], cond[3] != negate))
+    return conditions
+
+
+def _row_value(row: Dict[str, Any], path: str) -> Any:
+    value: Any = row
+    for key in path.split("."):
+        if isinstance(value, list):
+            value = value[0] if value else None
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def _evaluate(row: Dict[str, Any], condition: Condition) -> bool:
+    first, second, third, negate = condition
+    if first in ("and", "or"):
+        results = [_evaluate(row, cond) for cond in second]
+        result = all(results) if first == "and" else any(results)
+    else:
+        result = _compare(_row_value(row, first), second, third)
+    return result != negate
+
+
+def _sort_rows(rows: List[Dict[str, Any]], order: Optional[str]) -> List[Dict[str, Any]]:
+    if not order:
+        return rows
+    for spec in reversed(order.split(",")):
+        column, *modifiers = spec.split(".")
+        desc = "desc" in modifiers
+        nulls_first = "nullsfirst" in modifiers or (desc and "nullslast" not in modifiers)
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Servidor
+# ---------------------------------------------------------------------------
+
+@dataclass
+class CallRecord:
+    """Una petición atendida por el servidor en memoria."""
+    kind: str          # rest | rpc | auth
+    method: str
+    target: str        # tabla, función o ruta de auth
+    request_bytes: int
+    response_bytes: int
+    status: int
+
+
+class PostgrestStub:
+    """
+    Servidor PostgREST/Auth en memoria, usable como handler de httpx.MockTransport.
+
+    Args:
+        database: Datos en memoria.
+        rpc_handlers: Implementaciones adicionales de funciones RPC (nombre -> callable(db, params)).
+        latency: Latencia simulada por petición, en segundos.
+    """
+
+    def __init__(self, database: Database, rpc_handlers: Optional[Dict[str, Callable]] = None, latency: float = 0.0):
+        self.db = database
+        self.latency = latency
+        self.calls: List[CallRecord] = []
+        self.rpc_handlers: Dict[str, Callable] = dict(DEFAULT_RPC_HANDLERS)
+        self.rpc_handlers.update(rpc_handlers or {})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self)
+
+    def reset_calls(self) -> None:
+        self.calls = []
+
+    # --- Entrada ---
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            time.sleep(self.latency)
+        path = request.url.path
+        body = request.content or b""
+        if path.startswith("/rest/v1/rpc/"):
+            kind, target = "rpc", path[len("/rest/v1/rpc/"):]
+            response = self._handle_rpc(target, request)
+        elif path.startswith("/rest/v1/"):
+            kind, target = "rest", path[len("/rest/v1/"):]
+            response = self._handle_rest(target, request)
+        elif path.startswith("/auth/v1/"):
+            kind, target = "auth", path[len("/auth/v1/"):]
+            response = self._handle_auth(target, request)
+        else:
+            kind, target = "other", path
+            response = self._json({"message": "Not found"}, 404)
+        response_bytes = len(response.content) if request.method != "HEAD" else 0
+        self.calls.append(CallRecord(kind, request.method, target, len(body), response_bytes, response.status_code))
+        return response
+
+    @staticmethod
+    def _json(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        return httpx.Response(
+            status,
+            content=json.dumps(data, default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json", **(headers or {})},
+        )
+
+    @staticmethod
+    def _error(message: str, code: str, status: int, details: str = "") -> httpx.Response:
+        return PostgrestStub._json({"message": message, "code": code, "hint": None, "details": details}, status)
+
+    # --- REST ---
+
+    def _handle_rest(self, table: str, request: httpx.Request) -> httpx.Response:
+        if table not in self.db.tables:
+            return self._error(f'relation "public.{table}" does not exist', "42P01", 404)
+
+        params = request.url.params
+        prefer = request.headers.get("prefer", "")
+        select = parse_select(params.get("select"))
+
+        if request.method in ("GET", "HEAD"):
+            rows = self._query(table, params, select)
+            return self._rows_response(request, rows["rows"], rows["total"], prefer)
+
+        body = json.loads(request.content or b"null")
+        if request.method == "POST":
+            records = body if isinstance(body, list) else [body]
+            rows = [self._insert(table, record, params, prefer) for record in records]
+        elif request.method == "PATCH":
+            rows = [row for row in self.db.tables[table] if self._matches(table, row, params)]
+            for row in rows:
+                row.update(body or {})
+        elif request.method == "DELETE":
+            rows = [row for row in self.db.tables[table] if self._matches(table, row, params)]
+            self.db.tables[table] = [row for row in self.db.tables[table] if row not in rows]
+        else:
+            return self._error("Method not allowed", "405", 405)
+
+        if "return=minimal" in prefer:
+            return httpx.Response(201 if request.method == "POST" else 204)
+        projected = [self._project(table, dict(row), select) for row in rows]
+        return self._rows_response(request, projected, len(projected), prefer, status=201 if request.method == "POST" else 200)
+
+    def _rows_response(self, request, rows, total, prefer, status=200) -> httpx.Response:
+        headers = {}
+        if rows:
+            headers["Content-Range"] = f"0-{len(rows) - 1}/{total if 'count=' in prefer else '*'}"
+        else:
+            headers["Content-Range"] = f"*/{total if 'count=' in prefer else '*'}"
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(rows) != 1:
+                return self._error(
+                    "JSON object requested, multiple (or no) rows returned", "PGRST116", 406,
+                    f"The result contains {len(rows)} rows",
+                )
+            return self._json(rows[0], status, headers)
+        if request.method == "HEAD":
+            return httpx.Response(status, headers=headers)
+        return self._json(rows, status, headers)
+
+    def _insert(self, table, record, params, prefer) -> Dict[str, Any]:
+        rows = self.db.tables[table]
+        conflict_columns = (params.get("on_conflict") or "id").split(",")
+        if "merge-duplicates" in prefer or "ignore-duplicates" in prefer:
+            for row in rows:
+                if all(row.get(col) == record.get(col) for col in conflict_columns if col in record):
+                    if "merge-duplicates" in prefer:
+                        row.update(record)
+                    return row
+        row = {column: None for column in self.db.schema.tables[table]}
+        if "id" in row and not self.db.schema.tables[table]["id"].startswith("uuid"):
+            row["id"] = self.db.next_id(table)
+        now = datetime.utcnow().isoformat()
+        for column in ("created_at", "updated_at"):
+            if column in row:
+                row[column] = now
+        row.update(record)
+        rows.append(row)
+        return row
+
+    def _matches(self, table: str, row: Dict[str, Any], params: httpx.QueryParams) -> bool:
+        for key, value in params.multi_items():
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns") or "." in key:
+                continue
+            if key in ("or", "and"):
+                conditions = _parse_logic(value)
+                results = [_evaluate(row, cond) for cond in conditions]
+                if not (any(results) if key == "or" else all(results)):
+                    return False
+                continue
+            if not _evaluate(row, _parse_condition(key, value)):
+                return False
+        return True
+
+    def _query(self, table: str, params: httpx.QueryParams, select: List[SelectItem]) -> Dict[str, Any]:
+        embedded_filters: Dict[str, List[Tuple[str, str]]] = {}
+        for key, value in params.multi_items():
+            if "." in key:
+                alias, _, column = key.rpartition(".")
+                embedded_filters.setdefault(alias, []).append((column, value))
+
+        rows = []
+        for row in self.db.tables[table]:
+            if not self._matches(table, row, params):
+                continue
+            projected = self._project(table, row, select, embedded_filters)
+            if projected is not None:
+                rows.append(projected)
+
+        rows = _sort_rows(rows, params.get("order"))
+        total = len(rows)
+        offset = int(params.get("offset") or 0)
+        limit = params.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+        return {"rows": rows, "total": total}
+
+    # --- Recursos embebidos ---
+
+    def _resolve_embed(self, table: str, item: SelectItem) -> Optional[Tuple[str, ForeignKey, bool]]:
+        """
+        Resuelve un recurso embebido.
+
+        Returns:
+            (tabla destino, clave foránea, es_a_uno) o None si no se puede resolver.
+        """
+        hints = [hint for hint in item.hints if hint not in ("inner", "left")]
+        columns = self.db.schema.tables[table]
+
+        def hinted(fks: List[ForeignKey]) -> List[ForeignKey]:
+            if not hints:
+                return fks
+            return [fk for fk in fks if fk.name in hints or fk.column in hints] or fks
+
+        if item.name in columns:
+            fks = [fk for fk in self.db.schema.fks_from(table) if fk.column == item.name]
+            if fks:
+                return fks[0].ref_table, fks[0], True
+        if item.name in self.db.tables:
+            to_one = hinted([fk for fk in self.db.schema.fks_from(table) if fk.ref_table == item.name])
+            if to_one and (not hints or any(fk.name in hints or fk.column in hints for fk in to_one)):
+                return item.name, to_one[0], True
+            to_many = hinted([fk for fk in self.db.schema.fks_to(table) if fk.table == item.name])
+            if to_many:
+                return item.name, to_many[0], False
+            if to_one:
+                return item.name, to_one[0], True
+        return None
+
+    def _project(
+        self,
+        table: str,
+        row: Dict[str, Any],
+        select: List[SelectItem],
+        embedded_filters: Optional[Dict[str, List[Tuple[str, str]]]] = None,
+        prefix: str = "",
+    ) -> Optional[Dict[str, Any]]:
+        embedded_filters = embedded_filters or {}
+        result: Dict[str, Any] = {}
+        for item in select:
+            if not item.is_embed:
+                if item.name == "*":
+                    result.update(row)
+                elif item.name in ("count", "count()") and prefix:
+                    continue
+                else:
+                    result[item.alias] = row.get(item.name)
+                continue
+
+            resolved = self._resolve_embed(table, item)
+            path = f"{prefix}{item.alias}"
+            filters = embedded_filters.get(path, [])
+            inner = "inner" in item.hints
+            if resolved is None:
+                result[item.alias] = None
+                continue
+            target, fk, to_one = resolved
+
+            if to_one:
+                key = row.get(fk.column) if fk.table == table else row.get(fk.ref_column)
+                lookup_column = fk.ref_column if fk.table == table else fk.column
+                candidates = [r for r in self.db.tables[target] if key is not None and r.get(lookup_column) == key]
+            else:
+                candidates = [r for r in self.db.tables[target] if r.get(fk.column) == row.get(fk.ref_column)]
+
+            children = []
+            for candidate in candidates:
+                if any(
+                    column not in ("order", "limit", "offset") and not _evaluate(candidate, _parse_condition(column, value))
+                    for column, value in filters
+                ):
+                    continue
+                if item.children and [child.name for child in item.children] == ["count"]:
+                    children.append(candidate)
+                    continue
+                projected = self._project(target, candidate, item.children or [], embedded_filters, f"{path}.")
+                if projected is not None:
+                    children.append(projected)
+
+            if item.children and [child.name for child in item.children] == ["count"]:
+                result[item.alias] = [{"count": len(children)}]
+                continue
+
+            if to_one:
+                if inner and not children:
+                    return None
+                result[item.alias] = children[0] if children else None
+            else:
+                if inner and not children:
+                    return None
+                order = next((value for column, value in filters if column == "order"), None)
+                result[item.alias] = _sort_rows(children, order)
+        return result
+
+    # --- RPC ---
+
+    def _handle_rpc(self, function: str, request: httpx.Request) -> httpx.Response:
+        params = json.loads(request.content or b"{}") or {}
+        handler = self.rpc_handlers.get(function)
+        data = handler(self.db, params) if handler else None
+        return self._json(data)
+
+    # --- Auth ---
+
+    def _handle_auth(self, path: str, request: httpx.Request) -> httpx.Response:
+        users = self.db.auth_users
+        if path == "user":
+            return self._json(users.get(self.db.admin_user_id))
+        if path == "admin/users" and request.method == "GET":
+            return self._json({"users": list(users.values()), "aud": "authenticated"})
+        if path.startswith("admin/users/"):
+            user_id = path.rsplit("/", 1)[-1]
+            user = users.get(user_id)
+            if user is None:
+                return self._json({"code": 404, "msg": "User not found"}, 404)
+            if request.method == "PUT":
+                user.update(json.loads(request.content or b"{}"))
+            if request.method == "DELETE":
+                users.pop(user_id, None)
+            return self._json(user)
+        if path == "admin/users" and request.method == "POST":
+            payload = json.loads(request.content or b"{}")
+            user_id = str(uuid.uuid4())
+            users[user_id] = {"id": user_id, "aud": "authenticated", "role": "authenticated",
+                              "email": payload.get("email"), "phone": payload.get("phone", ""),
+                              "app_metadata": {}, "user_metadata": payload.get("user_metadata", {}),
+                              "created_at": datetime.utcnow().isoformat() + "Z"}
+            return self._json(users[user_id])
+        if path.startswith("logout"):
+            return httpx.Response(204)
+        return self._json({})
+
+
+# ---------------------------------------------------------------------------
+# Funciones RPC
+# ---------------------------------------------------------------------------
+
+def _rpc_count_stats(db: Database, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Contadores sintéticos para las funciones dashboard_*_stats."""
+    return {
+        "total_workshops": len(db.tables.get("workshop", [])),
+        "total_fire_stations": len(db.tables.get("fire_station", [])),
+        "total_vehicles": len(db.tables.get("vehicle", [])),
+        "total_ordenes": len(db.tables.get("maintenance_order", [])),
+        "pending_requests_count": sum(1 for r in db.tables.get("data_request", []) if r.get("status") == "pendiente"),
+        "vehicles_by_status": {},
+        "vehicles_by_type": {},
+    }
+
+
+def _rpc_auth_users_by_ids(db: Database, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ids = set(params.get("p_user_ids") or [])
+    return [
+        {"id": user["id"], "email": user["email"], "phone": user["phone"]}
+        for user in db.auth_users.values() if user["id"] in ids
+    ]
+
+
+def _rpc_find_user_by_email(db: Database, params: Dict[str, Any]) -> Optional[str]:
+    email = (params.get("p_email") or "").strip().lower()
+    return next((user["id"] for user in db.auth_users.values() if (user["email"] or "").lower() == email), None)
+
+
+def _rpc_search_spare_parts(db: Database, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    term = (params.get("p_query") or "").strip().lower()
+    limit = params.get("p_limit") or 20
+    matches = [
+        dict(part, rank=1.0) for part in db.tables.get("spare_part", [])
+        if term and term in f"{part.get('name')} {part.get('sku')} {part.get('brand') or ''}".lower()
+    ]
+    return matches[:limit]
+
+
+DEFAULT_RPC_HANDLERS: Dict[str, Callable[[Database, Dict[str, Any]], Any]] = {
+    "dashboard_global_stats": _rpc_count_stats,
+    "dashboard_workshop_stats": _rpc_count_stats,
+    "dashboard_fire_station_stats": _rpc_count_stats,
+    "get_auth_users_by_ids": _rpc_auth_users_by_ids,
+    "find_auth_user_id_by_email": _rpc_find_user_by_email,
+    "search_spare_parts": _rpc_search_spare_parts,
+}
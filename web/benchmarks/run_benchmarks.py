@@ -0,0 +1,319 @@
+"""
+Benchmark de round-trips por vista.
+
+Recorre todas las vistas GET de sigve, workshop y fire_station con el cliente
+de pruebas de Django contra el servidor PostgREST en memoria (postgrest_stub)
+y reporta, por vista: llamadas remotas, bytes transferidos, código de estado
+y tiempo de pared. Cada vista se mide con dos tamaños de datos; si el número de
+llamadas crece con los datos se marca como `scales_with_data` (patrón N+1).
+
+Uso (desde web/):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --output resultados.json
+    python -m benchmarks.run_benchmarks --update-baseline
+
+Termina con código 1 si alguna vista supera las llamadas del baseline, pasa a
+escalar con los datos, responde 5xx o cambia su código de estado.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+BASE_DIR = BENCHMARKS_DIR.parent
+SCHEMA_PATH = BASE_DIR.parent / "database" / "scripts.sql"
+DEFAULT_BASELINE = BENCHMARKS_DIR / "baseline.json"
+
+# Namespaces de las aplicaciones a recorrer
+NAMESPACES = ("sigve", "workshop", "fire_station")
+
+# Valores para parámetros de ruta que no son IDs
+PATH_VALUES = {"catalog_name": "vehicle_type"}
+
+# Vistas que no se pueden renderizar por GET en este árbol y quedan fuera del
+# reporte y del baseline: sus llamadas parciales no son comparables.
+SKIPPED_VIEWS = {
+    name: "la plantilla del formulario no existe (el alta/edición se hace desde modales por POST)"
+    for name in (
+        "sigve:catalog_create", "sigve:catalog_edit",
+        "sigve:fire_station_create", "sigve:fire_station_edit",
+        "sigve:spare_part_create", "sigve:spare_part_edit",
+        "sigve:supplier_create", "sigve:supplier_edit",
+        "sigve:workshop_create", "sigve:workshop_edit",
+        "sigve:user_edit",
+    )
+}
+
+JWT_SECRET = "benchmark-jwt-secret-benchmark-jwt-secret"
+
+logger = logging.getLogger("benchmarks")
+
+
+def _configure_environment() -> None:
+    """Configura el entorno antes de cargar Django (Supabase apunta al stub)."""
+    os.environ["SUPABASE_URL"] = "http://supabase.benchmark"
+    os.environ["SUPABASE_ANON_KEY"] = "benchmark-anon-key"
+    os.environ["SUPABASE_SERVICE_KEY"] = "benchmark-service-key"
+    os.environ["SUPABASE_JWT_SECRET"] = JWT_SECRET
+    os.environ["REFERENCE_DATA_WARMUP"] = "False"
+    os.environ.setdefault("DJANGO_SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    sys.path.insert(0, str(BASE_DIR))
+
+
+def _install_stub(stub) -> None:
+    """Reinicia los singletons de Supabase y los conecta al stub en memoria."""
+    import httpx
+    from accounts.client import supabase_client
+    from shared.services.query_metrics import InstrumentedTransport
+
+    supabase_client._supabase = None
+    supabase_client._supabase_admin = None
+    supabase_client._http_client = httpx.Client(
+        transport=InstrumentedTransport(stub.transport()), follow_redirects=True
+    )
+
+
+def _reset_process_caches() -> None:
+    """Vacía las cachés en proceso para que cada escala empiece en frío."""
+    from django.core.cache import cache
+    from accounts.services.token_service import TokenService
+    from shared.services.reference_data_service import ReferenceDataService
+    from shared.services.status_registry import StatusRegistry
+
+    cache.clear()
+    TokenService.clear_cache()
+    ReferenceDataService._store.clear()
+    StatusRegistry._indexes.clear()
+
+
+def _login(client, user_id: str) -> None:
+    """Abre una sesión con un JWT válido para el usuario sembrado."""
+    import jwt
+
+    token = jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "role": "authenticated", "exp": int(time.time()) + 3600},
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+    session = client.session
+    session["sb_access_token"] = token
+    session["sb_refresh_token"] = "benchmark-refresh-token"
+    session["sb_user_id"] = user_id
+    session.save()
+
+
+def _collect_views(user_id: str) -> List[Dict[str, str]]:
+    """
+    Enumera las vistas con nombre de los namespaces a medir.
+
+    Los parámetros de ruta se rellenan con IDs sembrados: enteros con 1, los
+    identificadores de usuario con el UUID del usuario autenticado y el resto
+    desde PATH_VALUES.
+    """
+    from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+    views = []
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver) or resolver.namespace not in NAMESPACES:
+            continue
+        for pattern in resolver.url_patterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            kwargs = {}
+            for name, converter in pattern.pattern.converters.items():
+                if name in PATH_VALUES:
+                    kwargs[name] = PATH_VALUES[name]
+                elif "user" in name or converter.__class__.__name__ == "UUIDConverter":
+                    kwargs[name] = user_id
+                elif converter.__class__.__name__ == "IntConverter":
+                    kwargs[name] = 1
+                else:
+                    kwargs[name] = "1"
+            view_name = f"{resolver.namespace}:{pattern.name}"
+            views.append({"name": view_name, "url": reverse(view_name, kwargs=kwargs)})
+    return views
+
+
+def _get(client, url: str):
+    """GET que consume el cuerpo de las respuestas en streaming (exportaciones)."""
+    response = client.get(url)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def _measure(client, stub, url: str, repeats: int) -> Dict[str, Any]:
+    """
+    Mide una vista: una petición en frío y `repeats` peticiones en caliente.
+
+    Returns:
+        Dict con status, cold_calls, calls, bytes y wall_ms (mediana en caliente).
+    """
+    stub.reset_calls()
+    response = _get(client, url)
+    cold_calls = len(stub.calls)
+
+    samples = []
+    for _ in range(repeats):
+        stub.reset_calls()
+        start = time.perf_counter()
+        response = _get(client, url)
+        elapsed = (time.perf_counter() - start) * 1000
+        samples.append({
+            "calls": len(stub.calls),
+            "bytes": sum(call.request_bytes + call.response_bytes for call in stub.calls),
+            "targets": sorted({f"{call.kind}:{call.target}" for call in stub.calls}),
+            "wall_ms": elapsed,
+        })
+
+    return {
+        "status": response.status_code,
+        "cold_calls": cold_calls,
+        "calls": max(sample["calls"] for sample in samples),
+        "bytes": max(sample["bytes"] for sample in samples),
+        "wall_ms": round(statistics.median(sample["wall_ms"] for sample in samples), 2),
+        "targets": samples[-1]["targets"],
+    }
+
+
+def run(scale: int, repeats: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Ejecuta el benchmark con `scale` y `2 * scale` filas por tabla.
+
+    Returns:
+        Dict vista -> métricas a la escala base, con `scales_with_data`.
+    """
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from benchmarks.postgrest_stub import Database, PostgrestStub, Schema
+
+    schema = Schema.from_sql(SCHEMA_PATH)
+    measurements: Dict[int, Dict[str, Dict[str, Any]]] = {}
+
+    with override_settings(
+        SESSION_ENGINE="django.contrib.sessions.backends.cache",
+        ALLOWED_HOSTS=["testserver"],
+    ):
+        for size in (scale, scale * 2):
+            stub = PostgrestStub(Database(schema, scale=size))
+            _install_stub(stub)
+            _reset_process_caches()
+
+            client = Client(raise_request_exception=False)
+            user_id = stub.db.admin_user_id
+            _login(client, user_id)
+
+            results = {}
+            for view in _collect_views(user_id):
+                if view["name"] in SKIPPED_VIEWS:
+                    continue
+                metrics = _measure(client, stub, view["url"], repeats)
+                if metrics["status"] == 405:
+                    # Vista solo POST: no se mide
+                    continue
+                metrics["url"] = view["url"]
+                results[view["name"]] = metrics
+            measurements[size] = results
+
+    report = {}
+    for name, metrics in measurements[scale].items():
+        scaled = measurements[scale * 2].get(name, metrics)
+        report[name] = dict(metrics, scales_with_data=scaled["calls"] > metrics["calls"])
+    return report
+
+
+def compare(report: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Compara el reporte con el baseline.
+
+    Returns:
+        Lista de regresiones (vacía si no hay).
+    """
+    regressions = []
+    for name, metrics in sorted(report.items()):
+        if metrics["status"] >= 500:
+            regressions.append(f"{name}: respondió {metrics['status']}")
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if "status" in expected and metrics["status"] != expected["status"]:
+            regressions.append(f"{name}: estado {metrics['status']} (baseline {expected['status']})")
+        if metrics["calls"] > expected["calls"]:
+            regressions.append(f"{name}: {metrics['calls']} llamadas (baseline {expected['calls']})")
+        if metrics["scales_with_data"] and not expected.get("scales_with_data"):
+            regressions.append(f"{name}: las llamadas ahora crecen con los datos (N+1)")
+    return regressions
+
+
+def _print_report(report: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'Vista':<45} {'Estado':>6} {'Llamadas':>8} {'Base':>5} {'Bytes':>9} {'ms':>8}  N+1")
+    for name, metrics in sorted(report.items()):
+        expected = baseline.get(name, {}).get("calls", "-")
+        flag = "⚠️" if metrics["scales_with_data"] else ""
+        print(
+            f"{name:<45} {metrics['status']:>6} {metrics['calls']:>8} {expected:>5} "
+            f"{metrics['bytes']:>9} {metrics['wall_ms']:>8.2f}  {flag}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de round-trips a Supabase por vista.")
+    parser.add_argument("--scale", type=int, default=10, help="Filas por tabla no catálogo (se mide también el doble).")
+    parser.add_argument("--repeats", type=int, default=3, help="Peticiones en caliente por vista.")
+    parser.add_argument("--output", type=Path, help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline con el que comparar.")
+    parser.add_argument("--update-baseline", action="store_true", help="Sobrescribe el baseline con estos resultados.")
+    args = parser.parse_args(argv)
+
+    _configure_environment()
+    import django
+    django.setup()
+    logging.disable(logging.CRITICAL)
+
+    report = run(args.scale, args.repeats)
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    _print_report(report, baseline)
+    if SKIPPED_VIEWS:
+        print(f"\nℹ️ {len(SKIPPED_VIEWS)} vistas omitidas: {', '.join(sorted(SKIPPED_VIEWS))}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+
+    if args.update_baseline:
+        failing = sorted(name for name, metrics in report.items() if metrics["status"] >= 500)
+        if failing:
+            print(f"\n❌ No se actualiza el baseline: vistas con error 5xx: {', '.join(failing)}")
+            return 1
+        stored = {
+            name: {
+                "calls": metrics["calls"],
+                "scales_with_data": metrics["scales_with_data"],
+                "status": metrics["status"],
+            }
+            for name, metrics in report.items()
+        }
+        args.baseline.write_text(json.dumps(stored, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\n💾 Baseline actualizado: {args.baseline}")
+        return 0
+
+    regressions = compare(report, baseline)
+    if regressions:
+        print("\n❌ Regresiones de round-trips:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("\n✅ Sin regresiones de round-trips.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,11 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Los dashboards y las APIs JSON con varias consultas son vistas `async def`
+(ver shared.services.concurrency.gather_parallel). Servidas por un servidor
+ASGI (ej. `uvicorn config.asgi:application`) no ocupan un hilo de trabajo
+mientras esperan a Supabase.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,132 @@
+import logging
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.html import escape
+
+from shared.services.identity_map import IdentityMap
+from shared.services.query_metrics import QueryMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryMetricsMiddleware:
+    """
+    Mide las llamadas remotas a Supabase de cada petición.
+
+    - Añade la cabecera `Server-Timing` con el total de llamadas y el tiempo
+      remoto (desglosado en rest, rpc y auth), visible en las DevTools.
+    - Registra un warning cuando la vista supera `SUPABASE_CALL_BUDGET` llamadas.
+    - Con DEBUG y `QUERY_METRICS_PANEL`, inyecta un panel con el resumen y el
+      detalle de cada llamada al final de las páginas HTML.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = QueryMetrics.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics = QueryMetrics.stop(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        token = QueryMetrics.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics = QueryMetrics.stop(token)
+        return self._finish(request, response, metrics)
+
+    def _finish(self, request, response, metrics: QueryMetrics):
+        """Publica las métricas de la petición en la respuesta y en los logs."""
+        response["Server-Timing"] = metrics.server_timing()
+        view_name = request.resolver_match.view_name if request.resolver_match else request.path
+
+        logger.debug(
+            f"⏱️ (QueryMetrics) {view_name}: {metrics.total_calls} llamadas a Supabase, "
+            f"{metrics.total_ms:.1f} ms remotos"
+        )
+
+        budget = getattr(settings, "SUPABASE_CALL_BUDGET", 0)
+        if budget and metrics.total_calls > budget:
+            top = Counter(record.method_name for record in metrics.records).most_common(5)
+            breakdown = ", ".join(f"{name} x{count}" for name, count in top)
+            logger.warning(
+                f"⚠️ (QueryMetrics) {view_name} hizo {metrics.total_calls} llamadas a Supabase "
+                f"(presupuesto {budget}, {metrics.total_ms:.1f} ms). Principales: {breakdown}"
+            )
+
+        if settings.DEBUG and getattr(settings, "QUERY_METRICS_PANEL", False):
+            self._inject_panel(response, metrics)
+        return response
+
+    @staticmethod
+    def _inject_panel(response, metrics: QueryMetrics) -> None:
+        """Inserta el panel de resumen antes de `</body>` en respuestas HTML."""
+        if response.streaming or "text/html" not in response.get("Content-Type", ""):
+            return
+        content = response.content.decode(response.charset)
+        position = content.rfind("</body>")
+        if position == -1:
+            return
+
+        rows = "".join(
+            f"<tr><td>{escape(record.method_name)}</td><td>{record.kind}</td>"
+            f"<td>{escape(record.http_method)} {escape(record.table)}</td><td>{record.status}</td>"
+            f"<td>{'' if record.rows is None else record.rows}</td><td>{record.duration_ms:.1f}</td></tr>"
+            for record in metrics.records
+        )
+        panel = (
+            '<details id="query-metrics-panel" style="position:fixed;bottom:0;right:0;z-index:9999;'
+            'max-height:50vh;overflow:auto;background:#fff;border:1px solid #ccc;font:12px monospace;padding:4px 8px;">'
+            f"<summary>Supabase: {metrics.total_calls} llamadas · {metrics.total_ms:.1f} ms</summary>"
+            "<table><tr><th>Método</th><th>Tipo</th><th>Destino</th><th>HTTP</th><th>Filas</th><th>ms</th></tr>"
+            f"{rows}</table></details>"
+        )
+        response.content = (content[:position] + panel + content[position:]).encode(response.charset)
+        if response.has_header("Content-Length"):
+            response["Content-Length"] = str(len(response.content))
+
+
+class IdentityMapMiddleware:
+    """
+    Activa un identity map por petición (ver shared.services.identity_map).
+
+    Las filas que los servicios leen por ID se reutilizan durante la petición
+    y se descartan al terminarla.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = IdentityMap.start()
+        try:
+            return self.get_response(request)
+        finally:
+            IdentityMap.stop(token)
+
+    async def __acall__(self, request):
+        token = IdentityMap.start()
+        try:
+            return await self.get_response(request)
+        finally:
+            IdentityMap.stop(token)
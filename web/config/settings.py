@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.middleware.QueryMetricsMiddleware',
+    'config.middleware.IdentityMapMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -100,6 +102,76 @@ DATABASES = {
 }
 
 
+# Verificación local de tokens de Supabase (ver accounts.services.token_service)
+# - SUPABASE_JWT_SECRET: secreto JWT del proyecto (tokens HS256).
+# - SUPABASE_JWKS_URL: endpoint JWKS para tokens firmados con claves asimétricas.
+# Si ninguno está disponible se valida el token remotamente con Supabase.
+SUPABASE_JWT_SECRET = os.getenv('SUPABASE_JWT_SECRET')
+SUPABASE_JWKS_URL = os.getenv('SUPABASE_JWKS_URL') or (
+    f"{os.getenv('SUPABASE_URL').rstrip('/')}/auth/v1/.well-known/jwks.json"
+    if os.getenv('SUPABASE_URL') else None
+)
+SUPABASE_JWT_AUDIENCE = os.getenv('SUPABASE_JWT_AUDIENCE', 'authenticated')
+SUPABASE_TOKEN_CACHE_TTL = int(os.getenv('SUPABASE_TOKEN_CACHE_TTL', '300'))
+SUPABASE_TOKEN_CACHE_MAX_SIZE = int(os.getenv('SUPABASE_TOKEN_CACHE_MAX_SIZE', '1024'))
+
+# Segundos que el principal del usuario (rol, taller, cuartel) se reutiliza desde
+# la sesión antes de volver a consultar user_profile (ver accounts.services.principal_service)
+PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', '60'))
+
+# Caché de Django (versiones de invalidación de catálogos y principales, ver
+# shared.services.cache_scope)
+# - REDIS_URL: caché compartida entre workers (requiere el paquete redis). Sin ella
+#   se usa la caché en memoria de cada proceso y una invalidación solo llega a los
+#   demás workers cuando vence el TTL.
+# - LOCAL_CACHE_MAX_STALENESS: TTL máximo (segundos) de las copias locales cuando
+#   la caché no es compartida.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+LOCAL_CACHE_MAX_STALENESS = int(os.getenv('LOCAL_CACHE_MAX_STALENESS', '300'))
+
+# Caché de tablas de catálogo (ver shared.services.reference_data_service)
+# - REFERENCE_DATA_WARMUP: precargar los catálogos al iniciar el servidor (runserver,
+#   gunicorn, etc.; nunca en otros comandos de manage.py).
+# - REFERENCE_DATA_TTL: TTL (segundos) por tabla, ej. {'role': 300}.
+REFERENCE_DATA_WARMUP = os.getenv('REFERENCE_DATA_WARMUP', 'False') == 'True'
+REFERENCE_DATA_TTL = {}
+
+# Registrar cada movimiento de stock del inventario de taller en la tabla
+# inventory_movement (auditoría)
+INVENTORY_MOVEMENT_LEDGER = os.getenv('INVENTORY_MOVEMENT_LEDGER', 'True') == 'True'
+
+# Medición de llamadas a Supabase por petición (ver config.middleware.QueryMetricsMiddleware)
+# - SUPABASE_CALL_BUDGET: llamadas por petición a partir de las cuales se registra un warning (0 lo desactiva).
+# - QUERY_METRICS_PANEL: mostrar el resumen de llamadas en las páginas HTML (solo con DEBUG).
+SUPABASE_CALL_BUDGET = int(os.getenv('SUPABASE_CALL_BUDGET', '8'))
+QUERY_METRICS_PANEL = os.getenv('QUERY_METRICS_PANEL', 'True') == 'True'
+
+# Llamadas concurrentes a servicios desde las vistas (ver shared.services.concurrency)
+# Los pools se dimensionan por llamadas en vuelo de todo el proceso, no por
+# petición: aprox. peticiones concurrentes x llamadas por vista (hasta 7). Su suma
+# no debe superar SUPABASE_HTTP_POOL_SIZE, o las llamadas esperarán conexión.
+# - FANOUT_MAX_WORKERS: hilos para run_parallel (vistas síncronas).
+# - FANOUT_ASYNC_MAX_WORKERS: hilos para gather_parallel (dashboards async).
+# - FANOUT_TIMEOUT: segundos máximos por llamada, desde que empieza a ejecutarse.
+# - FANOUT_QUEUE_TIMEOUT: segundos máximos esperando un hilo libre antes de
+#   ejecutar la llamada en serie (síncronas) o darla por degradada (async).
+FANOUT_MAX_WORKERS = int(os.getenv('FANOUT_MAX_WORKERS', '32'))
+FANOUT_ASYNC_MAX_WORKERS = int(os.getenv('FANOUT_ASYNC_MAX_WORKERS', '32'))
+FANOUT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT', '15'))
+FANOUT_QUEUE_TIMEOUT = float(os.getenv('FANOUT_QUEUE_TIMEOUT', '2'))
+
+# Exportaciones CSV en streaming (ver shared.services.export)
+# - EXPORT_CHUNK_SIZE: filas por bloque leído de PostgREST (no debe superar su max-rows, 1000 en Supabase).
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,69 @@
+-- Índices para claves foráneas y columnas de filtro frecuentes
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 002 (requiere 001 = add_location_coordinates.sql)
+--
+-- Cada índice corresponde a una consulta frecuente de los servicios; ver
+-- database/check_indexes.py para verificar con EXPLAIN que se usan.
+-- Todos usan IF NOT EXISTS, por lo que el script puede ejecutarse más de una vez.
+
+-- Órdenes de mantención
+-- Listado del taller paginado por (entry_date, id) y filtrado por estado
+CREATE INDEX IF NOT EXISTS idx_maintenance_order_workshop_entry
+  ON maintenance_order (workshop_id, entry_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_maintenance_order_workshop_status_entry
+  ON maintenance_order (workshop_id, order_status_id, entry_date DESC);
+-- Órdenes de un vehículo (historial y orden activa)
+CREATE INDEX IF NOT EXISTS idx_maintenance_order_vehicle_created
+  ON maintenance_order (vehicle_id, created_at DESC);
+-- Órdenes abiertas (sin fecha de salida) por vehículo y por taller
+CREATE INDEX IF NOT EXISTS idx_maintenance_order_vehicle_open
+  ON maintenance_order (vehicle_id) WHERE exit_date IS NULL;
+CREATE INDEX IF NOT EXISTS idx_maintenance_order_workshop_open
+  ON maintenance_order (workshop_id) WHERE exit_date IS NULL;
+
+-- Tareas y repuestos de una orden (detalle de orden)
+CREATE INDEX IF NOT EXISTS idx_maintenance_task_order
+  ON maintenance_task (maintenance_order_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_maintenance_task_part_task
+  ON maintenance_task_part (maintenance_task_id);
+CREATE INDEX IF NOT EXISTS idx_maintenance_task_part_inventory
+  ON maintenance_task_part (workshop_inventory_id);
+
+-- Vehículos de un cuartel
+CREATE INDEX IF NOT EXISTS idx_vehicle_fire_station
+  ON vehicle (fire_station_id);
+
+-- Historial de estados de un vehículo
+CREATE INDEX IF NOT EXISTS idx_vehicle_status_log_vehicle_change
+  ON vehicle_status_log (vehicle_id, change_date DESC);
+
+-- Empleados de un taller / usuarios de un cuartel
+CREATE INDEX IF NOT EXISTS idx_user_profile_workshop
+  ON user_profile (workshop_id) WHERE workshop_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_user_profile_fire_station
+  ON user_profile (fire_station_id) WHERE fire_station_id IS NOT NULL;
+
+-- Inventario de un taller (listado y alertas de stock bajo)
+CREATE INDEX IF NOT EXISTS idx_workshop_inventory_workshop_quantity
+  ON workshop_inventory (workshop_id, quantity);
+
+-- Proveedores de un taller
+CREATE INDEX IF NOT EXISTS idx_supplier_workshop
+  ON supplier (workshop_id);
+
+-- Solicitudes por estado (bandeja de SIGVE) y por usuario solicitante
+CREATE INDEX IF NOT EXISTS idx_data_request_status_created
+  ON data_request (status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_data_request_requesting_user_created
+  ON data_request (requesting_user_id, created_at DESC);
+
+-- Actualizar estadísticas para que el planificador considere los índices nuevos
+ANALYZE maintenance_order;
+ANALYZE maintenance_task;
+ANALYZE maintenance_task_part;
+ANALYZE vehicle;
+ANALYZE vehicle_status_log;
+ANALYZE user_profile;
+ANALYZE workshop_inventory;
+ANALYZE supplier;
+ANALYZE data_request;
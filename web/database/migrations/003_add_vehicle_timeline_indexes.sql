@@ -0,0 +1,21 @@
+-- Índices para la línea de tiempo paginada de un vehículo
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 003 (requiere 002 = 002_add_hot_path_indexes.sql)
+--
+-- VehicleService.get_vehicle_timeline lee cada fuente con un cursor sobre
+-- (fecha, id) descendente; estos índices resuelven la página completa (filtro,
+-- orden y LIMIT) sin ordenar en memoria, sin importar el largo del historial.
+-- Ver database/check_indexes.py.
+
+-- Cambios de estado de un vehículo, paginados por (change_date, id).
+-- Reemplaza a idx_vehicle_status_log_vehicle_change (mismo prefijo).
+CREATE INDEX IF NOT EXISTS idx_vehicle_status_log_vehicle_change_id
+  ON vehicle_status_log (vehicle_id, change_date DESC, id DESC);
+DROP INDEX IF EXISTS idx_vehicle_status_log_vehicle_change;
+
+-- Órdenes de mantención de un vehículo, paginadas por (entry_date, id)
+CREATE INDEX IF NOT EXISTS idx_maintenance_order_vehicle_entry
+  ON maintenance_order (vehicle_id, entry_date DESC, id DESC);
+
+ANALYZE vehicle_status_log;
+ANALYZE maintenance_order;
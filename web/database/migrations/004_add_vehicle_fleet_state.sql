@@ -0,0 +1,158 @@
+-- Estado actual de la flota: una fila por vehículo con su estado y su orden
+-- de mantención abierta, mantenida por triggers sobre vehicle, maintenance_order
+-- y maintenance_order_status
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 004 (requiere 003 = 003_add_vehicle_timeline_indexes.sql)
+--
+-- Reemplaza los recorridos del historial de órdenes para saber si un vehículo
+-- tiene una orden activa (OrderService.get_active_orders_for_vehicles,
+-- has_active_order, búsqueda de vehículos del taller y dashboard del cuartel,
+-- cuya función se crea en la 005)
+-- por búsquedas por clave primaria. Puede ejecutarse más de una vez.
+
+-- Solo vehicle_id es clave foránea: con más FKs PostgREST podría tratar la
+-- tabla como tabla intermedia entre vehicle y otras tablas y volver ambiguos
+-- los recursos embebidos existentes. Los demás IDs los mantienen los triggers.
+create table if not exists public.vehicle_fleet_state (
+  vehicle_id bigint not null,
+  fire_station_id bigint not null,
+  vehicle_status_id bigint not null,
+  open_order_id bigint null,
+  open_order_status_id bigint null,
+  open_order_status_name character varying null,
+  open_order_workshop_id bigint null,
+  updated_at timestamp without time zone not null default now(),
+  constraint vehicle_fleet_state_pkey primary key (vehicle_id),
+  constraint vehicle_fleet_state_vehicle_id_fkey foreign KEY (vehicle_id) references vehicle (id) on update CASCADE on delete CASCADE
+) TABLESPACE pg_default;
+
+create index if not exists idx_vehicle_fleet_state_fire_station_open
+  on public.vehicle_fleet_state (fire_station_id) where open_order_id is not null;
+create index if not exists idx_vehicle_fleet_state_workshop_open
+  on public.vehicle_fleet_state (open_order_workshop_id) where open_order_id is not null;
+
+-- Recalcula la fila de un vehículo. La orden abierta es la más reciente sin
+-- fecha de salida y con un estado que no indica finalización (mismo criterio
+-- que create_maintenance_order y OrderService.is_completion_status).
+create or replace function public.refresh_vehicle_fleet_state(p_vehicle_id bigint)
+returns void
+language plpgsql
+set search_path = ''
+as $$
+begin
+  insert into public.vehicle_fleet_state (
+    vehicle_id, fire_station_id, vehicle_status_id,
+    open_order_id, open_order_status_id, open_order_status_name, open_order_workshop_id, updated_at
+  )
+  select
+    v.id, v.fire_station_id, v.vehicle_status_id,
+    o.id, o.order_status_id, o.status_name, o.workshop_id, (now() at time zone 'utc')
+  from public.vehicle v
+  left join lateral (
+    select mo.id, mo.order_status_id, mos.name as status_name, mo.workshop_id
+    from public.maintenance_order mo
+    join public.maintenance_order_status mos on mos.id = mo.order_status_id
+    where mo.vehicle_id = v.id
+      and mo.exit_date is null
+      and mos.name !~* '(cancel|termin|final|complet|cerrad)'
+    order by mo.created_at desc
+    limit 1
+  ) o on true
+  where v.id = p_vehicle_id
+  on conflict (vehicle_id) do update set
+    fire_station_id = excluded.fire_station_id,
+    vehicle_status_id = excluded.vehicle_status_id,
+    open_order_id = excluded.open_order_id,
+    open_order_status_id = excluded.open_order_status_id,
+    open_order_status_name = excluded.open_order_status_name,
+    open_order_workshop_id = excluded.open_order_workshop_id,
+    updated_at = excluded.updated_at;
+end;
+$$;
+
+create or replace function public.vehicle_fleet_state_on_vehicle()
+returns trigger
+language plpgsql
+set search_path = ''
+as $$
+begin
+  perform public.refresh_vehicle_fleet_state(new.id);
+  return null;
+end;
+$$;
+
+create or replace function public.vehicle_fleet_state_on_order()
+returns trigger
+language plpgsql
+set search_path = ''
+as $$
+begin
+  if tg_op = 'INSERT' then
+    perform public.refresh_vehicle_fleet_state(new.vehicle_id);
+  elsif tg_op = 'DELETE' then
+    perform public.refresh_vehicle_fleet_state(old.vehicle_id);
+  else
+    perform public.refresh_vehicle_fleet_state(new.vehicle_id);
+    -- La orden se movió a otro vehículo: recalcular también el anterior
+    if new.vehicle_id is distinct from old.vehicle_id then
+      perform public.refresh_vehicle_fleet_state(old.vehicle_id);
+    end if;
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function public.vehicle_fleet_state_on_order_status()
+returns trigger
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_vehicle_id bigint;
+begin
+  -- Renombrar un estado puede abrir o cerrar las órdenes que lo usan (el
+  -- criterio de orden abierta es por nombre) y cambia open_order_status_name:
+  -- se recalculan los vehículos con órdenes sin salida en ese estado.
+  for v_vehicle_id in
+    select distinct mo.vehicle_id
+    from public.maintenance_order mo
+    where mo.order_status_id = new.id
+      and mo.exit_date is null
+  loop
+    perform public.refresh_vehicle_fleet_state(v_vehicle_id);
+  end loop;
+  return null;
+end;
+$$;
+
+-- La fila se borra en cascada con el vehículo; solo se recalcula al crearlo
+-- o al cambiar su cuartel o estado.
+drop trigger if exists trg_vehicle_fleet_state_insert on public.vehicle;
+create trigger trg_vehicle_fleet_state_insert
+  after insert on public.vehicle
+  for each row execute function public.vehicle_fleet_state_on_vehicle();
+
+drop trigger if exists trg_vehicle_fleet_state_update on public.vehicle;
+create trigger trg_vehicle_fleet_state_update
+  after update of vehicle_status_id, fire_station_id on public.vehicle
+  for each row
+  when (old.vehicle_status_id is distinct from new.vehicle_status_id
+        or old.fire_station_id is distinct from new.fire_station_id)
+  execute function public.vehicle_fleet_state_on_vehicle();
+
+drop trigger if exists trg_vehicle_fleet_state_order on public.maintenance_order;
+create trigger trg_vehicle_fleet_state_order
+  after insert or delete or update of vehicle_id, order_status_id, exit_date, created_at on public.maintenance_order
+  for each row execute function public.vehicle_fleet_state_on_order();
+
+drop trigger if exists trg_vehicle_fleet_state_order_status on public.maintenance_order_status;
+create trigger trg_vehicle_fleet_state_order_status
+  after update of name on public.maintenance_order_status
+  for each row
+  when (old.name is distinct from new.name)
+  execute function public.vehicle_fleet_state_on_order_status();
+
+-- Poblar la tabla con la flota existente
+select public.refresh_vehicle_fleet_state(v.id) from public.vehicle v;
+
+ANALYZE vehicle_fleet_state;
@@ -0,0 +1,128 @@
+-- Funciones de agregación para los dashboards
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 005 (requiere 004 = 004_add_vehicle_fleet_state.sql)
+--
+-- Cada función devuelve todos los contadores de su ámbito en un único objeto
+-- JSON, para que el dashboard cueste un solo round-trip (DashboardService,
+-- rpc()). dashboard_fire_station_stats cuenta las órdenes abiertas desde
+-- vehicle_fleet_state, por eso requiere la 004. Usa CREATE OR REPLACE, por lo
+-- que el script puede ejecutarse más de una vez.
+
+create or replace function public.dashboard_global_stats()
+returns json
+language sql
+stable
+as $$
+  select json_build_object(
+    'total_workshops', (select count(*) from public.workshop),
+    'total_fire_stations', (select count(*) from public.fire_station),
+    'total_vehicles', (select count(*) from public.vehicle),
+    'available_vehicles', (
+      select count(*)
+      from public.vehicle v
+      join public.vehicle_status vs on vs.id = v.vehicle_status_id
+      where vs.name = 'Disponible'
+    ),
+    'in_maintenance_vehicles', (
+      select count(*)
+      from public.vehicle v
+      join public.vehicle_status vs on vs.id = v.vehicle_status_id
+      where vs.name = 'En Taller'
+    ),
+    'pending_requests_count', (
+      select count(*) from public.data_request where status = 'pendiente'
+    )
+  );
+$$;
+
+create or replace function public.dashboard_workshop_stats(p_workshop_id bigint)
+returns json
+language sql
+stable
+as $$
+  with order_counts as (
+    select
+      count(*) as total_ordenes,
+      count(*) filter (where mos.name = 'En Taller') as ordenes_en_taller,
+      count(*) filter (where mos.name = 'Pendiente') as ordenes_pendientes,
+      count(*) filter (where mos.name = 'En Espera de Repuestos') as ordenes_espera_repuesto
+    from public.maintenance_order mo
+    join public.maintenance_order_status mos on mos.id = mo.order_status_id
+    where mo.workshop_id = p_workshop_id
+  )
+  select json_build_object(
+    'ordenes_en_taller', oc.ordenes_en_taller,
+    'ordenes_pendientes', oc.ordenes_pendientes,
+    'ordenes_espera_repuesto', oc.ordenes_espera_repuesto,
+    'total_ordenes', oc.total_ordenes,
+    'repuestos_bajo_stock', (
+      select count(*)
+      from public.workshop_inventory wi
+      where wi.workshop_id = p_workshop_id
+        and wi.quantity < 5
+    ),
+    'pending_requests_count', (
+      select count(*)
+      from public.data_request dr
+      join public.user_profile up on up.id = dr.requesting_user_id
+      where up.workshop_id = p_workshop_id
+        and dr.status = 'pendiente'
+    )
+  )
+  from order_counts oc;
+$$;
+
+create or replace function public.dashboard_fire_station_stats(p_fire_station_id bigint)
+returns json
+language sql
+stable
+as $$
+  with station_vehicles as (
+    select
+      v.id,
+      v.next_revision_date,
+      vs.name as status_name,
+      coalesce(vt.name, 'Sin Tipo') as type_name
+    from public.vehicle v
+    join public.vehicle_status vs on vs.id = v.vehicle_status_id
+    left join public.vehicle_type vt on vt.id = v.vehicle_type_id
+    where v.fire_station_id = p_fire_station_id
+  ),
+  status_counts as (
+    select status_name, count(*) as total
+    from station_vehicles
+    group by status_name
+  ),
+  type_counts as (
+    select type_name, count(*) as total
+    from station_vehicles
+    group by type_name
+  )
+  select json_build_object(
+    'total_vehicles', (select count(*) from station_vehicles),
+    'vehicles_available', coalesce((select total from status_counts where status_name = 'Disponible'), 0),
+    'vehicles_in_maintenance', coalesce((select total from status_counts where status_name = 'En Taller'), 0),
+    'vehicles_out_of_service', coalesce((select total from status_counts where status_name = 'De Baja'), 0),
+    'vehicles_need_revision', (
+      select count(*)
+      from station_vehicles
+      where next_revision_date is not null
+        and next_revision_date <= current_date + 30
+    ),
+    -- Vehículos con una orden de mantención abierta (ver vehicle_fleet_state)
+    'vehicles_with_open_order', (
+      select count(*)
+      from public.vehicle_fleet_state fs
+      where fs.fire_station_id = p_fire_station_id
+        and fs.open_order_id is not null
+    ),
+    'vehicles_by_status', coalesce(
+      (select json_object_agg(status_name, total order by status_name) from status_counts),
+      '{}'::json
+    ),
+    'vehicles_by_type', coalesce(
+      (select json_object_agg(type_name, total order by type_name) from type_counts),
+      '{}'::json
+    )
+  );
+$$;
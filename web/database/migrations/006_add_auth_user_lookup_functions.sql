@@ -0,0 +1,49 @@
+-- Consultas sobre auth.users para el backend (solo service_role)
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 006 (requiere 005 = 005_add_dashboard_stats_functions.sql)
+--
+-- AuthUserService obtiene emails y teléfonos de varios usuarios, y busca un
+-- usuario por email, con una sola llamada rpc() en vez de una llamada a
+-- auth.admin.get_user_by_id por usuario. Las funciones son security definer y solo las puede
+-- ejecutar service_role. Usa CREATE OR REPLACE, por lo que el script puede
+-- ejecutarse más de una vez.
+
+-- Obtiene email y teléfono de varios usuarios de auth en una sola llamada.
+create or replace function public.get_auth_users_by_ids(p_user_ids uuid[])
+returns table (id uuid, email text, phone text)
+language sql
+stable
+security definer
+set search_path = ''
+as $$
+  select u.id, u.email::text, u.phone::text
+  from auth.users u
+  where u.id = any(p_user_ids);
+$$;
+
+revoke execute on function public.get_auth_users_by_ids(uuid[]) from public, anon, authenticated;
+grant execute on function public.get_auth_users_by_ids(uuid[]) to service_role;
+
+-- Busca el ID de un usuario de auth por email (sin distinguir mayúsculas).
+-- Supabase Auth guarda los emails normalizados en minúsculas y los indexa con
+-- el índice único parcial users_email_partial_key (email) where is_sso_user =
+-- false; comparar contra lower(p_email) con ese mismo predicado usa el índice
+-- en lugar de recorrer la tabla. Los usuarios SSO (que pueden repetir email)
+-- no se consideran: la plataforma solo crea usuarios con email y contraseña.
+create or replace function public.find_auth_user_id_by_email(p_email text)
+returns uuid
+language sql
+stable
+security definer
+set search_path = ''
+as $$
+  select u.id
+  from auth.users u
+  where u.email = lower(trim(p_email))
+    and u.is_sso_user = false
+  order by u.created_at
+  limit 1;
+$$;
+
+revoke execute on function public.find_auth_user_id_by_email(text) from public, anon, authenticated;
+grant execute on function public.find_auth_user_id_by_email(text) to service_role;
@@ -0,0 +1,61 @@
+-- Búsqueda de repuestos del catálogo maestro con índice trigram
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 007 (requiere 006 = 006_add_auth_user_lookup_functions.sql)
+--
+-- Habilita pg_trgm (en el esquema extensions de Supabase), crea el índice
+-- trigram y la función search_spare_parts usada por el autocompletado del
+-- inventario (InventoryService). Usa IF NOT EXISTS y CREATE OR REPLACE, por
+-- lo que el script puede ejecutarse más de una vez.
+
+-- Búsqueda de repuestos del catálogo maestro (autocompletado del inventario).
+-- Índice trigram sobre nombre + SKU + marca: sirve tanto para ILIKE '%texto%'
+-- como para similitud de palabras (<%), por lo que el costo de la búsqueda no
+-- depende del tamaño del catálogo.
+create extension if not exists pg_trgm with schema extensions;
+
+create index if not exists idx_spare_part_search_trgm
+  on public.spare_part
+  using gin ((lower(name || ' ' || sku || ' ' || coalesce(brand, ''))) extensions.gin_trgm_ops);
+
+-- Ranking: SKU exacto > prefijo de SKU/nombre > substring > similitud difusa.
+create or replace function public.search_spare_parts(p_query text, p_limit integer default 20)
+returns table (
+  id bigint,
+  name character varying,
+  sku character varying,
+  brand character varying,
+  description text,
+  rank real
+)
+language sql
+stable
+set search_path = public, extensions
+as $$
+  with q as (
+    select
+      lower(trim(coalesce(p_query, ''))) as term,
+      replace(replace(replace(lower(trim(coalesce(p_query, ''))), '\', '\\'), '%', '\%'), '_', '\_') as pattern
+  )
+  select
+    sp.id,
+    sp.name,
+    sp.sku,
+    sp.brand,
+    sp.description,
+    (case
+      when lower(sp.sku) = q.term then 1.0
+      when lower(sp.sku) like q.pattern || '%' or lower(sp.name) like q.pattern || '%' then 0.9
+      when lower(sp.name || ' ' || sp.sku || ' ' || coalesce(sp.brand, '')) like '%' || q.pattern || '%' then 0.8
+      else word_similarity(q.term, lower(sp.name || ' ' || sp.sku || ' ' || coalesce(sp.brand, ''))) * 0.7
+    end)::real as rank
+  from public.spare_part sp, q
+  where q.term <> ''
+    and (
+      lower(sp.name || ' ' || sp.sku || ' ' || coalesce(sp.brand, '')) like '%' || q.pattern || '%'
+      or q.term <% lower(sp.name || ' ' || sp.sku || ' ' || coalesce(sp.brand, ''))
+    )
+  order by rank desc, sp.name
+  limit least(greatest(coalesce(p_limit, 20), 1), 50);
+$$;
+
+ANALYZE spare_part;
@@ -0,0 +1,159 @@
+-- Movimientos de stock del inventario de taller
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 008 (requiere 007 = 007_add_spare_part_search.sql)
+--
+-- Crea el libro inventory_movement y las funciones add_part_to_task y
+-- remove_part_from_task usadas por OrderService: cada movimiento (descontar o
+-- devolver stock al agregar/quitar un repuesto de una tarea) se hace en una
+-- sola transacción y una sola llamada, con un UPDATE condicional que impide
+-- dejar el stock negativo. Ambas funciones verifican que la tarea/repuesto
+-- pertenezca a la orden y al taller indicados.
+-- Usa IF NOT EXISTS, DROP ... IF EXISTS y CREATE OR REPLACE, por lo que el
+-- script puede ejecutarse más de una vez.
+
+-- Libro de movimientos de inventario (auditoría)
+create table if not exists public.inventory_movement (
+  id bigint generated by default as identity not null,
+  quantity_delta bigint not null,
+  resulting_quantity bigint not null,
+  reason character varying not null,
+  created_at timestamp without time zone not null default now(),
+  workshop_inventory_id bigint not null,
+  maintenance_task_part_id bigint null,
+  created_by_user_id uuid null,
+  constraint inventory_movement_pkey primary key (id),
+  constraint inventory_movement_workshop_inventory_id_fkey foreign KEY (workshop_inventory_id) references workshop_inventory (id) on update CASCADE on delete CASCADE,
+  constraint inventory_movement_maintenance_task_part_id_fkey foreign KEY (maintenance_task_part_id) references maintenance_task_part (id) on update CASCADE on delete set null,
+  constraint inventory_movement_created_by_user_id_fkey foreign KEY (created_by_user_id) references user_profile (id) on update CASCADE on delete set null
+) TABLESPACE pg_default;
+
+create index if not exists idx_inventory_movement_inventory_created
+  on public.inventory_movement (workshop_inventory_id, created_at desc);
+
+-- Agrega un repuesto a una tarea descontando el stock.
+-- La tarea debe pertenecer a la orden p_order_id del taller p_workshop_id, y el
+-- inventario a ese mismo taller.
+-- Devuelve {"part": <fila maintenance_task_part>, "new_quantity": <stock>}.
+-- Errores: 'Stock insuficiente', inventario/tarea inexistente o de otra orden/taller.
+drop function if exists public.add_part_to_task(bigint, bigint, bigint, uuid, boolean);
+create or replace function public.add_part_to_task(
+  p_order_id bigint,
+  p_workshop_id bigint,
+  p_task_id bigint,
+  p_workshop_inventory_id bigint,
+  p_quantity bigint,
+  p_user_id uuid default null,
+  p_log_movement boolean default true
+)
+returns json
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_workshop_id bigint;
+  v_new_quantity bigint;
+  v_cost double precision;
+  v_part public.maintenance_task_part;
+begin
+  if p_quantity is null or p_quantity <= 0 then
+    raise exception 'La cantidad debe ser mayor a 0' using errcode = '22023';
+  end if;
+
+  select o.workshop_id into v_workshop_id
+  from public.maintenance_task t
+  join public.maintenance_order o on o.id = t.maintenance_order_id
+  where t.id = p_task_id
+    and o.id = p_order_id
+    and o.workshop_id = p_workshop_id;
+
+  if v_workshop_id is null then
+    raise exception 'Tarea % no encontrada', p_task_id using errcode = 'P0002';
+  end if;
+
+  update public.workshop_inventory wi
+  set quantity = wi.quantity - p_quantity,
+      updated_at = now(),
+      last_updated_by_user_id = coalesce(p_user_id, wi.last_updated_by_user_id)
+  where wi.id = p_workshop_inventory_id
+    and wi.workshop_id = v_workshop_id
+    and wi.quantity >= p_quantity
+  returning wi.quantity, wi.current_cost into v_new_quantity, v_cost;
+
+  if not found then
+    if exists (
+      select 1 from public.workshop_inventory wi
+      where wi.id = p_workshop_inventory_id and wi.workshop_id = v_workshop_id
+    ) then
+      raise exception 'Stock insuficiente' using errcode = 'P0001';
+    end if;
+    raise exception 'Inventario % no encontrado', p_workshop_inventory_id using errcode = 'P0002';
+  end if;
+
+  insert into public.maintenance_task_part (maintenance_task_id, workshop_inventory_id, quantity_used, cost_per_unit)
+  values (p_task_id, p_workshop_inventory_id, p_quantity, v_cost)
+  returning * into v_part;
+
+  if p_log_movement then
+    insert into public.inventory_movement
+      (workshop_inventory_id, maintenance_task_part_id, quantity_delta, resulting_quantity, reason, created_by_user_id)
+    values
+      (p_workshop_inventory_id, v_part.id, -p_quantity, v_new_quantity, 'task_part_add', p_user_id);
+  end if;
+
+  return json_build_object('part', row_to_json(v_part), 'new_quantity', v_new_quantity);
+end;
+$$;
+
+-- Quita un repuesto de una tarea y devuelve su cantidad al stock.
+-- El repuesto debe pertenecer a una tarea de la orden p_order_id del taller
+-- p_workshop_id.
+-- Devuelve {"part": <fila eliminada>, "new_quantity": <stock>}.
+drop function if exists public.remove_part_from_task(bigint, uuid, boolean);
+create or replace function public.remove_part_from_task(
+  p_order_id bigint,
+  p_workshop_id bigint,
+  p_part_id bigint,
+  p_user_id uuid default null,
+  p_log_movement boolean default true
+)
+returns json
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_new_quantity bigint;
+  v_part public.maintenance_task_part;
+begin
+  delete from public.maintenance_task_part tp
+  using public.maintenance_task t, public.maintenance_order o
+  where tp.id = p_part_id
+    and t.id = tp.maintenance_task_id
+    and o.id = t.maintenance_order_id
+    and o.id = p_order_id
+    and o.workshop_id = p_workshop_id
+  returning tp.* into v_part;
+
+  if not found then
+    raise exception 'Repuesto usado % no encontrado', p_part_id using errcode = 'P0002';
+  end if;
+
+  update public.workshop_inventory wi
+  set quantity = wi.quantity + v_part.quantity_used,
+      updated_at = now(),
+      last_updated_by_user_id = coalesce(p_user_id, wi.last_updated_by_user_id)
+  where wi.id = v_part.workshop_inventory_id
+    and wi.workshop_id = p_workshop_id
+  returning wi.quantity into v_new_quantity;
+
+  if p_log_movement then
+    insert into public.inventory_movement
+      (workshop_inventory_id, maintenance_task_part_id, quantity_delta, resulting_quantity, reason, created_by_user_id)
+    values
+      (v_part.workshop_inventory_id, null, v_part.quantity_used, v_new_quantity, 'task_part_remove', p_user_id);
+  end if;
+
+  return json_build_object('part', row_to_json(v_part), 'new_quantity', v_new_quantity);
+end;
+$$;
+
+ANALYZE inventory_movement;
@@ -0,0 +1,54 @@
+-- Cambio de estado de vehículos en una sola llamada
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 009 (requiere 008 = 008_add_inventory_movement.sql)
+--
+-- VehicleStatusService hace todos los cambios de estado de un vehículo con la
+-- función transition_vehicle_status (actualiza el vehículo y registra el
+-- cambio en vehicle_status_log en la misma transacción). La usa también
+-- create_maintenance_order (010). Usa CREATE OR REPLACE, por lo que el script
+-- puede ejecutarse más de una vez.
+
+-- Cambia el estado de un vehículo y registra el cambio en vehicle_status_log
+-- en una sola llamada. Es idempotente: si el vehículo ya tiene ese estado no
+-- modifica nada ni escribe en el historial.
+-- p_fire_station_id (opcional) restringe el cambio a vehículos de ese cuartel.
+-- Devuelve {"found": bool, "changed": bool, "previous_status_id": id}.
+create or replace function public.transition_vehicle_status(
+  p_vehicle_id bigint,
+  p_status_id bigint,
+  p_user_id uuid default null,
+  p_reason text default '',
+  p_fire_station_id bigint default null
+)
+returns json
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_previous_status_id bigint;
+begin
+  select v.vehicle_status_id into v_previous_status_id
+  from public.vehicle v
+  where v.id = p_vehicle_id
+    and (p_fire_station_id is null or v.fire_station_id = p_fire_station_id)
+  for update;
+
+  if not found then
+    return json_build_object('found', false, 'changed', false, 'previous_status_id', null);
+  end if;
+
+  if v_previous_status_id = p_status_id then
+    return json_build_object('found', true, 'changed', false, 'previous_status_id', v_previous_status_id);
+  end if;
+
+  update public.vehicle
+  set vehicle_status_id = p_status_id,
+      updated_at = (now() at time zone 'utc')
+  where id = p_vehicle_id;
+
+  insert into public.vehicle_status_log (vehicle_id, changed_by_user_id, vehicle_status_id, change_date, reason)
+  values (p_vehicle_id, p_user_id, p_status_id, (now() at time zone 'utc'), coalesce(p_reason, ''));
+
+  return json_build_object('found', true, 'changed', true, 'previous_status_id', v_previous_status_id);
+end;
+$$;
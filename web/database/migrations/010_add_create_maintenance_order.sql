@@ -0,0 +1,91 @@
+-- Creación de órdenes de mantención en una sola transacción
+-- Este script debe ejecutarse en Supabase SQL Editor
+-- Versión: 010 (requiere 009 = 009_add_transition_vehicle_status.sql)
+--
+-- OrderService.create_order crea la orden con la función
+-- create_maintenance_order: bloquea el vehículo, verifica que no tenga otra
+-- orden activa, inserta la orden y cambia el estado del vehículo con
+-- transition_vehicle_status (009). Usa CREATE OR REPLACE, por lo que el
+-- script puede ejecutarse más de una vez.
+
+-- Crea una orden de mantención en una sola transacción:
+-- 1. Bloquea el vehículo (serializa creaciones concurrentes para el mismo vehículo).
+-- 2. Verifica que no tenga otra orden activa (sin fecha de salida y con
+--    estado que no sea de finalización).
+-- 3. Inserta la orden.
+-- 4. Si se indica usuario, cambia el estado del vehículo (por defecto
+--    'En Taller') y registra el cambio en vehicle_status_log.
+-- Devuelve {"order": <fila>, "vehicle_status_changed": bool} o, si ya existe
+-- una orden activa, {"order": null, "error": "active_order", "active_order_id": id}.
+create or replace function public.create_maintenance_order(
+  p_workshop_id bigint,
+  p_vehicle_id bigint,
+  p_mileage bigint,
+  p_maintenance_type_id bigint,
+  p_order_status_id bigint,
+  p_assigned_mechanic_id uuid default null,
+  p_entry_date date default null,
+  p_observations text default '',
+  p_user_id uuid default null,
+  p_vehicle_status_name text default 'En Taller'
+)
+returns json
+language plpgsql
+set search_path = ''
+as $$
+declare
+  v_current_status_id bigint;
+  v_target_status_id bigint;
+  v_active_order_id bigint;
+  v_order public.maintenance_order;
+  v_status_changed boolean := false;
+begin
+  select v.vehicle_status_id into v_current_status_id
+  from public.vehicle v
+  where v.id = p_vehicle_id
+  for update;
+
+  if not found then
+    raise exception 'Vehículo % no encontrado', p_vehicle_id using errcode = 'P0002';
+  end if;
+
+  select o.id into v_active_order_id
+  from public.maintenance_order o
+  join public.maintenance_order_status s on s.id = o.order_status_id
+  where o.vehicle_id = p_vehicle_id
+    and o.exit_date is null
+    and s.name !~* '(cancel|termin|final|complet|cerrad)'
+  order by o.created_at desc
+  limit 1;
+
+  if v_active_order_id is not null then
+    return json_build_object('order', null, 'error', 'active_order', 'active_order_id', v_active_order_id);
+  end if;
+
+  insert into public.maintenance_order (
+    workshop_id, vehicle_id, mileage, maintenance_type_id, order_status_id,
+    assigned_mechanic_id, entry_date, observations
+  )
+  values (
+    p_workshop_id, p_vehicle_id, p_mileage, p_maintenance_type_id, p_order_status_id,
+    p_assigned_mechanic_id, coalesce(p_entry_date, current_date), coalesce(p_observations, '')
+  )
+  returning * into v_order;
+
+  if p_user_id is not null and p_vehicle_status_name is not null then
+    select vs.id into v_target_status_id
+    from public.vehicle_status vs
+    where lower(vs.name) = lower(trim(p_vehicle_status_name))
+    limit 1;
+
+    if v_target_status_id is not null then
+      v_status_changed := (public.transition_vehicle_status(
+        p_vehicle_id, v_target_status_id, p_user_id,
+        format('Automático: Orden de mantención #%s creada', v_order.id)
+      ) ->> 'changed')::boolean;
+    end if;
+  end if;
+
+  return json_build_object('order', row_to_json(v_order), 'vehicle_status_changed', v_status_changed);
+end;
+$$;
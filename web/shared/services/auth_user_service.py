@@ -0,0 +1,74 @@
+"""
+Servicio compartido para consultar datos de auth.users (email, teléfono).
+
+Las consultas se hacen con el cliente admin (SERVICE_KEY) a través de
+funciones SECURITY DEFINER definidas en database/scripts.sql (migración
+006_add_auth_user_lookup_functions.sql), de modo que
+resolver N usuarios cuesta una sola llamada en lugar de N llamadas a
+`auth.admin.get_user_by_id`.
+"""
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from accounts.client.supabase_client import get_supabase_admin
+
+logger = logging.getLogger(__name__)
+
+
+class AuthUserService:
+    """Servicio para resolver en bloque datos de usuarios de auth.users."""
+
+    @staticmethod
+    def get_auth_users_by_ids(user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene email y teléfono de varios usuarios de auth en una sola llamada.
+
+        Args:
+            user_ids: IDs (UUID) de los usuarios.
+
+        Returns:
+            Diccionario {user_id: {'email': ..., 'phone': ...}}. Los IDs que no
+            existen en auth.users no aparecen. Vacío en caso de error.
+        """
+        unique_ids = list({uid for uid in user_ids if uid})
+        if not unique_ids:
+            return {}
+
+        try:
+            response = get_supabase_admin() \
+                .rpc("get_auth_users_by_ids", {"p_user_ids": unique_ids}) \
+                .execute()
+            rows = response.data or []
+            logger.debug(f"📊 (get_auth_users_by_ids) {len(rows)}/{len(unique_ids)} usuarios de auth resueltos")
+            return {
+                row['id']: {'email': row.get('email'), 'phone': row.get('phone')}
+                for row in rows
+            }
+        except Exception as e:
+            logger.error(f"❌ (get_auth_users_by_ids) Error obteniendo usuarios de auth: {e}", exc_info=True)
+            return {}
+
+    @staticmethod
+    def find_user_id_by_email(email: str) -> Optional[str]:
+        """
+        Busca el ID de un usuario de auth por email (sin distinguir mayúsculas).
+
+        Usa una consulta indexada en la base de datos, por lo que su costo no
+        crece con la cantidad de usuarios.
+
+        Args:
+            email: Correo electrónico a buscar.
+
+        Returns:
+            El ID (UUID) del usuario, o None si no existe.
+
+        Raises:
+            Exception: Los errores de Supabase se propagan al llamador.
+        """
+        if not email or not email.strip():
+            return None
+
+        response = get_supabase_admin() \
+            .rpc("find_auth_user_id_by_email", {"p_email": email.strip()}) \
+            .execute()
+        return response.data or None
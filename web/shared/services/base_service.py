@@ -1,12 +1,68 @@
 import logging
 from abc import ABC
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from accounts.client.supabase_client import get_supabase_with_user
 from supabase import PostgrestAPIError
+from shared.services.query_metrics import QueryMetrics
 
 # Inicializa el logger para este módulo.
 logger = logging.getLogger(__name__)
 
+# Modos de conteo de PostgREST (cabecera Prefer: count=...)
+COUNT_MODES = ("exact", "planned", "estimated")
+
+
+def count_rows(client, table: str, filters: Optional[Dict[str, Any]] = None, mode: str = "exact",
+               select: str = "id", method_name: str = "count") -> Optional[int]:
+    """
+    Cuenta filas con una petición HEAD (`Prefer: count=<mode>`), sin
+    transferir ninguna fila.
+
+    Args:
+        client: Cliente Supabase con el que se consulta.
+        table: Tabla a contar.
+        filters: Columna -> valor. Un valor escalar filtra por igualdad, una
+                 lista por pertenencia (`in`), None por `is null` y una tupla
+                 (operador, valor) aplica ese operador (ej. ("neq", 5)). Las
+                 columnas de recursos embebidos usan "recurso.columna".
+        mode: "exact" (COUNT real), "planned" (estimación del planificador)
+              o "estimated" (exacto hasta db-max-rows, estimado por encima).
+              Para tablas grandes como vehicle_status_log usar planned o estimated.
+        select: Columnas/recursos embebidos (necesario para filtrar por
+                recursos embebidos con !inner).
+        method_name: El nombre del método que llama para logging.
+
+    Returns:
+        Número de filas, o None en caso de error (para distinguirlo de 0).
+
+    Raises:
+        ValueError: Si el modo de conteo no es válido.
+    """
+    if mode not in COUNT_MODES:
+        raise ValueError(f"Modo de conteo no soportado: {mode}")
+    try:
+        query = client.table(table).select(select, count=mode, head=True)
+        for column, value in (filters or {}).items():
+            if isinstance(value, tuple):
+                operator, operand = value
+                query = query.filter(column, operator, operand)
+            elif isinstance(value, list):
+                query = query.in_(column, value)
+            elif value is None:
+                query = query.is_(column, "null")
+            else:
+                query = query.eq(column, value)
+        with QueryMetrics.label(method_name):
+            response = query.execute()
+        return response.count or 0
+    except PostgrestAPIError as e:
+        logger.error(f"❌ ({method_name}) Error de API: {e.message}", exc_info=True)
+        return None
+    except Exception as e:
+        logger.error(f"❌ ({method_name}) Error inesperado: {e}", exc_info=True)
+        return None
+
+
 class BaseService(ABC):
     """
     Clase Base Abstracta para servicios que interactúan con Supabase.
@@ -43,7 +99,8 @@ class BaseService(ABC):
             en caso de error.
         """
         try:
-            response = query.execute()
+            with QueryMetrics.label(method_name):
+                response = query.execute()
             logger.debug(f"📊 ({method_name}) Respuesta cruda de Supabase: {response.data}")
             
             # .maybe_single() devuelve un dict directamente, no una lista.
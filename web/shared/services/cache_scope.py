@@ -0,0 +1,35 @@
+"""
+Alcance de la caché de Django usada para las versiones de invalidación.
+
+ReferenceDataService y PrincipalService invalidan sus copias locales
+incrementando un número de versión en la caché `default`. Esa invalidación solo
+llega a todos los workers si la caché es compartida (Redis, ver REDIS_URL en
+settings); con la caché en memoria por defecto (LocMemCache) cada proceso tiene
+sus propias versiones y los demás ven el cambio recién cuando vence el TTL.
+`bounded_ttl` acota ese TTL para que la obsolescencia tenga un máximo conocido.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared_cache() -> bool:
+    """Indica si la caché `default` es visible para todos los procesos."""
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def bounded_ttl(ttl: int) -> int:
+    """
+    Acota un TTL cuando la caché no es compartida entre procesos.
+
+    Args:
+        ttl: TTL deseado (segundos).
+
+    Returns:
+        El mismo TTL con caché compartida; si no, como máximo
+        settings.LOCAL_CACHE_MAX_STALENESS segundos.
+    """
+    if is_shared_cache():
+        return ttl
+    return min(ttl, getattr(settings, "LOCAL_CACHE_MAX_STALENESS", 300))
@@ -0,0 +1,252 @@
+"""
+Ejecución concurrente de llamadas independientes a servicios.
+
+Las vistas de listado y detalle hacen varias consultas independientes entre sí
+(catálogos, listados, opciones de formularios). `run_parallel` las lanza a la
+vez en un pool de hilos acotado y compartido, de modo que la latencia de la
+página pasa a ser la de la llamada más lenta y no la suma de todas. Cada
+llamada tiene su propio timeout, contado desde que empieza a ejecutarse (no
+desde que se encola), y sus errores quedan aislados: una llamada que falla o
+excede el tiempo devuelve su valor por defecto y no afecta al resto. Esas
+llamadas quedan en `ParallelResults.degraded` para que la vista avise al
+usuario (ver `warn_if_degraded`).
+
+Si el pool está saturado, una llamada que no consigue hilo dentro de
+settings.FANOUT_QUEUE_TIMEOUT se cancela: `run_parallel` la ejecuta en el hilo
+de la petición y `gather_parallel` la marca como degradada.
+
+`gather_parallel` es la variante para vistas `async def` (ver ASGI): usa un
+pool propio (settings.FANOUT_ASYNC_MAX_WORKERS) mediante `asyncio.gather`, sin
+bloquear el event loop ni competir por hilos con las vistas síncronas.
+
+Las llamadas se ejecutan con una copia del contexto (contextvars), por lo que
+siguen registrándose en la medición de la petición (ver query_metrics).
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib import messages
+
+logger = logging.getLogger(__name__)
+
+# Pools compartidos por tipo de vista, "sync" y "async" (creación perezosa)
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+# Setting con el tamaño de cada pool y su valor por defecto
+_POOL_SETTINGS = {
+    "sync": ("FANOUT_MAX_WORKERS", 32),
+    "async": ("FANOUT_ASYNC_MAX_WORKERS", 32),
+}
+
+# Indica si el código actual ya se ejecuta dentro del pool: las llamadas
+# anidadas se resuelven en serie para no agotar los hilos (deadlock).
+_in_pool: contextvars.ContextVar[bool] = contextvars.ContextVar("fanout_in_pool", default=False)
+
+
+class ParallelResults(dict):
+    """
+    Resultados de run_parallel / gather_parallel (nombre -> resultado).
+
+    Attributes:
+        degraded: Nombres de las llamadas que fallaron, excedieron el timeout
+                  o no consiguieron hilo, y cuyo resultado es el valor por defecto.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.degraded: List[str] = []
+
+
+class _Call:
+    """Envoltorio de una llamada que registra cuándo empieza a ejecutarse."""
+
+    def __init__(self, func: Callable[[], Any], on_start: Optional[Callable[[], None]] = None):
+        self.func = func
+        self.on_start = on_start
+        self.started = threading.Event()
+        self.started_at: Optional[float] = None
+
+    def __call__(self) -> Any:
+        self.started_at = time.monotonic()
+        self.started.set()
+        if self.on_start:
+            self.on_start()
+        # Marca el contexto como interno al pool
+        _in_pool.set(True)
+        return self.func()
+
+
+def _get_executor(kind: str = "sync") -> ThreadPoolExecutor:
+    """
+    Obtiene el pool de hilos compartido de un tipo de vista.
+
+    Args:
+        kind: "sync" (run_parallel) o "async" (gather_parallel).
+
+    Returns:
+        ThreadPoolExecutor: El pool, de tamaño settings.FANOUT_MAX_WORKERS o
+        settings.FANOUT_ASYNC_MAX_WORKERS.
+    """
+    executor = _executors.get(kind)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(kind)
+            if executor is None:
+                setting, default = _POOL_SETTINGS[kind]
+                workers = getattr(settings, setting, default)
+                logger.info(f"🔧 (concurrency) Creando pool de hilos '{kind}' para llamadas concurrentes (workers={workers})")
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"fanout-{kind}")
+                _executors[kind] = executor
+    return executor
+
+
+def _call_inline(name: str, func: Callable[[], Any], default: Any, results: ParallelResults) -> None:
+    try:
+        results[name] = func()
+    except Exception as e:
+        logger.error(f"❌ (run_parallel) Error en la llamada '{name}': {e}", exc_info=True)
+        results[name] = default
+        results.degraded.append(name)
+
+
+def _timeouts(timeout: Optional[float]) -> tuple:
+    """Timeout por llamada y espera máxima por un hilo libre (segundos)."""
+    timeout = timeout if timeout is not None else getattr(settings, "FANOUT_TIMEOUT", 15)
+    return timeout, getattr(settings, "FANOUT_QUEUE_TIMEOUT", 2)
+
+
+def run_parallel(
+    calls: Dict[str, Callable[[], Any]],
+    timeout: Optional[float] = None,
+    defaults: Optional[Dict[str, Any]] = None,
+) -> ParallelResults:
+    """
+    Ejecuta llamadas independientes en paralelo y reúne sus resultados.
+
+    Args:
+        calls: Nombre -> callable sin argumentos (usar functools.partial o lambda).
+        timeout: Segundos máximos por llamada desde que empieza a ejecutarse
+                 (por defecto settings.FANOUT_TIMEOUT).
+        defaults: Nombre -> valor a devolver si la llamada falla o excede el
+                  timeout (None si no se indica).
+
+    Returns:
+        ParallelResults con las mismas claves que `calls`.
+    """
+    defaults = defaults or {}
+    timeout, queue_timeout = _timeouts(timeout)
+    results = ParallelResults()
+
+    # Una sola llamada o ya dentro del pool: ejecutar en serie
+    if len(calls) <= 1 or _in_pool.get():
+        for name, func in calls.items():
+            _call_inline(name, func, defaults.get(name), results)
+        return results
+
+    executor = _get_executor("sync")
+    submitted: Dict[str, tuple] = {}
+    for name, func in calls.items():
+        call = _Call(func)
+        submitted[name] = (call, executor.submit(contextvars.copy_context().run, call))
+
+    queue_deadline = time.monotonic() + queue_timeout
+    for name, (call, future) in submitted.items():
+        if not call.started.wait(max(0.0, queue_deadline - time.monotonic())) and future.cancel():
+            # Pool saturado: se ejecuta en el hilo de la petición
+            logger.warning(f"⚠️ (run_parallel) Sin hilo libre para '{name}' tras {queue_timeout}s; se ejecuta en serie")
+            _call_inline(name, call.func, defaults.get(name), results)
+            continue
+
+        # La llamada ya empezó (o está por empezar): su plazo corre desde ese momento
+        call.started.wait()
+        try:
+            results[name] = future.result(timeout=max(0.0, call.started_at + timeout - time.monotonic()))
+        except FutureTimeoutError:
+            logger.warning(f"⚠️ (run_parallel) La llamada '{name}' excedió el timeout de {timeout}s")
+            results[name] = defaults.get(name)
+            results.degraded.append(name)
+        except Exception as e:
+            logger.error(f"❌ (run_parallel) Error en la llamada '{name}': {e}", exc_info=True)
+            results[name] = defaults.get(name)
+            results.degraded.append(name)
+    return results
+
+
+async def gather_parallel(
+    calls: Dict[str, Callable[[], Any]],
+    timeout: Optional[float] = None,
+    defaults: Optional[Dict[str, Any]] = None,
+) -> ParallelResults:
+    """
+    Variante asíncrona de run_parallel para vistas `async def`.
+
+    Cada llamada síncrona se ejecuta en el pool "async" y se espera con
+    `asyncio.gather`, con timeout y aislamiento de errores por llamada. Una
+    llamada que no consigue hilo dentro de settings.FANOUT_QUEUE_TIMEOUT no se
+    ejecuta (no se puede bloquear el event loop) y queda como degradada.
+
+    Args:
+        calls: Nombre -> callable sin argumentos.
+        timeout: Segundos máximos por llamada desde que empieza a ejecutarse
+                 (por defecto settings.FANOUT_TIMEOUT).
+        defaults: Nombre -> valor a devolver si la llamada falla o excede el timeout.
+
+    Returns:
+        ParallelResults con las mismas claves que `calls`.
+    """
+    defaults = defaults or {}
+    timeout, queue_timeout = _timeouts(timeout)
+    executor = _get_executor("async")
+    loop = asyncio.get_running_loop()
+    degraded: List[str] = []
+
+    async def _run(name: str, func: Callable[[], Any]) -> Any:
+        started = asyncio.Event()
+        call = _Call(func, on_start=lambda: loop.call_soon_threadsafe(started.set))
+        future: Future = executor.submit(contextvars.copy_context().run, call)
+        try:
+            try:
+                await asyncio.wait_for(started.wait(), timeout=queue_timeout)
+            except asyncio.TimeoutError:
+                if future.cancel():
+                    logger.warning(f"⚠️ (gather_parallel) Sin hilo libre para '{name}' tras {queue_timeout}s")
+                    degraded.append(name)
+                    return defaults.get(name)
+                await started.wait()
+            remaining = max(0.0, call.started_at + timeout - time.monotonic())
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=remaining)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ (gather_parallel) La llamada '{name}' excedió el timeout de {timeout}s")
+        except Exception as e:
+            logger.error(f"❌ (gather_parallel) Error en la llamada '{name}': {e}", exc_info=True)
+        degraded.append(name)
+        return defaults.get(name)
+
+    names = list(calls)
+    values = await asyncio.gather(*(_run(name, calls[name]) for name in names))
+    results = ParallelResults(zip(names, values))
+    results.degraded = [name for name in names if name in degraded]
+    return results
+
+
+def warn_if_degraded(request, results: ParallelResults) -> None:
+    """
+    Avisa al usuario si alguna llamada de la página devolvió su valor por defecto.
+
+    Args:
+        request: El request de la vista.
+        results: Resultados de run_parallel / gather_parallel.
+    """
+    if results.degraded:
+        messages.warning(
+            request,
+            "⚠️ Parte de la información no pudo cargarse a tiempo y la página puede estar incompleta. "
+            "Recarga para reintentar."
+        )
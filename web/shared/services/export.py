@@ -0,0 +1,207 @@
+"""
+Exportación en streaming (CSV) de listados grandes.
+
+Las exportaciones no cargan la tabla completa en memoria: `iter_keyset` lee las
+filas de PostgREST en bloques paginados por cursor sobre la clave primaria
+(`id > último_id ORDER BY id LIMIT n`, que usa el índice de la PK sin importar
+la profundidad) y `csv_response` las escribe fila a fila en una
+`StreamingHttpResponse`. La memoria usada es la de un bloque, sea cual sea el
+tamaño de la exportación.
+
+Bajo ASGI la respuesta recibe un iterador asíncrono (`aiter_csv`) que lee el
+CSV por bloques en un hilo con `sync_to_async`; con un iterador síncrono Django
+consumiría la exportación completa en memoria antes de enviar el primer byte.
+Bajo WSGI se usa directamente el generador síncrono.
+
+El generador se consume después de que la vista retorna, por lo que las
+llamadas de la exportación no aparecen en la medición de la petición (ver
+query_metrics) ni usan el identity map.
+"""
+import csv
+import logging
+from datetime import date
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from supabase import PostgrestAPIError
+
+from shared.services.query_metrics import QueryMetrics
+
+logger = logging.getLogger(__name__)
+
+# Columna de exportación: (encabezado, ruta "a.b.c" dentro de la fila o función fila -> valor)
+Column = Tuple[str, Union[str, Callable[[Dict[str, Any]], Any]]]
+
+# Prefijos que las planillas interpretan como fórmula (inyección CSV)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def iter_keyset(
+    build_query: Callable[[], Any],
+    method_name: str,
+    chunk_size: Optional[int] = None,
+    key: str = "id",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre todas las filas de una consulta en bloques paginados por `key`.
+
+    Args:
+        build_query: Función que construye la consulta base (select y filtros,
+                     sin order ni limit). Se llama una vez por bloque.
+        method_name: El nombre del método que llama para logging.
+        chunk_size: Filas por bloque (por defecto settings.EXPORT_CHUNK_SIZE).
+                    No debe superar el `max-rows` de PostgREST: un bloque
+                    recortado por el servidor se interpretaría como el último.
+        key: Columna única y ordenable usada como cursor.
+
+    Yields:
+        Cada fila, en orden ascendente de `key`.
+
+    Raises:
+        PostgrestAPIError, Exception: Si falla la lectura de un bloque. El error
+            se propaga para que la descarga quede visiblemente incompleta en vez
+            de producir un archivo truncado que parece válido.
+    """
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 1000)
+    last_key = None
+    chunks = 0
+    while True:
+        query = build_query()
+        if last_key is not None:
+            query = query.gt(key, last_key)
+        query = query.order(key).limit(chunk_size)
+
+        try:
+            with QueryMetrics.label(method_name):
+                rows = query.execute().data or []
+        except PostgrestAPIError as e:
+            logger.error(f"❌ ({method_name}) Error de API en el bloque {chunks + 1}: {e.message}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"❌ ({method_name}) Error inesperado en el bloque {chunks + 1}: {e}", exc_info=True)
+            raise
+
+        chunks += 1
+        yield from rows
+
+        if len(rows) < chunk_size:
+            logger.info(f"📤 ({method_name}) Exportación completa en {chunks} bloque(s)")
+            return
+        last_key = rows[-1][key]
+
+
+def _resolve(row: Dict[str, Any], getter: Union[str, Callable[[Dict[str, Any]], Any]]) -> Any:
+    """Obtiene el valor de una columna (ruta con puntos por recursos embebidos o función)."""
+    if callable(getter):
+        return getter(row)
+    value: Any = row
+    for part in getter.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _cell(value: Any) -> Any:
+    """Normaliza un valor para CSV (vacío para None y texto neutralizado si parece fórmula)."""
+    if value is None:
+        return ""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """Pseudo-archivo: `write` devuelve la línea en vez de almacenarla."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(columns: Sequence[Column], rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Genera el CSV línea a línea.
+
+    Args:
+        columns: Columnas a exportar (encabezado, ruta o función).
+        rows: Filas a exportar (normalmente un generador de iter_keyset).
+
+    Yields:
+        El BOM UTF-8 (para que Excel reconozca la codificación), el
+        encabezado y luego una línea por fila.
+    """
+    writer = csv.writer(_Echo())
+    yield "\ufeff"
+    yield writer.writerow([header for header, _ in columns])
+    for row in rows:
+        yield writer.writerow([_cell(_resolve(row, getter)) for _, getter in columns])
+
+
+async def aiter_csv(
+    columns: Sequence[Column],
+    rows: Iterable[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Variante asíncrona de iter_csv para servir la exportación bajo ASGI.
+
+    Cada bloque de `chunk_size` líneas (por defecto settings.EXPORT_CHUNK_SIZE,
+    el mismo tamaño de bloque que iter_keyset) se genera y codifica en un hilo
+    con sync_to_async, sin bloquear el event loop; la memoria usada es la de un
+    bloque.
+
+    Args:
+        columns: Columnas a exportar (encabezado, ruta o función).
+        rows: Filas a exportar (normalmente un generador de iter_keyset).
+        chunk_size: Líneas por bloque.
+
+    Yields:
+        Cada bloque del CSV codificado en UTF-8.
+    """
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 1000)
+    lines = iter_csv(columns, rows)
+
+    def next_block() -> bytes:
+        return "".join(islice(lines, chunk_size)).encode("utf-8")
+
+    while True:
+        block = await sync_to_async(next_block, thread_sensitive=False)()
+        if not block:
+            return
+        yield block
+
+
+def csv_response(request, filename: str, columns: Sequence[Column], rows: Iterable[Dict[str, Any]]) -> StreamingHttpResponse:
+    """
+    Respuesta de descarga CSV en streaming.
+
+    Args:
+        request: El request de la vista (define si se sirve por ASGI o WSGI).
+        filename: Nombre base del archivo (sin extensión); se agrega la fecha.
+        columns: Columnas a exportar (encabezado, ruta o función).
+        rows: Filas a exportar.
+
+    Returns:
+        StreamingHttpResponse con el CSV como adjunto.
+    """
+    if isinstance(request, ASGIRequest):
+        content = aiter_csv(columns, rows)
+    else:
+        content = iter_csv(columns, rows)
+    response = StreamingHttpResponse(content, content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}_{date.today().isoformat()}.csv"'
+    # Evita que proxies (nginx) acumulen la respuesta completa antes de enviarla
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def full_name(person: Optional[Dict[str, Any]]) -> str:
+    """Nombre completo de un perfil embebido (first_name, last_name), o vacío."""
+    if not person:
+        return ""
+    return f"{person.get('first_name') or ''} {person.get('last_name') or ''}".strip()
+
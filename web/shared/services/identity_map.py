@@ -0,0 +1,111 @@
+"""
+Identity map por petición para filas leídas por ID.
+
+Varias vistas leen la misma fila más de una vez en una petición (ej. la vista
+valida la orden con `get_order` y luego `update_order` vuelve a leerla). Los
+servicios registran esas lecturas con `IdentityMap.get_or_load`, indexadas por
+(tabla, id, proyección), de modo que la fila se obtiene una sola vez por
+petición. Las escrituras hechas a través de los servicios invalidan la entrada
+con `IdentityMap.invalidate`.
+
+El mapa solo existe mientras hay una petición activa (ver
+config.middleware.IdentityMapMiddleware); fuera de ella (comandos, tareas) cada
+lectura va directamente a Supabase. Cada llamador recibe una copia superficial
+de la fila, por lo que puede modificarla sin afectar a los demás.
+"""
+import contextvars
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Clave: (tabla, id, proyección)
+Key = Tuple[str, str, Hashable]
+
+
+class _RequestMap:
+    """Filas cargadas durante una petición."""
+
+    def __init__(self):
+        self.rows: Dict[Key, Any] = {}
+        self.lock = threading.Lock()
+
+
+_current: "contextvars.ContextVar[Optional[_RequestMap]]" = contextvars.ContextVar(
+    "identity_map", default=None
+)
+
+
+def _copy(row: Any) -> Any:
+    """Copia superficial de una fila (como ReferenceDataService.get_table)."""
+    return dict(row) if isinstance(row, dict) else row
+
+
+class IdentityMap:
+    """Memo de filas por petición, indexado por (tabla, id, proyección)."""
+
+    @staticmethod
+    def start() -> contextvars.Token:
+        """Activa un identity map vacío en el contexto actual y devuelve su token."""
+        return _current.set(_RequestMap())
+
+    @staticmethod
+    def stop(token: contextvars.Token) -> None:
+        """Descarta el identity map activado con `token`."""
+        _current.reset(token)
+
+    @staticmethod
+    def get_or_load(table: str, row_id: Any, projection: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Obtiene una fila del identity map o la carga con `loader`.
+
+        Args:
+            table: Tabla de la fila.
+            row_id: ID de la fila.
+            projection: Identifica las columnas/recursos embebidos y filtros de
+                        alcance de la lectura (ej. "get_order:workshop=3").
+            loader: Función que lee la fila de Supabase.
+
+        Returns:
+            Una copia superficial de la fila, o None si no existe. Las lecturas
+            sin resultado (incluidos los errores) no se memorizan.
+        """
+        request_map = _current.get()
+        if request_map is None:
+            return loader()
+
+        key = (table, str(row_id), projection)
+        with request_map.lock:
+            if key in request_map.rows:
+                logger.debug(f"♻️ (IdentityMap) {table} {row_id} reutilizada ({projection})")
+                return _copy(request_map.rows[key])
+
+        row = loader()
+        if row is not None:
+            with request_map.lock:
+                request_map.rows[key] = row
+            return _copy(row)
+        return row
+
+    @staticmethod
+    def invalidate(table: str, row_id: Any = None) -> None:
+        """
+        Invalida las entradas de una fila (todas sus proyecciones) o de una tabla.
+
+        Args:
+            table: Tabla afectada por la escritura.
+            row_id: ID de la fila; None invalida todas las filas de la tabla.
+        """
+        request_map = _current.get()
+        if request_map is None:
+            return
+        with request_map.lock:
+            stale = [
+                key for key in request_map.rows
+                if key[0] == table and (row_id is None or key[1] == str(row_id))
+            ]
+            for key in stale:
+                del request_map.rows[key]
+        if stale:
+            logger.debug(f"🗑️ (IdentityMap) {len(stale)} entrada(s) de {table} invalidada(s)")
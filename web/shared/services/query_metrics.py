@@ -0,0 +1,197 @@
+"""
+Contabilidad por petición de las llamadas remotas a Supabase.
+
+Todas las llamadas (PostgREST, RPC, Auth y Admin) pasan por el pool HTTP
+compartido (ver accounts.client.supabase_client.get_http_client), cuyo
+transporte es un InstrumentedTransport. Mientras haya una medición activa en el
+contexto actual (ver config.middleware.QueryMetricsMiddleware), cada llamada
+queda registrada con el método que la originó, la tabla, la duración y el
+número de filas.
+"""
+import contextvars
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+# Prefijos de módulos de la aplicación (para inferir el método que origina la llamada)
+APP_MODULE_PREFIXES = ("apps.", "accounts.", "shared.", "config.")
+
+# Módulos de infraestructura que nunca se consideran el origen de una llamada
+_SKIPPED_MODULES = ("accounts.client.", "shared.services.query_metrics")
+
+_UUID_RE = re.compile(r"/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.I)
+
+# Medición activa y etiqueta del método en curso (por petición / tarea)
+_current: "contextvars.ContextVar[Optional[QueryMetrics]]" = contextvars.ContextVar(
+    "supabase_query_metrics", default=None
+)
+_label: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar(
+    "supabase_query_label", default=None
+)
+
+
+@dataclass
+class QueryRecord:
+    """Una llamada remota a Supabase."""
+    method_name: str
+    kind: str          # rest | rpc | auth
+    table: str         # tabla, función RPC o ruta de auth
+    http_method: str
+    status: int
+    duration_ms: float
+    rows: Optional[int]
+
+
+@dataclass
+class QueryMetrics:
+    """Llamadas registradas durante una petición (o un bloque medido)."""
+    records: List[QueryRecord] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    # --- Medición ---
+
+    @classmethod
+    def start(cls) -> contextvars.Token:
+        """Activa una medición nueva en el contexto actual y devuelve su token."""
+        return _current.set(cls())
+
+    @classmethod
+    def stop(cls, token: contextvars.Token) -> "QueryMetrics":
+        """Finaliza la medición activada con `token` y la devuelve."""
+        metrics = _current.get()
+        _current.reset(token)
+        return metrics
+
+    @classmethod
+    def current(cls) -> Optional["QueryMetrics"]:
+        """Medición activa en el contexto actual, o None."""
+        return _current.get()
+
+    @classmethod
+    @contextmanager
+    def label(cls, method_name: str) -> Iterator[None]:
+        """
+        Asocia las llamadas hechas dentro del bloque a `method_name`.
+
+        Lo usan los helpers `_execute_query`/`_execute_single`; las llamadas
+        directas a `.execute()` se atribuyen inspeccionando la pila.
+        """
+        token = _label.set(method_name)
+        try:
+            yield
+        finally:
+            _label.reset(token)
+
+    @classmethod
+    def resolve_method_name(cls) -> str:
+        """Nombre del método de la aplicación que originó la llamada en curso."""
+        label = _label.get()
+        if label:
+            return label
+        frame = sys._getframe(1)
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "")
+            if module.startswith(APP_MODULE_PREFIXES) and not module.startswith(_SKIPPED_MODULES):
+                return frame.f_code.co_qualname
+            frame = frame.f_back
+        return "desconocido"
+
+    def add(self, record: QueryRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    # --- Resumen ---
+
+    @property
+    def total_calls(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(record.duration_ms for record in self.records)
+
+    def by_kind(self) -> Dict[str, Dict[str, float]]:
+        """Llamadas y tiempo total agrupados por tipo (rest, rpc, auth)."""
+        summary: Dict[str, Dict[str, float]] = {}
+        for record in self.records:
+            entry = summary.setdefault(record.kind, {"calls": 0, "ms": 0.0})
+            entry["calls"] += 1
+            entry["ms"] += record.duration_ms
+        return summary
+
+    def server_timing(self) -> str:
+        """Valor de la cabecera `Server-Timing` con el total y el desglose por tipo."""
+        metrics = [f'supabase;dur={self.total_ms:.1f};desc="{self.total_calls} llamadas"']
+        for kind, entry in sorted(self.by_kind().items()):
+            metrics.append(f'supabase-{kind};dur={entry["ms"]:.1f};desc="{entry["calls"]} llamadas"')
+        return ", ".join(metrics)
+
+
+def _rows_from_content_range(value: Optional[str]) -> Optional[int]:
+    """Filas devueltas según `Content-Range` ("0-24/*" -> 25, "*/0" -> 0)."""
+    if not value:
+        return None
+    span = value.split("/", 1)[0]
+    if span == "*":
+        return 0
+    start, _, end = span.partition("-")
+    try:
+        return int(end) - int(start) + 1
+    except ValueError:
+        return None
+
+
+def _classify(path: str) -> tuple:
+    """Tipo de llamada y objetivo (tabla, función o ruta de auth) a partir de la URL."""
+    if "/rest/v1/rpc/" in path:
+        return "rpc", path.split("/rest/v1/rpc/", 1)[1]
+    if "/rest/v1/" in path:
+        return "rest", path.split("/rest/v1/", 1)[1]
+    if "/auth/v1/" in path:
+        return "auth", _UUID_RE.sub("/:id", path.split("/auth/v1/", 1)[1])
+    return "other", path
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """
+    Transporte httpx que registra cada llamada en la medición activa.
+
+    Sin medición activa solo delega en el transporte envuelto. La respuesta se
+    lee dentro del transporte para que la duración incluya el cuerpo (los
+    clientes de Supabase nunca usan respuestas en streaming).
+    """
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        metrics = QueryMetrics.current()
+        if metrics is None:
+            return self._transport.handle_request(request)
+
+        start = time.perf_counter()
+        response = self._transport.handle_request(request)
+        try:
+            response.read()
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            kind, table = _classify(request.url.path)
+            metrics.add(QueryRecord(
+                method_name=QueryMetrics.resolve_method_name(),
+                kind=kind,
+                table=table,
+                http_method=request.method,
+                status=response.status_code,
+                duration_ms=duration_ms,
+                rows=_rows_from_content_range(response.headers.get("content-range")),
+            ))
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from accounts.client.supabase_client import get_supabase
+from shared.services.cache_scope import bounded_ttl
+from supabase import PostgrestAPIError
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceDataService:
+    """
+    Caché en proceso para las tablas de catálogo (datos de referencia).
+
+    Las tablas de catálogo son pequeñas y casi nunca cambian, pero se consultan
+    en casi todas las páginas. Este servicio guarda cada tabla completa en memoria
+    (ordenada por nombre) con un TTL por tabla, y las devuelve como copias para
+    que los llamadores puedan modificarlas sin afectar la caché.
+
+    La invalidación se basa en versiones: `invalidate(table)` incrementa un
+    número de versión en la caché de Django, y cualquier copia local con una
+    versión distinta se descarta en la siguiente lectura. Solo con una caché
+    compartida (REDIS_URL) la invalidación alcanza a todos los workers; con la
+    caché en memoria el TTL se acota a LOCAL_CACHE_MAX_STALENESS, que es el
+    máximo que los demás procesos pueden servir una tabla obsoleta.
+    """
+
+    # TTL por defecto (segundos) para cada tabla de catálogo soportada.
+    # Puede sobrescribirse con settings.REFERENCE_DATA_TTL = {'tabla': segundos}.
+    TABLES: Dict[str, int] = {
+        'vehicle_type': 3600,
+        'vehicle_status': 3600,
+        'fuel_type': 3600,
+        'transmission_type': 3600,
+        'oil_type': 3600,
+        'coolant_type': 3600,
+        'task_type': 3600,
+        'maintenance_type': 3600,
+        'maintenance_order_status': 3600,
+        'role': 600,
+    }
+
+    # Caché local: tabla -> (versión, timestamp de carga, filas)
+    _store: Dict[str, tuple] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_cached_table(table_name: str) -> bool:
+        """Indica si la tabla se sirve desde esta caché."""
+        return table_name in ReferenceDataService.TABLES
+
+    @staticmethod
+    def _get_ttl(table_name: str) -> int:
+        overrides = getattr(settings, 'REFERENCE_DATA_TTL', {}) or {}
+        return bounded_ttl(overrides.get(table_name, ReferenceDataService.TABLES[table_name]))
+
+    @staticmethod
+    def _version_key(table_name: str) -> str:
+        return f"reference_data_version:{table_name}"
+
+    @staticmethod
+    def _get_version(table_name: str) -> int:
+        return cache.get(ReferenceDataService._version_key(table_name), 0)
+
+    @staticmethod
+    def _fetch(table_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Descarga la tabla completa desde Supabase (None si hay error)."""
+        try:
+            response = get_supabase().table(table_name).select("*").order("name").execute()
+            logger.debug(f"📊 (ReferenceDataService) {table_name} cargada ({len(response.data or [])} filas)")
+            return response.data or []
+        except PostgrestAPIError as e:
+            logger.error(f"❌ (ReferenceDataService) Error de API cargando {table_name}: {e.message}", exc_info=True)
+        except Exception as e:
+            logger.error(f"❌ (ReferenceDataService) Error inesperado cargando {table_name}: {e}", exc_info=True)
+        return None
+
+    @staticmethod
+    def get_rows(table_name: str) -> List[Dict[str, Any]]:
+        """
+        Obtiene las filas cacheadas de una tabla SIN copiarlas.
+
+        Pensado para índices derivados (ver StatusRegistry): la lista devuelve
+        siempre el mismo objeto mientras la tabla no se recargue, por lo que
+        puede usarse su identidad para detectar cambios. No debe modificarse.
+
+        Args:
+            table_name: Nombre de la tabla (debe estar en TABLES).
+
+        Returns:
+            Lista de filas cacheadas, o lista vacía si la carga falla.
+
+        Raises:
+            KeyError: Si la tabla no es una tabla de catálogo soportada.
+        """
+        if table_name not in ReferenceDataService.TABLES:
+            raise KeyError(f"'{table_name}' no es una tabla de referencia en caché")
+
+        version = ReferenceDataService._get_version(table_name)
+        entry = ReferenceDataService._store.get(table_name)
+        ttl = ReferenceDataService._get_ttl(table_name)
+
+        if entry is not None and entry[0] == version and time.time() - entry[1] < ttl:
+            return entry[2]
+
+        rows = ReferenceDataService._fetch(table_name)
+        if rows is None:
+            # No cachear errores; usar la copia anterior si existe
+            return entry[2] if entry is not None else []
+
+        with ReferenceDataService._lock:
+            ReferenceDataService._store[table_name] = (version, time.time(), rows)
+        return rows
+
+    @staticmethod
+    def get_table(table_name: str, columns: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene todas las filas de una tabla de catálogo, ordenadas por nombre.
+
+        Args:
+            table_name: Nombre de la tabla (debe estar en TABLES).
+            columns: Columnas a incluir en cada fila (todas si es None).
+
+        Returns:
+            Lista de copias de las filas, o lista vacía si la carga falla.
+
+        Raises:
+            KeyError: Si la tabla no es una tabla de catálogo soportada.
+        """
+        rows = ReferenceDataService.get_rows(table_name)
+        if columns is None:
+            return [dict(row) for row in rows]
+        columns = list(columns)
+        return [{col: row.get(col) for col in columns} for row in rows]
+
+    @staticmethod
+    def invalidate(table_name: Optional[str] = None) -> None:
+        """
+        Invalida una tabla (o todas) para que la siguiente lectura la recargue.
+
+        Args:
+            table_name: Tabla a invalidar; None invalida todas las tablas.
+        """
+        tables = [table_name] if table_name else list(ReferenceDataService.TABLES)
+        for table in tables:
+            if table not in ReferenceDataService.TABLES:
+                continue
+            key = ReferenceDataService._version_key(table)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout=None)
+            with ReferenceDataService._lock:
+                ReferenceDataService._store.pop(table, None)
+            logger.info(f"🗑️ (ReferenceDataService) Caché invalidada para {table}")
+
+    @staticmethod
+    def warm_up() -> None:
+        """Carga en memoria todas las tablas de catálogo (usado al iniciar la aplicación)."""
+        logger.info("🔥 (ReferenceDataService) Precargando tablas de catálogo...")
+        for table_name in ReferenceDataService.TABLES:
+            ReferenceDataService.get_table(table_name)
+        logger.info("✅ (ReferenceDataService) Precarga de catálogos completada")
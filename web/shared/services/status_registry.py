@@ -0,0 +1,142 @@
+"""
+Registro compartido de estados (vehículos y órdenes de mantención).
+
+Resuelve nombre <-> id de `vehicle_status` y `maintenance_order_status` sin
+consultas adicionales, a partir de las tablas cacheadas por
+ReferenceDataService. Los índices se reconstruyen automáticamente cuando la
+tabla se recarga (TTL o invalidación desde el CRUD de catálogos).
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from .reference_data_service import ReferenceDataService
+
+logger = logging.getLogger(__name__)
+
+
+class StatusRegistry:
+    """Registro memoizado y bidireccional de estados de vehículos y órdenes."""
+
+    VEHICLE_STATUS_TABLE = 'vehicle_status'
+    ORDER_STATUS_TABLE = 'maintenance_order_status'
+
+    # Keywords para identificar estados de orden que indican finalización
+    COMPLETION_KEYWORDS: Set[str] = {'cancel', 'termin', 'final', 'complet', 'cerrad'}
+
+    # Índices derivados: tabla -> (filas de origen, índice)
+    _indexes: Dict[str, tuple] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def name_is_completion(status_name: str) -> bool:
+        """Indica si un nombre de estado de orden contiene keywords de finalización."""
+        if not status_name:
+            return False
+        status_lower = status_name.lower()
+        return any(keyword in status_lower for keyword in StatusRegistry.COMPLETION_KEYWORDS)
+
+    @staticmethod
+    def _get_index(table_name: str) -> Dict[str, Any]:
+        """
+        Obtiene (o reconstruye) los índices de una tabla de estados.
+
+        Returns:
+            Dict con 'by_id' (id -> estado) y 'by_name' (nombre en minúsculas -> estado).
+            Cada estado incluye 'id', 'name' e 'is_completion'.
+        """
+        rows = ReferenceDataService.get_rows(table_name)
+        cached = StatusRegistry._indexes.get(table_name)
+        if cached is not None and cached[0] is rows:
+            return cached[1]
+
+        by_id: Dict[int, Dict[str, Any]] = {}
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            name = row.get('name') or ''
+            status = {
+                'id': row.get('id'),
+                'name': name,
+                'is_completion': StatusRegistry.name_is_completion(name),
+            }
+            by_id[status['id']] = status
+            by_name[name.strip().lower()] = status
+
+        index = {'by_id': by_id, 'by_name': by_name}
+        with StatusRegistry._lock:
+            StatusRegistry._indexes[table_name] = (rows, index)
+        logger.debug(f"🗂️ (StatusRegistry) Índice de {table_name} construido ({len(by_id)} estados)")
+        return index
+
+    @staticmethod
+    def _by_name(table_name: str, status_name: str) -> Optional[Dict[str, Any]]:
+        if not status_name:
+            return None
+        status = StatusRegistry._get_index(table_name)['by_name'].get(status_name.strip().lower())
+        return dict(status) if status else None
+
+    @staticmethod
+    def _by_id(table_name: str, status_id: Any) -> Optional[Dict[str, Any]]:
+        if status_id in (None, ''):
+            return None
+        try:
+            status_id = int(status_id)
+        except (TypeError, ValueError):
+            return None
+        status = StatusRegistry._get_index(table_name)['by_id'].get(status_id)
+        return dict(status) if status else None
+
+    # --- Estados de vehículo ---
+
+    @staticmethod
+    def get_vehicle_status(status_name: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un estado de vehículo por nombre (sin distinguir mayúsculas)."""
+        return StatusRegistry._by_name(StatusRegistry.VEHICLE_STATUS_TABLE, status_name)
+
+    @staticmethod
+    def get_vehicle_status_id(status_name: str) -> Optional[int]:
+        """Obtiene el ID de un estado de vehículo por nombre, o None si no existe."""
+        status = StatusRegistry.get_vehicle_status(status_name)
+        return status['id'] if status else None
+
+    @staticmethod
+    def get_vehicle_status_by_id(status_id: Any) -> Optional[Dict[str, Any]]:
+        """Obtiene un estado de vehículo por ID."""
+        return StatusRegistry._by_id(StatusRegistry.VEHICLE_STATUS_TABLE, status_id)
+
+    # --- Estados de orden de mantención ---
+
+    @staticmethod
+    def get_order_status(status_name: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un estado de orden por nombre (sin distinguir mayúsculas)."""
+        return StatusRegistry._by_name(StatusRegistry.ORDER_STATUS_TABLE, status_name)
+
+    @staticmethod
+    def get_order_status_id(status_name: str) -> Optional[int]:
+        """Obtiene el ID de un estado de orden por nombre, o None si no existe."""
+        status = StatusRegistry.get_order_status(status_name)
+        return status['id'] if status else None
+
+    @staticmethod
+    def get_order_status_by_id(status_id: Any) -> Optional[Dict[str, Any]]:
+        """Obtiene un estado de orden por ID (incluye 'is_completion')."""
+        return StatusRegistry._by_id(StatusRegistry.ORDER_STATUS_TABLE, status_id)
+
+    @staticmethod
+    def is_completion_order_status(status_name: str) -> bool:
+        """
+        Indica si un estado de orden (por nombre) es de finalización.
+
+        Usa el flag precalculado del registro y, para nombres desconocidos,
+        recurre a la búsqueda de keywords.
+        """
+        status = StatusRegistry.get_order_status(status_name)
+        if status is not None:
+            return status['is_completion']
+        return StatusRegistry.name_is_completion(status_name)
+
+    @staticmethod
+    def get_completion_order_status_ids() -> List[int]:
+        """Obtiene los IDs de todos los estados de orden de finalización."""
+        index = StatusRegistry._get_index(StatusRegistry.ORDER_STATUS_TABLE)
+        return [status_id for status_id, status in index['by_id'].items() if status['is_completion']]
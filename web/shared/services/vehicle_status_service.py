@@ -7,8 +7,9 @@ Puede ser utilizado tanto por fire_station como por workshop.
 """
 import logging
 from typing import Optional, Dict, Any
-from datetime import datetime
 from accounts.client.supabase_client import get_supabase
+from .identity_map import IdentityMap
+from .status_registry import StatusRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +29,9 @@ class VehicleStatusService:
             Dict con información del estado o None si no existe.
         """
         try:
-            client = get_supabase()
-            result = client.table('vehicle_status') \
-                .select('id, name') \
-                .ilike('name', status_name) \
-                .maybe_single() \
-                .execute()
-            
-            return result.data if result.data else None
+            # Resuelto desde el registro en memoria (sin round-trip)
+            status = StatusRegistry.get_vehicle_status(status_name)
+            return {'id': status['id'], 'name': status['name']} if status else None
         except Exception as e:
             logger.error(f"❌ Error obteniendo estado '{status_name}': {e}", exc_info=True)
             return None
@@ -46,88 +42,57 @@ class VehicleStatusService:
         status_id: int,
         user_id: str,
         reason: str = '',
-        auto_generated: bool = False
+        auto_generated: bool = False,
+        fire_station_id: Optional[int] = None
     ) -> bool:
         """
         Actualiza el estado de un vehículo y registra el cambio en el historial.
         
+        Usa la función `transition_vehicle_status` de la base de datos: una sola
+        llamada que cambia el estado y escribe en vehicle_status_log en la misma
+        transacción. Si el vehículo ya tiene ese estado no se hace nada.
+        
         Args:
             vehicle_id: ID del vehículo.
             status_id: ID del nuevo estado.
             user_id: ID del usuario que realiza el cambio.
             reason: Razón del cambio de estado.
             auto_generated: Si True, indica que el cambio fue automático (por el sistema).
+            fire_station_id: Si se indica, solo cambia el estado si el vehículo pertenece a ese cuartel.
             
         Returns:
-            True si se actualizó correctamente, False en caso contrario.
+            True si se actualizó correctamente (o ya tenía ese estado), False en caso contrario.
         """
+        # Preparar el mensaje de razón
+        if auto_generated and not reason:
+            reason = 'Cambio automático generado por el sistema'
+        elif auto_generated and reason:
+            reason = f'Automático: {reason}'
+        
+        params = {
+            'p_vehicle_id': vehicle_id,
+            'p_status_id': status_id,
+            'p_user_id': user_id,
+            'p_reason': reason or '',
+            'p_fire_station_id': fire_station_id,
+        }
+        
         try:
-            client = get_supabase()
+            result = get_supabase().rpc('transition_vehicle_status', params).execute()
+            payload = result.data or {}
             
-            # Obtener el estado actual del vehículo antes de actualizar
-            current_vehicle = client.table('vehicle') \
-                .select('vehicle_status_id') \
-                .eq('id', vehicle_id) \
-                .maybe_single() \
-                .execute()
-            
-            if not current_vehicle.data:
+            if not payload.get('found'):
                 logger.error(f"❌ Vehículo {vehicle_id} no encontrado")
                 return False
             
-            current_status_id = current_vehicle.data.get('vehicle_status_id')
-            
-            # Si el estado es el mismo, no hacer nada
-            if current_status_id == status_id:
+            if payload.get('changed'):
+                # Las órdenes leídas en la petición embeben el vehículo
+                IdentityMap.invalidate('vehicle', vehicle_id)
+                IdentityMap.invalidate('maintenance_order')
+                logger.info(f"✅ Estado del vehículo {vehicle_id} actualizado a {status_id} y registrado en historial")
+            else:
                 logger.debug(f"ℹ️ Vehículo {vehicle_id} ya tiene el estado {status_id}")
-                return True
-            
-            # Actualizar el estado del vehículo
-            update_data = {
-                'vehicle_status_id': status_id,
-                'updated_at': datetime.utcnow().isoformat()
-            }
-            
-            vehicle_updated = client.table('vehicle') \
-                .update(update_data) \
-                .eq('id', vehicle_id) \
-                .execute()
-            
-            if not vehicle_updated.data:
-                logger.error(f"❌ Error actualizando estado del vehículo {vehicle_id}")
-                return False
-            
-            # Preparar el mensaje de razón
-            if auto_generated and not reason:
-                reason = 'Cambio automático generado por el sistema'
-            elif auto_generated and reason:
-                reason = f'Automático: {reason}'
-            
-            # Registrar el cambio en el log
-            log_data = {
-                'vehicle_id': vehicle_id,
-                'changed_by_user_id': user_id,
-                'vehicle_status_id': status_id,
-                'change_date': datetime.utcnow().isoformat(),
-                'reason': reason or ''
-            }
-            
-            try:
-                log_created = client.table('vehicle_status_log') \
-                    .insert(log_data) \
-                    .execute()
-                
-                if log_created.data:
-                    logger.info(f"✅ Estado del vehículo {vehicle_id} actualizado a {status_id} y registrado en historial")
-                    return True
-                else:
-                    logger.warning(f"⚠️ Estado del vehículo {vehicle_id} actualizado pero no se registró en historial")
-                    logger.warning(f"⚠️ Log data que intentó insertar: {log_data}")
-                    return True  # El cambio de estado se hizo, aunque falló el log
-            except Exception as log_error:
-                logger.error(f"❌ Error al insertar en vehicle_status_log: {log_error}", exc_info=True)
-                logger.error(f"❌ Datos que intentó insertar: {log_data}")
-                return True  # El cambio de estado se hizo, aunque falló el log
+            return True
             
         except Exception as e:
             logger.error(f"❌ Error actualizando estado del vehículo {vehicle_id}: {e}", exc_info=True)